@@ -0,0 +1,163 @@
+"""
+재개 가능한 청크 단위 처리
+비디오를 고정 길이(키프레임 경계) 청크로 나눠 영구 작업 폴더에 하나씩 인코딩하고 manifest에 완료 상태를 기록
+중단/실패 후 같은 입력 + 같은 설정으로 다시 실행하면 마지막 완료 청크 다음부터 이어서 처리한 뒤 연결
+"""
+
+import os
+import json
+import math
+import shutil
+from pathlib import Path
+from utils.logger import logger
+from utils.cache_utils import fast_content_hash, config_hash
+from utils.result_cache import relevant_config
+from utils.video_utils import get_video_info, plan_segments, concat_segments
+import config
+
+MANIFEST_NAME = "manifest.json"
+
+
+def _job_key(video_path, method, client_options):
+    """입력 내용 + 처리 방법 + 출력에 영향을 주는 설정으로 작업 키 생성"""
+    settings = relevant_config(method)
+    settings.update(client_options or {})
+    return config_hash({
+        'content': fast_content_hash(video_path),
+        'method': method,
+        'settings': settings,
+    })
+
+
+def _save_manifest(work_dir, manifest):
+    """manifest 저장 (원자적 교체, 중간에 죽어도 이전 상태 유지)"""
+    path = os.path.join(work_dir, MANIFEST_NAME)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def _load_or_plan_manifest(work_dir, video_path, key, video_info=None):
+    """
+    기존 manifest 로드 (키가 같을 때만) 또는 새 청크 계획 생성
+
+    Returns:
+        dict or None: manifest (청크로 나눌 수 없으면 None)
+    """
+    path = os.path.join(work_dir, MANIFEST_NAME)
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('key') == key:
+                return manifest
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable manifest {path}: {str(e)}")
+
+    info = video_info or get_video_info(video_path)
+    if info is None or not info.exact or not info.duration:
+        return None
+    duration = info.duration
+    # 짧은 비디오는 청크 연결/mux 패스 비용이 재개 이점보다 큼 → 단일 패스
+    if duration <= config.RESUME_MIN_DURATION:
+        return None
+
+    chunk_duration = float(config.RESUME_CHUNK_DURATION)
+    count = math.ceil(duration / chunk_duration)
+    if count < 2:
+        return None
+    segments = plan_segments(duration, info.keyframes, count, chunk_duration / 2)
+
+    manifest = {
+        'video': os.path.abspath(video_path),
+        'key': key,
+        'duration': duration,
+        'chunks': [
+            {'start': start, 'duration': seg_duration, 'file': f"chunk_{i:04d}.mp4", 'done': False}
+            for i, (start, seg_duration) in enumerate(segments)
+        ],
+    }
+    os.makedirs(work_dir, exist_ok=True)
+    _save_manifest(work_dir, manifest)
+    return manifest
+
+
+def process_video_resumable(client, video_path, output_path, method, client_options=None, video_info=None):
+    """
+    청크 단위로 처리하고 연결 (완료된 청크는 재실행 시 건너뜀)
+
+    Args:
+        client: process_segment(video_path, output_path, start, duration, reset_state)를 가진 클라이언트
+                (LocalGPUClient 또는 VideoEnhancementPipeline)
+        video_path: 입력 비디오 경로
+        output_path: 출력 비디오 경로
+        method: "local_gpu" 또는 "enhance" (작업 키 생성용)
+        client_options: 출력에 영향을 주는 클라이언트별 설정 (작업 키 생성용)
+        video_info: 미리 조회한 VideoInfo (None이면 get_video_info)
+
+    Returns:
+        bool or None: 성공 여부 (청크로 나눌 수 없거나 짧은 비디오면 None → 호출자가 단일 경로로 처리)
+    """
+    key = _job_key(video_path, method, client_options)
+    work_dir = os.path.join(config.RESUME_WORK_DIR, f"{Path(video_path).stem}_{method}_{key}")
+
+    manifest = _load_or_plan_manifest(work_dir, video_path, key, video_info)
+    if manifest is None:
+        return None
+
+    chunks = manifest['chunks']
+    duration = manifest['duration']
+    done_count = sum(1 for chunk in chunks if chunk['done'] and os.path.exists(os.path.join(work_dir, chunk['file'])))
+    if done_count:
+        logger.info(f"Resuming from chunk {done_count + 1}/{len(chunks)} ({work_dir})")
+    else:
+        logger.info(f"Chunked processing: {len(chunks)} chunks of ~{config.RESUME_CHUNK_DURATION:.0f}s ({work_dir})")
+
+    progress_callback = client.progress_callback
+    # 이번 실행의 첫 청크에서만 탐지/ROI/시간축 상태 초기화 (이후 청크는 같은 비디오의 연속)
+    first_chunk = True
+    try:
+        for i, chunk in enumerate(chunks):
+            chunk_path = os.path.join(work_dir, chunk['file'])
+            if chunk['done'] and os.path.exists(chunk_path):
+                continue
+
+            if client.stop_event and client.stop_event.is_set():
+                logger.warning(f"Chunked processing stopped by user, {i}/{len(chunks)} chunks kept for resume")
+                return False
+
+            # 전체 진행률 = 완료 청크 길이 + 현재 청크 진행률 (청크 길이 가중)
+            start = chunk['start']
+            length = chunk['duration'] if chunk['duration'] is not None else duration - start
+
+            def chunk_progress(message, progress, start=start, length=length, index=i):
+                if progress_callback:
+                    overall = (start + length * progress / 100) / duration * 100
+                    progress_callback(f"[Chunk {index + 1}/{len(chunks)}] {message}", min(overall, 99.0))
+
+            client.progress_callback = chunk_progress
+
+            # 클라이언트가 임시 이름으로 인코딩 후 완료 시에만 교체 (중단된 청크는 다음 실행에서 다시 처리)
+            if not client.process_segment(video_path, chunk_path, start, chunk['duration'],
+                                          reset_state=first_chunk):
+                logger.warning(f"Chunk {i + 1}/{len(chunks)} not completed, {i}/{len(chunks)} chunks kept for resume")
+                return False
+            first_chunk = False
+
+            chunk['done'] = True
+            _save_manifest(work_dir, manifest)
+    finally:
+        client.progress_callback = progress_callback
+
+    # 무손실 연결 + 원본 오디오 mux
+    chunk_paths = [os.path.join(work_dir, chunk['file']) for chunk in chunks]
+    if not concat_segments(chunk_paths, output_path, audio_source=video_path):
+        return False
+
+    if not config.RESUME_KEEP_WORK_DIR:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if progress_callback:
+        progress_callback("Chunked processing complete", 100.0)
+    return True
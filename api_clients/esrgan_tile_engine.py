@@ -0,0 +1,176 @@
+"""
+프레임 간 타일 배치 Real-ESRGAN 업스케일 엔진
+연속된 여러 프레임에서 같은 크기의 타일을 잘라 고정 크기 배치로 쌓아 RRDBNet을 한 번에 실행하고,
+겹치는 타일 경계는 선형 가중치로 블렌딩해 이음새 없이 합침
+(RealESRGANer.enhance는 한 프레임의 타일을 하나씩 처리해 배치 크기가 1)
+"""
+
+import torch
+import torch.nn.functional as F
+from utils.logger import logger
+import config
+
+
+def _window_starts(length, window, stride):
+    """
+    한 축의 타일 시작 위치 (모든 타일이 같은 크기가 되도록 마지막 타일은 안쪽으로 당김)
+
+    Args:
+        length: 이미지 길이
+        window: 타일 길이 (여백 포함)
+        stride: 타일 간격 (여백 제외 타일 크기)
+    """
+    if length <= window:
+        return [0]
+    starts = list(range(0, length - window, stride))
+    starts.append(length - window)
+    return starts
+
+
+def _blend_ramp(length, ramp, device):
+    """
+    타일 가장자리에서 안쪽으로 증가하는 1D 블렌딩 가중치 (항상 0보다 큼)
+
+    Args:
+        length: 출력 타일 길이
+        ramp: 가장자리 가중치 증가 구간 길이 (출력 픽셀)
+    """
+    positions = torch.arange(length, device=device, dtype=torch.float32)
+    distance = torch.minimum(positions, length - 1 - positions) + 1
+    if ramp <= 0:
+        return torch.ones(length, device=device)
+    return (distance / (ramp + 1)).clamp_(max=1.0)
+
+
+class TileBatchUpscaler:
+    """여러 프레임의 타일을 고정 크기 배치로 묶어 추론하는 업스케일러"""
+
+    def __init__(self, model, device, half=False, scale=None, tile_size=None, tile_pad=None, pre_pad=None,
+                 batch_size=None):
+        """
+        Args:
+            model: RRDBNet 모듈 (RealESRGANer.model, 디바이스/정밀도 적용 완료)
+            device: "cpu" 또는 "cuda:N"
+            half: FP16 입력 여부 (모델 정밀도와 일치해야 함)
+            scale: 업스케일 배율 (None이면 config.ESRGAN_SCALE)
+            tile_size: 타일 크기 (None이면 config.ESRGAN_TILE_SIZE, 0 = 프레임 전체를 하나의 타일로)
+            tile_pad: 타일 겹침 여백 (None이면 config.ESRGAN_TILE_PAD)
+            pre_pad: 입력 가장자리 반사 패딩 (None이면 config.ESRGAN_PRE_PAD)
+            batch_size: 한 번의 forward에 쌓을 타일 수 (None이면 config.ESRGAN_TILE_BATCH_SIZE)
+        """
+        self.model = model
+        self.device = torch.device(device)
+        self.half = half
+        self.scale = config.ESRGAN_SCALE if scale is None else scale
+        self.tile_size = config.ESRGAN_TILE_SIZE if tile_size is None else tile_size
+        self.tile_pad = config.ESRGAN_TILE_PAD if tile_pad is None else tile_pad
+        self.pre_pad = config.ESRGAN_PRE_PAD if pre_pad is None else pre_pad
+        self.batch_size = max(1, int(config.ESRGAN_TILE_BATCH_SIZE if batch_size is None else batch_size))
+        # GPU는 마지막 배치도 같은 크기로 채워 커널/cuDNN 알고리즘 재선택을 피함 (CPU는 연산 낭비라 생략)
+        self.fixed_batch = self.device.type == "cuda"
+        self._weights = {}  # (출력 타일 높이, 너비) → 블렌딩 가중치
+
+    def _blend_weight(self, out_height, out_width):
+        """출력 타일 크기별 2D 블렌딩 가중치 (캐시)"""
+        key = (out_height, out_width)
+        if key not in self._weights:
+            ramp = self.tile_pad * self.scale
+            weight_y = _blend_ramp(out_height, ramp, self.device)
+            weight_x = _blend_ramp(out_width, ramp, self.device)
+            self._weights[key] = (weight_y[:, None] * weight_x[None, :])[None]
+        return self._weights[key]
+
+    def _to_tensor(self, frame):
+        """BGR uint8 프레임 → RGB 0-1 텐서 (업로드는 uint8로 하고 변환은 디바이스에서)"""
+        image = torch.from_numpy(frame).to(self.device, non_blocking=True)
+        image = image.permute(2, 0, 1)[[2, 1, 0]].float().div_(255.0)
+        if self.pre_pad:
+            image = F.pad(image[None], (0, self.pre_pad, 0, self.pre_pad), mode='reflect')[0]
+        return image.half() if self.half else image
+
+    def _to_frame(self, image, height, width):
+        """RGB 0-1 텐서 → BGR uint8 프레임 (pre_pad 영역 제거)"""
+        image = image[:, :height * self.scale, :width * self.scale]
+        image = image[[2, 1, 0]].clamp_(0, 1).mul_(255.0).round_().byte()
+        return image.permute(1, 2, 0).contiguous().cpu().numpy()
+
+    def upscale(self, frames):
+        """
+        프레임 묶음 업스케일
+
+        Args:
+            frames: 같은 크기의 BGR 프레임 리스트
+
+        Returns:
+            list: 업스케일된 BGR 프레임 리스트 (입력 순서 유지)
+        """
+        if not frames:
+            return []
+
+        height, width = frames[0].shape[:2]
+        images = [self._to_tensor(frame) for frame in frames]
+        padded_height, padded_width = images[0].shape[1:]
+
+        # 모든 타일이 같은 크기 (여백 포함) → 프레임 경계를 넘어 하나의 배치로 쌓을 수 있음
+        if self.tile_size:
+            window_height = min(self.tile_size + 2 * self.tile_pad, padded_height)
+            window_width = min(self.tile_size + 2 * self.tile_pad, padded_width)
+        else:
+            window_height, window_width = padded_height, padded_width
+        stride_y = max(1, window_height - 2 * self.tile_pad)
+        stride_x = max(1, window_width - 2 * self.tile_pad)
+
+        windows = [
+            (index, y, x)
+            for index in range(len(images))
+            for y in _window_starts(padded_height, window_height, stride_y)
+            for x in _window_starts(padded_width, window_width, stride_x)
+        ]
+
+        out_height, out_width = window_height * self.scale, window_width * self.scale
+        weight = self._blend_weight(out_height, out_width)
+        outputs = [torch.zeros((3, padded_height * self.scale, padded_width * self.scale),
+                               device=self.device, dtype=torch.float32) for _ in images]
+        weight_sums = [torch.zeros((1, padded_height * self.scale, padded_width * self.scale),
+                                   device=self.device, dtype=torch.float32) for _ in images]
+
+        # 타일이 배치보다 적으면 (예: 타일 없음) 타일 수만큼만
+        batch_size = min(self.batch_size, len(windows))
+        with torch.no_grad():
+            for start in range(0, len(windows), batch_size):
+                chunk = windows[start:start + batch_size]
+                batch = torch.stack([images[index][:, y:y + window_height, x:x + window_width]
+                                     for index, y, x in chunk])
+                if self.fixed_batch and len(chunk) < batch_size:
+                    batch = F.pad(batch, (0, 0, 0, 0, 0, 0, 0, batch_size - len(chunk)))
+
+                result = self.model(batch)[:len(chunk)].float()
+
+                # 겹치는 영역은 가중 합 후 가중치 합으로 나눔 (타일 가장자리일수록 낮은 가중치)
+                for (index, y, x), tile in zip(chunk, result):
+                    oy, ox = y * self.scale, x * self.scale
+                    outputs[index][:, oy:oy + out_height, ox:ox + out_width].addcmul_(tile, weight)
+                    weight_sums[index][:, oy:oy + out_height, ox:ox + out_width].add_(weight)
+
+        return [self._to_frame(output.div_(weight_sum), height, width)
+                for output, weight_sum in zip(outputs, weight_sums)]
+
+
+def create_tile_engine(upsampler, device, half):
+    """
+    RealESRGANer의 모델을 공유하는 배치 엔진 생성
+
+    Args:
+        upsampler: RealESRGANer 인스턴스
+        device: 디바이스 문자열
+        half: FP16 여부
+
+    Returns:
+        TileBatchUpscaler or None: 모델을 꺼낼 수 없으면 None (프레임별 enhance 사용)
+    """
+    model = getattr(upsampler, 'model', None)
+    if not isinstance(model, torch.nn.Module):
+        return None
+    logger.info(f"ESRGAN batched tile engine: {config.ESRGAN_TILE_BATCH_SIZE} tiles per forward, "
+                f"{config.ESRGAN_BATCH_FRAMES} frames per batch")
+    return TileBatchUpscaler(model, device, half=half)
@@ -0,0 +1,220 @@
+"""
+Real-ESRGAN 타일 크기 자동 선택
+RRDBNet의 최대 메모리는 타일 면적에 비례하므로, 사용 가능한 RAM/VRAM에 들어가는 후보만
+첫 프레임으로 벤치마크해 가장 빠른 타일 크기를 고르고 (해상도, 디바이스, 정밀도)별로 캐시
+"""
+
+import os
+import json
+import math
+import time
+import threading
+from utils.logger import logger
+import config
+
+# RRDBNet x4 추론 시 입력 픽셀당 동시에 살아 있는 특징맵 채널 수 (대략)
+# 저해상도 dense block ~450채널 + 4배 업샘플 단계(64채널 × 16배 면적 × 입출력 3개) ≈ 3072
+_ACTIVATION_CHANNELS_PER_PIXEL = 3072
+
+_cache_lock = threading.Lock()
+_tile_cache = None
+
+
+def estimate_tile_memory(tile_size, width, height, half, tile_pad=None, scale=None, batch_size=1, frames=1):
+    """
+    타일 크기별 최대 메모리 추정 (바이트)
+
+    Args:
+        tile_size: 타일 크기 (0 = 타일 없이 전체 프레임)
+        width, height: 입력 프레임 크기
+        half: FP16 여부
+        tile_pad: 타일 여백 (None이면 config.ESRGAN_TILE_PAD)
+        scale: 업스케일 배율 (None이면 config.ESRGAN_SCALE)
+        batch_size: 한 번의 forward에 쌓는 타일 수
+        frames: 한 번에 출력 버퍼를 유지하는 프레임 수
+
+    Returns:
+        int: 추정 바이트 수
+    """
+    tile_pad = config.ESRGAN_TILE_PAD if tile_pad is None else tile_pad
+    scale = config.ESRGAN_SCALE if scale is None else scale
+    bytes_per_value = 2 if half else 4
+
+    if tile_size and tile_size < max(width, height):
+        tile_pixels = (min(tile_size, width) + 2 * tile_pad) * (min(tile_size, height) + 2 * tile_pad)
+        tiles_per_frame = math.ceil(width / tile_size) * math.ceil(height / tile_size)
+    else:
+        tile_pixels = width * height
+        tiles_per_frame = 1
+    # 배치는 실제 타일 수보다 커지지 않음
+    batch_size = min(batch_size, tiles_per_frame * frames)
+    # 타일 결과는 디바이스 위의 전체 출력 버퍼에 모음 (배치 엔진은 FP32 RGB + 블렌딩 가중치)
+    output_pixels = width * height * scale * scale
+
+    activations = tile_pixels * _ACTIVATION_CHANNELS_PER_PIXEL * bytes_per_value * batch_size
+    return int(activations + (width * height * 3 * bytes_per_value + output_pixels * 4 * 4) * frames)
+
+
+def available_memory(device):
+    """
+    디바이스의 사용 가능 메모리 (바이트)
+
+    Args:
+        device: "cpu" 또는 "cuda:N"
+
+    Returns:
+        tuple: (사용 가능 바이트, 전체 바이트)
+    """
+    if device.startswith("cuda"):
+        import torch
+        free, total = torch.cuda.mem_get_info(torch.device(device))
+        return free, total
+
+    import psutil
+    memory = psutil.virtual_memory()
+    return memory.available, memory.total
+
+
+def _device_key(device):
+    """캐시 키용 디바이스 식별자 (GPU 이름 + 전체 메모리)"""
+    if device.startswith("cuda"):
+        import torch
+        props = torch.cuda.get_device_properties(torch.device(device))
+        return f"{props.name}-{props.total_memory // (1024 * 1024)}MB"
+    return "cpu"
+
+
+def _load_cache():
+    """타일 선택 캐시 로드 (프로세스당 한 번)"""
+    global _tile_cache
+    if _tile_cache is None:
+        _tile_cache = {}
+        if os.path.exists(config.ESRGAN_TILE_CACHE_PATH):
+            try:
+                with open(config.ESRGAN_TILE_CACHE_PATH, 'r', encoding='utf-8') as f:
+                    _tile_cache = json.load(f)
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable ESRGAN tile cache: {str(e)}")
+    return _tile_cache
+
+
+def _save_cache():
+    """타일 선택 캐시 저장 (원자적 교체)"""
+    try:
+        os.makedirs(os.path.dirname(config.ESRGAN_TILE_CACHE_PATH), exist_ok=True)
+        temp_path = f"{config.ESRGAN_TILE_CACHE_PATH}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(_tile_cache, f, indent=2)
+        os.replace(temp_path, config.ESRGAN_TILE_CACHE_PATH)
+    except Exception as e:
+        logger.warning(f"Failed to save ESRGAN tile cache: {str(e)}")
+
+
+def _benchmark_tile(upscale, frames, tile_size, device, memory_limit):
+    """
+    타일 크기 하나로 프레임 처리 속도 측정
+
+    Returns:
+        float or None: 초당 프레임 수 (메모리 부족/실패 시 None)
+    """
+    import torch
+
+    is_cuda = device.startswith("cuda")
+    baseline = 0
+    try:
+        if is_cuda:
+            torch.cuda.empty_cache()
+            torch.cuda.reset_peak_memory_stats(torch.device(device))
+            # 모델 가중치 등 이미 할당된 메모리는 free 값에서 빠져 있으므로 증가분만 비교
+            baseline = torch.cuda.memory_allocated(torch.device(device))
+
+        # 첫 호출은 cuDNN 알고리즘 탐색이 포함되므로 측정에서 제외
+        upscale(frames[:1], tile_size)
+        if is_cuda:
+            torch.cuda.synchronize(torch.device(device))
+
+        start = time.perf_counter()
+        upscale(frames, tile_size)
+        if is_cuda:
+            torch.cuda.synchronize(torch.device(device))
+        elapsed = time.perf_counter() - start
+
+        if is_cuda and torch.cuda.max_memory_allocated(torch.device(device)) - baseline > memory_limit:
+            logger.info(f"ESRGAN tile {tile_size or 'off'}: peak memory over budget, skipped")
+            return None
+        return len(frames) / elapsed if elapsed > 0 else None
+
+    except Exception as e:
+        # RealESRGANer는 타일 OOM을 내부에서 삼키고 다른 예외로 실패하므로 모든 예외를 부적합으로 처리
+        logger.info(f"ESRGAN tile {tile_size or 'off'} failed: {type(e).__name__}")
+        return None
+    finally:
+        if is_cuda:
+            torch.cuda.empty_cache()
+
+
+def select_tile_size(upscale, frames, device, half, batch_size=1, frames_per_call=1):
+    """
+    메모리에 들어가는 가장 빠른 타일 크기 선택 (결과는 해상도/디바이스/정밀도/배치별 캐시)
+
+    GPU는 메모리 추정치가 예산 안인 후보를 첫 프레임으로 벤치마크하고,
+    CPU는 타일 크기에 따른 속도 차이가 작고 벤치마크가 매우 느리므로 들어가는 가장 큰 타일 선택
+
+    Args:
+        upscale: (frames, tile_size) -> 업스케일 프레임 리스트 (실제 처리 경로로 측정)
+        frames: 벤치마크용 BGR 프레임 리스트 (같은 해상도)
+        device: "cpu" 또는 "cuda:N"
+        half: FP16 여부
+        batch_size: 한 번의 forward에 쌓는 타일 수 (배치 엔진)
+        frames_per_call: upscale 한 번에 넘기는 프레임 수 (출력 버퍼 메모리 추정용)
+
+    Returns:
+        int: 타일 크기 (0 = 타일 없음)
+    """
+    height, width = frames[0].shape[:2]
+    cache_key = (f"{width}x{height}|{_device_key(device)}|{'fp16' if half else 'fp32'}|"
+                 f"{config.ESRGAN_MODEL_NAME}|b{batch_size}x{frames_per_call}")
+
+    with _cache_lock:
+        cached = _load_cache().get(cache_key)
+    if cached is not None:
+        logger.info(f"ESRGAN tile size (cached): {cached['tile'] or 'off'} for {width}x{height}")
+        return cached['tile']
+
+    free, total = available_memory(device)
+    memory_limit = min(free, total * config.ESRGAN_MEMORY_FRACTION)
+
+    # 프레임보다 큰 타일은 타일 없음과 같으므로 제외, 큰 타일부터
+    candidates = sorted({tile for tile in config.ESRGAN_TILE_CANDIDATES
+                         if tile == 0 or tile < max(width, height)},
+                        key=lambda tile: tile or max(width, height), reverse=True)
+    fitting = [tile for tile in candidates
+               if estimate_tile_memory(tile, width, height, half, batch_size=batch_size,
+                                       frames=frames_per_call) <= memory_limit]
+    if not fitting:
+        fitting = [min((tile for tile in candidates if tile), default=config.ESRGAN_TILE_SIZE)]
+        logger.warning(f"No ESRGAN tile size fits in {memory_limit / 1024**3:.1f} GB, trying smallest")
+
+    if not device.startswith("cuda"):
+        selected, speed = fitting[0], None
+    else:
+        results = {}
+        for tile in fitting:
+            speed = _benchmark_tile(upscale, frames, tile, device, memory_limit)
+            if speed is not None:
+                results[tile] = speed
+                logger.info(f"ESRGAN tile {tile or 'off'}: {speed:.2f} fps")
+        if results:
+            selected = max(results, key=results.get)
+            speed = results[selected]
+        else:
+            selected, speed = config.ESRGAN_TILE_SIZE, None
+            logger.warning(f"ESRGAN tile benchmark failed, using default tile {selected}")
+
+    logger.info(f"ESRGAN tile size selected: {selected or 'off'} for {width}x{height} on {device} "
+                f"(budget {memory_limit / 1024**3:.1f} GB)")
+
+    with _cache_lock:
+        _load_cache()[cache_key] = {'tile': selected, 'fps': speed}
+        _save_cache()
+    return selected
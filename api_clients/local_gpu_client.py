@@ -5,13 +5,22 @@ SoraWatermarkCleaner 공식 구현 참고
 """
 
 import os
+import warnings
 import cv2
 import torch
 import numpy as np
 import tempfile
 from pathlib import Path
 from utils.logger import logger
-from utils.video_utils import extract_audio, merge_audio
+from utils.video_utils import (extract_audio, merge_audio, ffmpeg_available, get_video_info,
+                               open_frame_reader, open_frame_writer, partial_output_path,
+                               discard_partial_output, add_source_audio)
+from utils.tracking_utils import BoxTracker, make_thumbnail, is_scene_change
+from utils.box_utils import pad_box, scale_box, merge_boxes, intersect_box, to_pixel_box, learn_static_boxes
+from utils.frame_pipeline import FramePipeline
+from utils.cache_utils import fast_content_hash, config_hash
+from utils.detection_cache import save_detection_track, load_detection_track
+from api_clients.model_registry import model_registry
 import config
 
 try:
@@ -27,13 +36,18 @@ except ImportError:
 class LocalGPUClient:
     """로컬 GPU를 사용한 워터마크 제거"""
 
-    def __init__(self, stop_event=None, progress_callback=None):
+    def __init__(self, stop_event=None, progress_callback=None, detector_backend=None, static_roi=None,
+                 encoder_profile=None):
         """
         로컬 GPU 클라이언트 초기화 (NVIDIA CUDA 및 AMD ROCm 지원)
 
         Args:
             stop_event: threading.Event 객체로 처리 중단을 신호하는 데 사용
             progress_callback: 진행률 업데이트 콜백 함수 (message, progress) -> None
+            detector_backend: 탐지 백엔드 ("ultralytics", "onnx", "onnx-int8", "openvino",
+                              None이면 config.DETECTOR_BACKEND)
+            static_roi: 고정 워터마크 영역 ("off", "auto", 사각형 리스트, None이면 config.STATIC_ROI_MODE)
+            encoder_profile: 출력 인코더 프로필 이름 (None이면 config.VIDEO_PROFILE)
         """
         # PyTorch 성능 최적화 설정
         torch.set_num_threads(config.TORCH_NUM_THREADS)
@@ -55,6 +69,13 @@ class LocalGPUClient:
         self.yolo_model = None
         self.lama_model = None
         self.model_manager = None
+        self.onnx_detector = None
+        self.detector_backend = detector_backend or config.DETECTOR_BACKEND
+        self.static_roi = self._resolve_static_roi(static_roi)
+        self.encoder_profile = encoder_profile or config.VIDEO_PROFILE
+
+        # 희소 탐지 상태 (비디오마다 초기화)
+        self._reset_detection_state()
 
         # 모델 초기화
         self._initialize_models()
@@ -97,36 +118,22 @@ class LocalGPUClient:
                 return "cpu"
 
     def _initialize_models(self):
-        """YOLOv11s와 LAMA 모델 초기화"""
+        """YOLOv11s와 LAMA 모델 초기화 (프로세스 전역 레지스트리에서 재사용)"""
         try:
-            logger.info("Initializing YOLO model...")
-            self._download_yolo_if_needed()
-            self.yolo_model = YOLO(config.YOLO_MODEL_PATH)
-            # YOLO는 CPU에서 실행 (NMS CUDA 호환성 문제 우회)
-            self.yolo_model.to("cpu")
-            logger.info(f"YOLO model loaded on CPU - conf={config.YOLO_CONF_THRESHOLD}, iou={config.YOLO_IOU_THRESHOLD}")
+            if isinstance(self.static_roi, list):
+                # 고정 영역 모드는 탐지기가 필요 없음 (필요해지면 _ensure_detector에서 로드)
+                logger.info("Static ROI mode: detector not loaded")
+            else:
+                self._initialize_detector()
+
+            if config.INPAINT_METHOD != "lama":
+                # TELEA 모드에서는 LAMA 로드 시간/메모리 절약
+                logger.info(f"Inpainting method: {config.INPAINT_METHOD} (LAMA not loaded)")
+                return
 
             logger.info("Initializing LAMA inpainting model...")
-            # LAMA 모델 직접 로드 (자동 다운로드 지원)
             try:
-                from iopaint.model_manager import models
-                from iopaint.schema import ModelInfo, ModelType
-
-                if 'lama' not in models:
-                    raise RuntimeError("LAMA model not available in IOPaint")
-
-                # 모델 정보 생성
-                model_info = ModelInfo(
-                    name="lama",
-                    path="",
-                    model_type=ModelType.INPAINT
-                )
-
-                # LAMA 모델 직접 초기화 (없으면 자동 다운로드)
-                self.lama_model = models['lama'](
-                    device=self.device,
-                    model_info=model_info
-                )
+                self.lama_model = model_registry.get("lama", self.device, "fp32", self._load_lama)
                 logger.info("LAMA model initialized successfully")
 
             except Exception as lama_error:
@@ -138,6 +145,150 @@ class LocalGPUClient:
             logger.error(f"Failed to initialize models: {str(e)}")
             raise
 
+    def _initialize_detector(self):
+        """탐지기 초기화 (detector_backend에 따라 ultralytics 또는 ONNX Runtime/OpenVINO)"""
+        self.onnx_detector = None
+        if self.detector_backend in ("onnx", "onnx-int8", "openvino"):
+            try:
+                logger.info(f"Initializing {self.detector_backend} YOLO detector...")
+                self.onnx_detector = model_registry.get(
+                    f"yolo-{self.detector_backend}", "cpu", "fp32",
+                    self._load_onnx_detector, variant=f"{config.YOLO_MODEL_PATH}@{config.DETECTOR_IMGSZ}"
+                )
+                logger.info(f"YOLO detector ready ({self.detector_backend}) - "
+                            f"conf={config.YOLO_CONF_THRESHOLD}, iou={config.YOLO_IOU_THRESHOLD}")
+                return
+            except Exception as e:
+                logger.warning(f"Failed to initialize {self.detector_backend} detector: {e}")
+                logger.warning("Falling back to ultralytics YOLO")
+
+        logger.info("Initializing YOLO model...")
+        # YOLO는 CPU에서 실행 (NMS CUDA 호환성 문제 우회)
+        self.yolo_model = self._get_yolo_model()
+        logger.info(f"YOLO model ready on CPU - conf={config.YOLO_CONF_THRESHOLD}, iou={config.YOLO_IOU_THRESHOLD}")
+
+    def set_detector_backend(self, backend):
+        """
+        작업별 탐지 백엔드 변경 (모델은 레지스트리에서 재사용)
+
+        Args:
+            backend: "ultralytics", "onnx", "onnx-int8" 또는 "openvino"
+        """
+        if backend and backend != self.detector_backend:
+            self.detector_backend = backend
+            self._initialize_detector()
+
+    def _ensure_detector(self):
+        """탐지기가 아직 로드되지 않았으면 로드 (고정 영역 모드에서 다른 모드로 전환한 경우)"""
+        if self.yolo_model is None and self.onnx_detector is None:
+            self._initialize_detector()
+
+    @staticmethod
+    def _resolve_static_roi(static_roi):
+        """
+        고정 영역 설정 정규화
+
+        Args:
+            static_roi: "off", "auto", 사각형 리스트 또는 None (config.STATIC_ROI_MODE 사용)
+
+        Returns:
+            "off", "auto" 또는 사각형 리스트
+        """
+        if static_roi is None:
+            mode = config.STATIC_ROI_MODE
+            if mode == "fixed":
+                static_roi = list(config.STATIC_ROI_BOXES)
+            else:
+                static_roi = mode
+        if isinstance(static_roi, str):
+            return static_roi if static_roi == "auto" else "off"
+        boxes = [tuple(box) for box in static_roi]
+        return boxes if boxes else "off"
+
+    def set_static_roi(self, static_roi):
+        """
+        작업별 고정 영역 모드 변경
+
+        Args:
+            static_roi: "off", "auto" 또는 사각형 리스트 [(x1, y1, x2, y2), ...] (픽셀 또는 0-1 비율)
+        """
+        self.static_roi = self._resolve_static_roi(static_roi)
+
+    def _get_yolo_model(self):
+        """ultralytics YOLO 모델 조회 (레지스트리 캐시)"""
+        return model_registry.get(
+            "yolo", "cpu", "fp16" if config.YOLO_HALF_PRECISION else "fp32",
+            self._load_yolo, variant=config.YOLO_MODEL_PATH
+        )
+
+    def _load_onnx_detector(self):
+        """best.pt → ONNX/OpenVINO 내보내기 (최초 1회 캐시) 후 탐지기 로드"""
+        from api_clients.onnx_detector import OnnxYoloDetector, export_detector, prepare_int8_detector
+        self._download_yolo_if_needed()
+
+        if self.detector_backend == "onnx-int8":
+            # INT8 양자화 + FP32 best.pt 대비 recall 게이트 (실패 시 FP32 ONNX)
+            model_path = prepare_int8_detector(
+                config.YOLO_MODEL_PATH, config.DETECTOR_IMGSZ, config.INT8_REFERENCE_CLIP,
+                lambda frames: self._detect_with_ultralytics(self._get_yolo_model(), frames),
+                config.INT8_MIN_RECALL, config.INT8_CALIBRATION_FRAMES
+            )
+            return OnnxYoloDetector(model_path, backend="onnx", imgsz=config.DETECTOR_IMGSZ)
+
+        model_path = export_detector(config.YOLO_MODEL_PATH, self.detector_backend, config.DETECTOR_IMGSZ)
+        return OnnxYoloDetector(model_path, backend=self.detector_backend, imgsz=config.DETECTOR_IMGSZ)
+
+    def check_detector_parity(self, frames, iou_threshold=0.5):
+        """
+        현재 탐지 백엔드와 ultralytics 경로의 탐지 결과 비교
+
+        Args:
+            frames: 비교에 사용할 프레임 리스트 (BGR)
+            iou_threshold: 일치로 볼 최소 IoU
+
+        Returns:
+            dict: recall, precision, 박스 수 (compare_detections 결과)
+        """
+        from api_clients.onnx_detector import compare_detections
+
+        self._ensure_detector()
+        reference = self._detect_with_ultralytics(self._get_yolo_model(), frames)
+        candidate = self._run_detector(frames)
+        report = compare_detections(reference, candidate, iou_threshold)
+        logger.info(f"Detector parity ({self.detector_backend} vs ultralytics): "
+                    f"recall={report['recall']:.3f}, precision={report['precision']:.3f}, "
+                    f"boxes={report['candidate']}/{report['reference']}")
+        return report
+
+    def _load_yolo(self):
+        """YOLO 모델 로드 (레지스트리 캐시 미스 시에만 호출)"""
+        self._download_yolo_if_needed()
+        yolo_model = YOLO(config.YOLO_MODEL_PATH)
+        yolo_model.to("cpu")
+        logger.info("YOLO model loaded on CPU")
+        return yolo_model
+
+    def _load_lama(self):
+        """LAMA 모델 직접 로드 (자동 다운로드 지원, 레지스트리 캐시 미스 시에만 호출)"""
+        from iopaint.model_manager import models
+        from iopaint.schema import ModelInfo, ModelType
+
+        if 'lama' not in models:
+            raise RuntimeError("LAMA model not available in IOPaint")
+
+        # 모델 정보 생성
+        model_info = ModelInfo(
+            name="lama",
+            path="",
+            model_type=ModelType.INPAINT
+        )
+
+        # LAMA 모델 직접 초기화 (없으면 자동 다운로드)
+        return models['lama'](
+            device=self.device,
+            model_info=model_info
+        )
+
     def _download_yolo_if_needed(self):
         """YOLO 모델 다운로드 (필요한 경우)"""
         model_path = Path(config.YOLO_MODEL_PATH)
@@ -173,13 +324,14 @@ class LocalGPUClient:
             logger.error(f"Failed to download YOLO model: {str(e)}")
             raise
 
-    def remove_watermark(self, video_path, output_path):
+    def remove_watermark(self, video_path, output_path, video_info=None):
         """
         로컬 GPU로 워터마크 제거 (오디오 보존)
 
         Args:
             video_path: 입력 비디오 경로
             output_path: 출력 비디오 경로
+            video_info: 미리 조회한 VideoInfo (None이면 get_video_info)
 
         Returns:
             bool: 성공 여부
@@ -192,14 +344,52 @@ class LocalGPUClient:
                 raise FileNotFoundError(f"Video file not found: {video_path}")
 
             logger.info(f"Starting local GPU watermark removal: {video_path}")
+            video_info = video_info or get_video_info(video_path)
+
+            # 구간 분할 병렬 처리 (SEGMENT_WORKERS > 1, 분할 불가면 None)
+            if config.SEGMENT_WORKERS > 1 and config.USE_FFMPEG_PIPE_IO and ffmpeg_available():
+                from api_clients.segment_processor import process_video_segmented
+                result = process_video_segmented(video_path, output_path, "local_gpu",
+                                                 stop_event=self.stop_event,
+                                                 progress_callback=self.progress_callback,
+                                                 client_options={'detector_backend': self.detector_backend,
+                                                                 'static_roi': self.static_roi,
+                                                                 'encoder_profile': self.encoder_profile},
+                                                 video_info=video_info)
+                if result is not None:
+                    if result:
+                        logger.info(f"Local GPU watermark removal completed: {output_path}")
+                    return result
+
+            # 재개 가능한 청크 처리 (영구 작업 폴더, 중단 후 재실행 시 이어서 처리)
+            if config.RESUMABLE_OUTPUT and config.USE_FFMPEG_PIPE_IO and ffmpeg_available():
+                from api_clients.chunked_processor import process_video_resumable
+                result = process_video_resumable(self, video_path, output_path, "local_gpu",
+                                                 client_options={'detector_backend': self.detector_backend,
+                                                                 'static_roi': self.static_roi,
+                                                                 'encoder_profile': self.encoder_profile},
+                                                 video_info=video_info)
+                if result is not None:
+                    if result:
+                        logger.info(f"Local GPU watermark removal completed: {output_path}")
+                    return result
+
+            # 단일 패스: 처리된 프레임 + 원본 오디오를 한 번의 ffmpeg 호출로 인코딩
+            if config.USE_FFMPEG_PIPE_IO and ffmpeg_available():
+                if not self._process_and_save_video(video_path, output_path, audio_source=video_path,
+                                                    video_info=video_info):
+                    return False
+
+                logger.info(f"Local GPU watermark removal completed: {output_path}")
+                return True
 
             # 임시 파일 경로 생성
             with tempfile.TemporaryDirectory() as temp_dir:
                 temp_video_path = os.path.join(temp_dir, 'temp_video.mp4')
-                temp_audio_path = os.path.join(temp_dir, 'temp_audio.aac')
+                temp_audio_path = os.path.join(temp_dir, 'temp_audio.mka')
 
                 # 1단계: 비디오 프레임 처리 및 임시 저장
-                if not self._process_and_save_video(video_path, temp_video_path):
+                if not self._process_and_save_video(video_path, temp_video_path, video_info=video_info):
                     return False
 
                 # 2단계: 원본 비디오에서 오디오 추출
@@ -227,54 +417,82 @@ class LocalGPUClient:
             logger.error(traceback.format_exc())
             return False
 
-    def _process_and_save_video(self, video_path, output_path):
+    def process_segment(self, video_path, output_path, start, duration, reset_state=True):
+        """
+        비디오의 한 시간 구간만 처리 (구간 분할 병렬 처리 / 재개 가능한 청크 처리용, 오디오 없음)
+
+        Args:
+            video_path: 입력 비디오 경로
+            output_path: 구간 출력 경로
+            start: 구간 시작 시각 (초, 키프레임)
+            duration: 구간 길이 (초, None이면 끝까지)
+            reset_state: False면 직전 구간에 이어서 처리 (추적/고정 영역/시간축 상태 유지)
+
+        Returns:
+            bool: 성공 여부
+        """
+        return self._process_and_save_video(video_path, output_path, start=start, duration=duration,
+                                            reset_state=reset_state)
+
+    def _process_and_save_video(self, video_path, output_path, audio_source=None, start=None, duration=None,
+                                video_info=None, reset_state=True):
         """
         비디오 프레임 처리 및 저장
 
         Args:
             video_path: 입력 비디오 경로
-            output_path: 출력 비디오 경로 (오디오 없음)
+            output_path: 출력 비디오 경로
+            audio_source: 같은 인코딩 패스에서 mux할 오디오 원본 (None이면 오디오 없음)
+            start: 구간 시작 시각 (초, None이면 처음부터)
+            duration: 구간 길이 (초, None이면 끝까지)
+            video_info: 미리 조회한 VideoInfo (None이면 get_video_info)
+            reset_state: False면 직전 구간에 이어서 처리 (추적/고정 영역/시간축 상태 유지)
 
         Returns:
             bool: 성공 여부
         """
+        # 임시 경로로 인코딩 후 완료 시에만 최종 경로로 교체 (중단/실패 시 잘린 파일 삭제)
+        partial_path = partial_output_path(output_path)
         try:
-            # 비디오 열기
-            cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
+            # 비디오 정보 (ffprobe, 경로별 캐시)
+            info = video_info or get_video_info(video_path)
+            if info is None:
                 raise IOError(f"Cannot open video: {video_path}")
-
-            # 비디오 정보 추출
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            fps = info.fps
+            # 디코더가 회전 메타데이터를 적용하므로 표시 크기 사용
+            width, height = info.display_size
+            # 구간 처리 시 해당 구간의 프레임 수로 진행률 계산 (ffprobe 패킷 시각 기준)
+            total_frames = info.frame_count_between(start, duration)
 
             logger.info(f"Video info - Size: {width}x{height}, FPS: {fps}, Frames: {total_frames}")
 
-            # 출력 비디오 쓰기 설정
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
-
-            if not out.isOpened():
-                raise IOError(f"Cannot create output video: {output_path}")
-
-            # 프레임 처리
-            frame_count = 0
-            while True:
-                # 중지 요청 확인
-                if self.stop_event and self.stop_event.is_set():
-                    logger.warning(f"Frame processing stopped by user at frame {frame_count}/{total_frames}")
-                    cap.release()
-                    out.release()
-                    return False
-
-                ret, frame = cap.read()
-                if not ret:
-                    break
-
-                frame_count += 1
+            if reset_state:
+                self._reset_detection_state()
+            else:
+                # 박스 트랙 사이드카는 구간별 파일이므로 재생/기록 상태만 새로 시작
+                self._cached_track = None
+                self._track_position = 0
+                self._recorded_track = None
+
+            # 고정 영역 모드: 탐지 없이 모든 프레임에 같은 영역 사용
+            if isinstance(self.static_roi, list):
+                boxes = [to_pixel_box(box, width, height) for box in self.static_roi]
+                self._static_boxes = [box for box in boxes if box is not None]
+                logger.info(f"Static ROI mode: {self._static_boxes} (detection skipped)")
+            else:
+                self._ensure_detector()
+
+            # 2패스 모드: 저장된 박스 트랙이 있으면 탐지 생략, 없으면 이번 실행에서 기록
+            sidecar_path = None
+            if config.DETECTION_SIDECAR and self._static_boxes is None:
+                sidecar_path = self._detection_sidecar_path(video_path, start, duration)
+                self._cached_track = load_detection_track(sidecar_path)
+                if self._cached_track is not None:
+                    logger.info(f"Using detection track {sidecar_path} (detection skipped)")
+                else:
+                    self._recorded_track = []
 
+            def on_frame_written(frame_count):
                 # 진행률 계산 및 콜백
                 progress = (frame_count / total_frames) * 100 if total_frames > 0 else 0
 
@@ -284,17 +502,55 @@ class LocalGPUClient:
                     if self.progress_callback:
                         self.progress_callback(f"Processing frame {frame_count}/{total_frames}", progress)
 
-                # 워터마크 탐지 및 제거
-                processed_frame = self._process_frame(frame)
-                out.write(processed_frame)
+            # 프레임 처리: 디코딩 → 배치 탐지/인페인팅 (YOLO_BATCH_SIZE 단위) → 인코딩
+            pipeline = FramePipeline(stop_event=self.stop_event,
+                                     batch_size=config.YOLO_BATCH_SIZE,
+                                     name="watermark")
 
-            cap.release()
-            out.release()
+            # 입출력 (ffmpeg 파이프, 프레임은 제자리 수정되므로 순환 버퍼는 파이프라인 용량만큼)
+            reader = open_frame_reader(video_path, width, height,
+                                       buffer_count=pipeline.max_frames_in_flight(),
+                                       start=start, duration=duration)
+            try:
+                writer = open_frame_writer(partial_path, width, height, fps, audio_source=audio_source,
+                                           profile=self.encoder_profile)
+            except Exception:
+                reader.close()
+                raise
+
+            try:
+                completed = pipeline.run(reader.read, self._process_batch, writer.write, on_frame_written)
+            finally:
+                reader.close()
+                writer.close()
+
+            frame_count = pipeline.stats['written']
+            if not completed:
+                logger.warning(f"Frame processing stopped by user at frame {frame_count}/{total_frames}")
+                return False
+
+            if audio_source and not writer.muxes_audio:
+                # 라이터가 오디오를 mux하지 못함 (OpenCV fallback) → 원본 오디오를 별도 패스로 병합
+                logger.info("Merging video with audio...")
+                if not add_source_audio(partial_path, audio_source, output_path):
+                    return False
+            else:
+                os.replace(partial_path, output_path)
 
             # 마지막 프레임에서 진행률 업데이트 (안전장치)
             if self.progress_callback and frame_count == total_frames:
                 self.progress_callback(f"Processing frame {total_frames}/{total_frames}", 100)
 
+            if sidecar_path and self._recorded_track is not None:
+                save_detection_track(sidecar_path, self._recorded_track,
+                                     metadata={'video': os.path.basename(video_path), 'start': start,
+                                               'duration': duration})
+
+            if config.DETECTION_INTERVAL > 1 and self._cached_track is None:
+                stats = self._detection_stats
+                logger.info(f"Sparse detection - detected: {stats['detected']}, tracked: {stats['tracked']}, "
+                            f"re-detected: {stats['redetected']}")
+
             logger.info(f"Video frames processed and saved: {output_path}")
             return True
 
@@ -303,6 +559,8 @@ class LocalGPUClient:
             import traceback
             logger.error(traceback.format_exc())
             return False
+        finally:
+            discard_partial_output(partial_path)
 
     def _process_frame(self, frame):
         """
@@ -314,63 +572,511 @@ class LocalGPUClient:
         Returns:
             처리된 프레임 (BGR)
         """
+        return self._process_batch([frame])[0]
+
+    def _process_batch(self, frames):
+        """
+        여러 프레임을 한 번에 처리 (배치 탐지 후 프레임별 인페인팅)
+
+        Args:
+            frames: 입력 프레임 리스트 (BGR)
+
+        Returns:
+            list: 처리된 프레임 리스트 (입력과 같은 순서)
+        """
         try:
-            # 1. YOLO로 워터마크 탐지 (최고 성능 설정)
-            results = self.yolo_model(
-                frame,
-                verbose=False,
-                conf=config.YOLO_CONF_THRESHOLD,    # 신뢰도 임계값
-                iou=config.YOLO_IOU_THRESHOLD,      # IoU 임계값
-                half=config.YOLO_HALF_PRECISION     # FP16 (GPU만 지원)
-            )
+            boxes_per_frame = self._get_boxes(frames)
+        except Exception as e:
+            logger.warning(f"Watermark detection failed: {str(e)}, returning original frames")
+            # 불완전한 트랙은 저장하지 않음
+            self._recorded_track = None
+            return list(frames)
+
+        if config.INPAINT_METHOD == "lama" and self.lama_model is not None:
+            return self._inpaint_batch_lama(frames, boxes_per_frame)
+
+        if config.INPAINT_METHOD == "temporal":
+            return [self._inpaint_frame_temporal(frame, boxes) for frame, boxes in zip(frames, boxes_per_frame)]
+
+        processed_frames = []
+        for frame, boxes in zip(frames, boxes_per_frame):
+            processed_frames.append(self._remove_boxes(frame, boxes))
+        return processed_frames
+
+    def _get_boxes(self, frames):
+        """
+        프레임별 박스 조회 (저장된 박스 트랙 재생 또는 탐지 + 기록)
+
+        Args:
+            frames: 입력 프레임 리스트 (BGR)
+
+        Returns:
+            list: 프레임별 바운딩 박스 리스트 (입력과 같은 순서)
+        """
+        if self._static_boxes is not None:
+            boxes_per_frame = [self._static_boxes for _ in frames]
+            if self._recorded_track is not None:
+                self._recorded_track.extend(boxes_per_frame)
+            return boxes_per_frame
+
+        if self._cached_track is not None:
+            position = self._track_position
+            boxes_per_frame = self._cached_track[position:position + len(frames)]
+            if len(boxes_per_frame) == len(frames):
+                self._track_position += len(frames)
+                return boxes_per_frame
+            # 트랙이 실제 프레임 수보다 짧으면 나머지는 직접 탐지
+            logger.warning("Detection track ended before the video, detecting remaining frames")
+            self._cached_track = None
+
+        if config.DETECTION_INTERVAL > 1:
+            boxes_per_frame = self._detect_sparse(frames)
+        else:
+            boxes_per_frame = self._detect_watermarks(frames)
+
+        if self._recorded_track is not None:
+            self._recorded_track.extend(boxes_per_frame)
+
+        # auto 모드: 처음 N 프레임의 탐지 결과로 고정 영역 학습
+        if self._warmup_boxes is not None:
+            self._warmup_boxes.extend(boxes_per_frame)
+            if len(self._warmup_boxes) >= config.STATIC_ROI_WARMUP_FRAMES:
+                self._learn_static_roi()
+
+        return boxes_per_frame
+
+    def _learn_static_roi(self):
+        """워밍업 탐지 결과로 고정 영역을 학습하고, 성공하면 이후 프레임은 탐지 생략"""
+        learned = learn_static_boxes(self._warmup_boxes, config.STATIC_ROI_MIN_COVERAGE)
+        frame_count = len(self._warmup_boxes)
+        self._warmup_boxes = None
+
+        if learned:
+            self._static_boxes = learned
+            logger.info(f"Static ROI learned from {frame_count} frames: {learned} (detection skipped from now on)")
+        elif learned is None:
+            logger.info("Watermark moves during warm-up, continuing per-frame detection")
+        else:
+            logger.info("No stable watermark found during warm-up, continuing per-frame detection")
+
+    def _detection_sidecar_path(self, video_path, start=None, duration=None):
+        """
+        박스 트랙 사이드카 경로 (입력 내용 해시 + 박스에 영향을 주는 탐지 설정으로 키 생성)
+
+        Args:
+            video_path: 입력 비디오 경로
+            start: 구간 시작 시각 (초, 구간 처리 시 구간별로 별도 트랙)
+            duration: 구간 길이 (초)
+
+        Returns:
+            str: .npz 경로
+        """
+        model_mtime = os.path.getmtime(config.YOLO_MODEL_PATH) if os.path.exists(config.YOLO_MODEL_PATH) else None
+        key = config_hash({
+            'content': fast_content_hash(video_path),
+            'start': start,
+            'duration': duration,
+            'backend': self.detector_backend,
+            'model': model_mtime,
+            'imgsz': config.DETECTOR_IMGSZ,
+            'conf': config.YOLO_CONF_THRESHOLD,
+            'iou': config.YOLO_IOU_THRESHOLD,
+            'resolution': config.DETECTION_RESOLUTION,
+            'padding': config.DETECTION_BOX_PADDING,
+            'interval': config.DETECTION_INTERVAL,
+            'scene_change': config.SCENE_CHANGE_THRESHOLD,
+            'tracking_confidence': config.TRACKING_MIN_CONFIDENCE,
+            'tracking_margin': config.TRACKING_SEARCH_MARGIN,
+            'static_roi': self.static_roi,
+            'static_warmup': config.STATIC_ROI_WARMUP_FRAMES,
+            'static_coverage': config.STATIC_ROI_MIN_COVERAGE,
+        })
+        return os.path.join(config.DETECTION_CACHE_DIR, f"{Path(video_path).stem}_{key}.npz")
+
+    def _detect_watermarks(self, frames):
+        """
+        YOLO 배치 탐지 (프레임 리스트를 한 번의 호출로 처리)
+
+        Args:
+            frames: 입력 프레임 리스트 (BGR)
 
-            if len(results) == 0 or len(results[0].boxes) == 0:
-                # 워터마크 없음
-                return frame
+        Returns:
+            list: 프레임별 바운딩 박스 리스트 [(x1, y1, x2, y2), ...] (입력과 같은 순서)
+        """
+        if not frames:
+            return []
+
+        # 탐지 해상도로 한 번만 축소 (원본이 더 작으면 그대로)
+        height, width = frames[0].shape[:2]
+        max_side = int(config.DETECTION_RESOLUTION or 0)
+        scale = max_side / max(height, width) if max_side > 0 else 1.0
+        if scale >= 1.0:
+            return self._run_detector(frames)
+
+        small_frames = self._resize_for_detection(frames, scale)
+        boxes_per_frame = self._run_detector(small_frames)
+
+        # 원본 좌표로 복원 + 안전 여백
+        padding = config.DETECTION_BOX_PADDING
+        return [
+            [scale_box(box, scale, padding, width, height) for box in boxes]
+            for boxes in boxes_per_frame
+        ]
+
+    def _run_detector(self, frames):
+        """선택된 백엔드로 탐지 (입력 프레임 좌표의 박스 반환)"""
+        if self.onnx_detector is not None:
+            return self.onnx_detector.detect(frames)
+
+        return self._detect_with_ultralytics(self.yolo_model, frames)
+
+    def _resize_for_detection(self, frames, scale):
+        """
+        프레임을 탐지 해상도로 축소 (배치 슬롯별로 미리 할당한 버퍼 재사용)
 
-            # 마스크 생성
-            mask = np.zeros((frame.shape[0], frame.shape[1]), dtype=np.uint8)
+        Args:
+            frames: 원본 프레임 리스트 (BGR, 같은 크기)
+            scale: 축소 배율 (0-1)
 
-            for box in results[0].boxes:
+        Returns:
+            list: 축소된 프레임 (버퍼 뷰, 다음 호출에서 덮어쓰임)
+        """
+        height, width = frames[0].shape[:2]
+        shape = (max(1, int(round(height * scale))), max(1, int(round(width * scale))), 3)
+
+        if self._detect_buffers and self._detect_buffers[0].shape != shape:
+            self._detect_buffers = []
+        while len(self._detect_buffers) < len(frames):
+            self._detect_buffers.append(np.empty(shape, dtype=np.uint8))
+
+        resized = []
+        for frame, buffer in zip(frames, self._detect_buffers):
+            # INTER_AREA: 축소 시 앨리어싱 없이 얇은 워터마크 글자 보존
+            cv2.resize(frame, (shape[1], shape[0]), dst=buffer, interpolation=cv2.INTER_AREA)
+            resized.append(buffer)
+        return resized
+
+    def _detect_with_ultralytics(self, yolo_model, frames):
+        """ultralytics YOLO 배치 추론 (프레임별 박스 리스트 반환)"""
+        # 최고 성능 설정으로 배치 추론
+        results = yolo_model(
+            list(frames),
+            verbose=False,
+            conf=config.YOLO_CONF_THRESHOLD,    # 신뢰도 임계값
+            iou=config.YOLO_IOU_THRESHOLD,      # IoU 임계값
+            half=config.YOLO_HALF_PRECISION     # FP16 (GPU만 지원)
+        )
+
+        boxes_per_frame = []
+        for frame, result in zip(frames, results):
+            height, width = frame.shape[:2]
+            boxes = []
+            for box in result.boxes:
                 x1, y1, x2, y2 = map(int, box.xyxy[0])
                 # 바운딩 박스 좌표 제한
                 x1, y1 = max(0, x1), max(0, y1)
-                x2, y2 = min(frame.shape[1], x2), min(frame.shape[0], y2)
-                mask[y1:y2, x1:x2] = 255
+                x2, y2 = min(width, x2), min(height, y2)
+                if x2 > x1 and y2 > y1:
+                    boxes.append((x1, y1, x2, y2))
+            boxes_per_frame.append(boxes)
+
+        return boxes_per_frame
+
+    def _reset_detection_state(self):
+        """희소 탐지(키프레임 + 추적) 상태 초기화"""
+        self._tracker = BoxTracker(search_margin=config.TRACKING_SEARCH_MARGIN)
+        self._frame_index = 0
+        self._prev_thumbnail = None
+        self._detection_stats = {'detected': 0, 'tracked': 0, 'redetected': 0}
+        self._detect_buffers = []
+        # 2패스 모드 박스 트랙 (재생용 / 기록용)
+        self._cached_track = None
+        self._track_position = 0
+        self._recorded_track = None
+        # 고정 영역 모드 (확정된 영역 / auto 모드 워밍업 탐지 결과)
+        self._static_boxes = None
+        self._warmup_boxes = [] if self.static_roi == "auto" else None
+        self._region_cache = None
+        # 시간축 채우기 순환 버퍼 (최근 원본 프레임 + 워터마크 마스크)
+        self._temporal_frames = None
+        self._temporal_masks = None
+        self._temporal_count = 0
+        self._temporal_next = 0
+
+    def _detect_sparse(self, frames):
+        """
+        희소 탐지: 키프레임만 YOLO로 탐지하고 나머지는 박스 추적
 
-            # 2. LAMA로 인페인팅
-            processed_frame = self._inpaint_frame(frame, mask)
+        키프레임은 DETECTION_INTERVAL 주기 또는 장면 전환 프레임이며,
+        추적 신뢰도가 TRACKING_MIN_CONFIDENCE 미만이면 해당 프레임을 재탐지
 
-            return processed_frame
+        Args:
+            frames: 입력 프레임 리스트 (BGR)
 
-        except Exception as e:
-            logger.warning(f"Frame processing failed: {str(e)}, returning original frame")
+        Returns:
+            list: 프레임별 바운딩 박스 리스트 (입력과 같은 순서)
+        """
+        interval = int(config.DETECTION_INTERVAL)
+
+        # 1. 키프레임 선정 (주기 + 장면 전환)
+        keyframe_indices = []
+        for i, frame in enumerate(frames):
+            thumbnail = make_thumbnail(frame)
+            if (self._frame_index % interval == 0
+                    or is_scene_change(self._prev_thumbnail, thumbnail, config.SCENE_CHANGE_THRESHOLD)):
+                keyframe_indices.append(i)
+            self._prev_thumbnail = thumbnail
+            self._frame_index += 1
+
+        # 2. 키프레임만 모아서 배치 탐지
+        detected = {}
+        if keyframe_indices:
+            keyframe_boxes = self._detect_watermarks([frames[i] for i in keyframe_indices])
+            detected = dict(zip(keyframe_indices, keyframe_boxes))
+            self._detection_stats['detected'] += len(keyframe_indices)
+
+        # 3. 순서대로 추적 (신뢰도 낮으면 재탐지)
+        boxes_per_frame = []
+        for i, frame in enumerate(frames):
+            if i in detected:
+                boxes = detected[i]
+                self._tracker.reset(frame, boxes)
+            else:
+                boxes, confidence = self._tracker.track(frame)
+                if confidence < config.TRACKING_MIN_CONFIDENCE:
+                    boxes = self._detect_watermarks([frame])[0]
+                    self._tracker.reset(frame, boxes)
+                    self._detection_stats['redetected'] += 1
+                else:
+                    self._detection_stats['tracked'] += 1
+            boxes_per_frame.append(boxes)
+
+        return boxes_per_frame
+
+    def _remove_boxes(self, frame, boxes):
+        """
+        탐지된 박스 영역 인페인팅
+
+        Args:
+            frame: 입력 프레임 (BGR)
+            boxes: 바운딩 박스 리스트 [(x1, y1, x2, y2), ...]
+
+        Returns:
+            처리된 프레임 (BGR)
+        """
+        if not boxes:
+            # 워터마크 없음
             return frame
 
-    def _inpaint_frame(self, frame, mask):
+        return self._inpaint_frame(frame, boxes)
+
+    def _get_inpaint_regions(self, frame, boxes):
         """
-        LAMA를 사용한 인페인팅
+        인페인팅할 ROI 목록 생성 (박스마다 여백 추가 후 겹치는 영역 병합)
 
         Args:
             frame: 입력 프레임 (BGR)
-            mask: 워터마크 마스크 (0-255)
+            boxes: 바운딩 박스 리스트 [(x1, y1, x2, y2), ...]
 
         Returns:
-            인페인팅된 프레임 (BGR)
+            list: [(region, region_mask), ...] - 프레임 좌표 ROI와 ROI 크기의 마스크 (0-255)
         """
-        try:
-            # BGR to RGB 변환
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        height, width = frame.shape[:2]
+
+        # 직전과 같은 박스면 ROI/마스크 재사용 (고정 영역 모드는 매 프레임 동일)
+        key = (height, width, tuple(tuple(box) for box in boxes))
+        if self._region_cache is not None and self._region_cache[0] == key:
+            return self._region_cache[1]
+
+        padded = [pad_box(box, config.INPAINT_ROI_PADDING, width, height) for box in boxes]
+
+        regions = []
+        for region in merge_boxes(padded):
+            rx1, ry1, rx2, ry2 = region
+            region_mask = np.zeros((ry2 - ry1, rx2 - rx1), dtype=np.uint8)
+            for box in boxes:
+                local = intersect_box(box, region)
+                if local is not None:
+                    lx1, ly1, lx2, ly2 = local
+                    region_mask[ly1:ly2, lx1:lx2] = 255
+            regions.append((region, region_mask))
+
+        self._region_cache = (key, regions)
+        return regions
+
+    def _inpaint_frame(self, frame, boxes):
+        """
+        ROI 단위 인페인팅 (박스 주변 크롭만 처리하여 프레임에 제자리 합성)
 
-            # LAMA 인페인팅 (IOPaint 사용)
-            # 간단한 구현을 위해 마스크 영역을 근처 픽셀로 채우기 (테레신) 사용
-            result = cv2.inpaint(rgb_frame, mask, 3, cv2.INPAINT_TELEA)
+        Args:
+            frame: 입력 프레임 (BGR, 제자리 수정됨)
+            boxes: 바운딩 박스 리스트 [(x1, y1, x2, y2), ...]
 
-            # RGB to BGR 변환
-            result_bgr = cv2.cvtColor(result, cv2.COLOR_RGB2BGR)
+        Returns:
+            인페인팅된 프레임 (BGR)
+        """
+        try:
+            for (rx1, ry1, rx2, ry2), region_mask in self._get_inpaint_regions(frame, boxes):
+                # TELEA는 채널별로 독립 처리하므로 BGR 그대로 사용 (색 변환 불필요)
+                crop = frame[ry1:ry2, rx1:rx2]
+                frame[ry1:ry2, rx1:rx2] = cv2.inpaint(crop, region_mask, 3, cv2.INPAINT_TELEA)
 
-            return result_bgr
+            return frame
 
         except Exception as e:
             logger.warning(f"Inpainting failed: {str(e)}, returning original frame")
             return frame
+
+    def _push_temporal(self, frame, boxes):
+        """원본 프레임과 워터마크 마스크를 시간축 순환 버퍼에 저장 (인페인팅 전에 호출)"""
+        window = max(1, int(config.TEMPORAL_WINDOW))
+        height, width = frame.shape[:2]
+        if self._temporal_frames is None or self._temporal_frames.shape[1:3] != (height, width):
+            self._temporal_frames = np.empty((window, height, width, 3), dtype=np.uint8)
+            self._temporal_masks = np.zeros((window, height, width), dtype=bool)
+            self._temporal_count = 0
+            self._temporal_next = 0
+
+        slot = self._temporal_next
+        np.copyto(self._temporal_frames[slot], frame)
+        mask = self._temporal_masks[slot]
+        mask.fill(False)
+        for x1, y1, x2, y2 in boxes:
+            mask[y1:y2, x1:x2] = True
+
+        self._temporal_next = (slot + 1) % window
+        self._temporal_count = min(self._temporal_count + 1, window)
+
+    def _inpaint_frame_temporal(self, frame, boxes):
+        """
+        시간축 중앙값 채우기 (움직이는 워터마크 아래 픽셀은 주변 프레임에서 보이는 경우가 많음)
+
+        최근 TEMPORAL_WINDOW 프레임 중 ROI 주변 문맥이 현재 프레임과 비슷한 프레임(카메라 정지)만 골라
+        가려지지 않은 관측값의 중앙값으로 채우고, 한 번도 관측되지 않은 픽셀만 TELEA로 공간 인페인팅
+
+        Args:
+            frame: 입력 프레임 (BGR, 제자리 수정됨)
+            boxes: 바운딩 박스 리스트 [(x1, y1, x2, y2), ...]
+
+        Returns:
+            인페인팅된 프레임 (BGR)
+        """
+        # 워터마크가 없는 프레임도 이후 프레임의 관측값으로 사용
+        self._push_temporal(frame, boxes)
+        if not boxes:
+            return frame
+
+        try:
+            count = self._temporal_count
+            for (rx1, ry1, rx2, ry2), region_mask in self._get_inpaint_regions(frame, boxes):
+                crop = frame[ry1:ry2, rx1:rx2]
+                target = region_mask > 0
+                past = self._temporal_frames[:count, ry1:ry2, rx1:rx2]
+                past_masked = self._temporal_masks[:count, ry1:ry2, rx1:rx2]
+
+                # 1. 배경 정합 검사: ROI 문맥 픽셀 평균 차이가 크면 (카메라/장면 이동) 해당 프레임 제외
+                context = ~target & ~past_masked
+                diff = np.abs(past.astype(np.int16) - crop.astype(np.int16)).mean(axis=3)
+                context_pixels = context.sum(axis=(1, 2))
+                mean_diff = (diff * context).sum(axis=(1, 2)) / np.maximum(context_pixels, 1)
+                usable = (context_pixels > 0) & (mean_diff <= config.TEMPORAL_MAX_DIFF)
+
+                # 2. 가려지지 않은 관측값의 중앙값 (마스크 픽셀만 벡터화)
+                observations = past[usable][:, target].astype(np.float32)   # (K, N, 3)
+                observed = ~past_masked[usable][:, target]                  # (K, N)
+                observations[~observed] = np.nan
+                filled = observed.any(axis=0)
+
+                if filled.any():
+                    with warnings.catch_warnings():
+                        warnings.simplefilter("ignore", RuntimeWarning)  # 관측 없는 픽셀 (All-NaN)
+                        median = np.nanmedian(observations[:, filled], axis=0)
+                    values = crop[target]
+                    values[filled] = np.round(median).astype(np.uint8)
+                    crop[target] = values
+
+                # 3. 한 번도 관측되지 않은 픽셀만 공간 인페인팅
+                remaining = target.copy()
+                remaining[target] = ~filled
+                if remaining.any():
+                    crop[:] = cv2.inpaint(crop, remaining.astype(np.uint8) * 255, 3, cv2.INPAINT_TELEA)
+
+            return frame
+
+        except Exception as e:
+            logger.warning(f"Temporal fill failed: {str(e)}, falling back to cv2.INPAINT_TELEA")
+            return self._inpaint_frame(frame, boxes)
+
+    def _inpaint_batch_lama(self, frames, boxes_per_frame):
+        """
+        LAMA 배치 인페인팅 (여러 프레임의 ROI 크롭을 모아 한 번의 forward로 처리)
+
+        Args:
+            frames: 입력 프레임 리스트 (BGR, 제자리 수정됨)
+            boxes_per_frame: 프레임별 바운딩 박스 리스트
+
+        Returns:
+            list: 인페인팅된 프레임 리스트 (입력과 같은 순서)
+        """
+        # 모든 프레임의 ROI 수집: (프레임 인덱스, ROI, ROI 마스크)
+        jobs = []
+        for index, (frame, boxes) in enumerate(zip(frames, boxes_per_frame)):
+            if boxes:
+                for region, region_mask in self._get_inpaint_regions(frame, boxes):
+                    jobs.append((index, region, region_mask))
+
+        batch_size = max(1, int(config.LAMA_BATCH_SIZE))
+        for start in range(0, len(jobs), batch_size):
+            chunk = jobs[start:start + batch_size]
+            crops = [frames[index][ry1:ry2, rx1:rx2] for index, (rx1, ry1, rx2, ry2), _ in chunk]
+            masks = [region_mask for _, _, region_mask in chunk]
+
+            try:
+                results = self._run_lama(crops, masks)
+            except Exception as e:
+                logger.warning(f"LAMA inpainting failed: {str(e)}, falling back to cv2.INPAINT_TELEA")
+                results = [cv2.inpaint(crop, mask, 3, cv2.INPAINT_TELEA) for crop, mask in zip(crops, masks)]
+
+            # 마스크 영역만 원본 크롭에 합성 (주변 문맥 픽셀은 리샘플링 손실 없이 유지)
+            for crop, mask, result in zip(crops, masks, results):
+                masked = mask > 0
+                crop[masked] = result[masked]
+
+        return list(frames)
+
+    def _run_lama(self, crops, masks):
+        """
+        LAMA 단일 forward 실행 (크롭을 LAMA_CROP_SIZE로 맞춰 배치로 쌓음)
+
+        Args:
+            crops: ROI 크롭 리스트 (BGR)
+            masks: ROI 마스크 리스트 (0-255)
+
+        Returns:
+            list: 원래 크롭 크기로 복원된 인페인팅 결과 리스트 (BGR)
+        """
+        size = int(config.LAMA_CROP_SIZE)
+
+        # BGR → RGB는 작은 크롭에만 적용
+        images = np.stack([
+            cv2.cvtColor(cv2.resize(crop, (size, size), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2RGB)
+            for crop in crops
+        ])
+        mask_batch = np.stack([
+            cv2.resize(mask, (size, size), interpolation=cv2.INTER_NEAREST) for mask in masks
+        ])
+
+        image_tensor = torch.from_numpy(images).permute(0, 3, 1, 2).float().div_(255.0).to(self.device)
+        mask_tensor = torch.from_numpy((mask_batch > 0).astype(np.float32)).unsqueeze(1).to(self.device)
+
+        with torch.no_grad():
+            output = self.lama_model.model(image_tensor, mask_tensor)
+
+        output = (output.clamp(0, 1) * 255.0).round().byte().permute(0, 2, 3, 1).cpu().numpy()
+
+        results = []
+        for result, crop in zip(output, crops):
+            height, width = crop.shape[:2]
+            result_bgr = cv2.cvtColor(result, cv2.COLOR_RGB2BGR)
+            results.append(cv2.resize(result_bgr, (width, height), interpolation=cv2.INTER_LINEAR))
+        return results
@@ -0,0 +1,143 @@
+"""
+프로세스 전역 모델 레지스트리
+(모델, 디바이스, 정밀도) 키로 모델을 한 번만 로드하여 WatermarkRemover 인스턴스 사이에서 재사용
+메모리 예산(config.MODEL_CACHE_MEMORY_MB)을 넘으면 가장 오래 사용하지 않은 모델부터 해제 (LRU)
+"""
+
+import gc
+import threading
+from collections import OrderedDict
+from utils.logger import logger
+import config
+
+
+def _estimate_model_bytes(model):
+    """
+    모델 메모리 사용량 추정 (torch 파라미터/버퍼 크기 합)
+
+    ultralytics YOLO, IOPaint LaMa, RealESRGANer처럼 내부에 nn.Module을 가진 래퍼도 처리
+    """
+    candidates = [model]
+    for attr in ('model', 'net'):
+        inner = getattr(model, attr, None)
+        if inner is not None:
+            candidates.append(inner)
+
+    for candidate in candidates:
+        parameters = getattr(candidate, 'parameters', None)
+        if not callable(parameters):
+            continue
+        try:
+            total = sum(p.numel() * p.element_size() for p in candidate.parameters())
+            buffers = getattr(candidate, 'buffers', None)
+            if callable(buffers):
+                total += sum(b.numel() * b.element_size() for b in candidate.buffers())
+            if total > 0:
+                return total
+        except Exception:
+            continue
+    return 0
+
+
+class ModelRegistry:
+    """스레드 안전한 지연 로딩 + LRU 해제 모델 캐시"""
+
+    def __init__(self, memory_budget_mb=None):
+        """
+        Args:
+            memory_budget_mb: 캐시 메모리 예산 (MB, None이면 config.MODEL_CACHE_MEMORY_MB, 0 이하 = 무제한)
+        """
+        self.memory_budget_mb = memory_budget_mb
+        self._models = OrderedDict()  # key -> (model, size_bytes)
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    @property
+    def budget_bytes(self):
+        budget_mb = config.MODEL_CACHE_MEMORY_MB if self.memory_budget_mb is None else self.memory_budget_mb
+        return int(budget_mb * 1024 * 1024) if budget_mb and budget_mb > 0 else 0
+
+    def get(self, name, device, precision, loader, variant=""):
+        """
+        모델 조회 (없으면 loader로 로드 후 캐시)
+
+        같은 키를 동시에 요청하면 한 스레드만 로드하고 나머지는 결과를 기다림
+
+        Args:
+            name: 모델 이름 (예: "yolo", "lama", "esrgan")
+            device: 디바이스 문자열 (예: "cpu", "cuda:0")
+            precision: 정밀도 (예: "fp32", "fp16")
+            loader: () -> model 로드 함수
+            variant: 같은 이름의 다른 가중치를 구분하는 값 (예: 모델 경로)
+
+        Returns:
+            로드된 모델
+        """
+        key = (name, variant, device, precision)
+
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key][0]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # 다른 스레드가 먼저 로드했을 수 있음
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key][0]
+
+            model = loader()
+            size = _estimate_model_bytes(model)
+
+            with self._lock:
+                self._models[key] = (model, size)
+                self._models.move_to_end(key)
+                self._key_locks.pop(key, None)
+                self._evict_locked(keep=key)
+
+            logger.info(f"Model cached: {name} [{device}, {precision}] ({size / (1024 * 1024):.1f} MB)")
+            return model
+
+    def _evict_locked(self, keep):
+        """메모리 예산 초과 시 LRU 순서로 해제 (self._lock 보유 상태에서 호출)"""
+        budget = self.budget_bytes
+        if not budget:
+            return
+
+        evicted = False
+        while sum(size for _, size in self._models.values()) > budget:
+            oldest = next((k for k in self._models if k != keep), None)
+            if oldest is None:
+                break
+            _, size = self._models.pop(oldest)
+            logger.info(f"Model evicted (LRU): {oldest[0]} [{oldest[2]}, {oldest[3]}] ({size / (1024 * 1024):.1f} MB)")
+            evicted = True
+
+        if evicted:
+            self._release_memory()
+
+    def _release_memory(self):
+        gc.collect()
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+
+    def clear(self):
+        """모든 캐시 모델 해제"""
+        with self._lock:
+            self._models.clear()
+        self._release_memory()
+
+    def cached_keys(self):
+        """캐시된 모델 키 목록 (LRU → MRU 순서)"""
+        with self._lock:
+            return list(self._models.keys())
+
+
+# 프로세스 전역 레지스트리
+model_registry = ModelRegistry()
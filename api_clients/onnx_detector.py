@@ -0,0 +1,402 @@
+"""
+ONNX Runtime / OpenVINO 기반 YOLO 워터마크 탐지기 (CPU 추론 최적화)
+models/best.pt를 처음 실행할 때 ONNX(또는 OpenVINO IR)로 내보내 캐시하고,
+전처리(letterbox)와 NMS는 numpy로 벡터화하여 ultralytics 파이프라인 오버헤드 없이 실행
+"""
+
+import os
+import json
+import shutil
+from pathlib import Path
+import cv2
+import numpy as np
+from utils.logger import logger
+import config
+
+try:
+    import onnxruntime as ort
+    HAS_ONNXRUNTIME = True
+except ImportError:
+    ort = None
+    HAS_ONNXRUNTIME = False
+
+# letterbox 패딩 색 (ultralytics와 동일)
+LETTERBOX_COLOR = 114
+
+
+def _is_stale(export_path, source_path):
+    """내보낸 파일이 없거나 원본 가중치보다 오래되었는지 확인"""
+    return not os.path.exists(export_path) or os.path.getmtime(export_path) < os.path.getmtime(source_path)
+
+
+def export_detector(pt_path, backend="onnx", imgsz=640):
+    """
+    YOLO .pt 가중치를 ONNX 또는 OpenVINO IR로 내보내기 (캐시 재사용)
+
+    Args:
+        pt_path: YOLO 가중치 경로 (models/best.pt)
+        backend: "onnx" 또는 "openvino"
+        imgsz: 입력 크기 (정사각형, 32의 배수)
+
+    Returns:
+        str: ONNX 파일 경로 또는 OpenVINO .xml 경로
+    """
+    pt_path = Path(pt_path)
+    onnx_path = pt_path.with_name(f"{pt_path.stem}_{imgsz}.onnx")
+
+    if backend == "openvino":
+        ir_dir = pt_path.with_name(f"{pt_path.stem}_{imgsz}_openvino_model")
+        xml_path = ir_dir / f"{pt_path.stem}.xml"
+        if not _is_stale(xml_path, pt_path):
+            return str(xml_path)
+
+        from ultralytics import YOLO
+        logger.info(f"Exporting YOLO model to OpenVINO IR (imgsz={imgsz})...")
+        exported = Path(YOLO(str(pt_path)).export(format="openvino", imgsz=imgsz, dynamic=True))
+        if ir_dir.exists():
+            shutil.rmtree(ir_dir)
+        shutil.move(str(exported), str(ir_dir))
+        logger.info(f"OpenVINO model cached: {ir_dir}")
+        return str(xml_path)
+
+    if not _is_stale(onnx_path, pt_path):
+        return str(onnx_path)
+
+    from ultralytics import YOLO
+    logger.info(f"Exporting YOLO model to ONNX (imgsz={imgsz})...")
+    exported = YOLO(str(pt_path)).export(format="onnx", imgsz=imgsz, dynamic=True)
+    shutil.move(str(exported), str(onnx_path))
+    logger.info(f"ONNX model cached: {onnx_path}")
+    return str(onnx_path)
+
+
+def letterbox_batch(frames, imgsz):
+    """
+    캘리브레이션용 letterbox 배치 생성 ((N, 3, imgsz, imgsz) float32)
+    """
+    batch = np.empty((len(frames), 3, imgsz, imgsz), dtype=np.float32)
+    for i, frame in enumerate(frames):
+        height, width = frame.shape[:2]
+        scale = min(imgsz / height, imgsz / width)
+        new_w, new_h = int(round(width * scale)), int(round(height * scale))
+        pad_x, pad_y = (imgsz - new_w) // 2, (imgsz - new_h) // 2
+        resized = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        batch[i].fill(LETTERBOX_COLOR / 255.0)
+        batch[i, :, pad_y:pad_y + new_h, pad_x:pad_x + new_w] = resized[:, :, ::-1].transpose(2, 0, 1) / 255.0
+    return batch
+
+
+def quantize_detector(onnx_path, calibration_frames=None, imgsz=640):
+    """
+    ONNX 탐지기를 INT8로 양자화
+
+    캘리브레이션 프레임이 있으면 정적 양자화(QDQ, 활성값 범위를 샘플 프레임으로 측정),
+    없으면 가중치만 INT8로 바꾸는 동적 양자화
+
+    Args:
+        onnx_path: FP32 ONNX 경로
+        calibration_frames: 캘리브레이션용 BGR 프레임 리스트
+        imgsz: 입력 크기
+
+    Returns:
+        str: INT8 ONNX 경로
+    """
+    from onnxruntime.quantization import (quantize_static, quantize_dynamic, CalibrationDataReader,
+                                          QuantFormat, QuantType)
+
+    onnx_path = Path(onnx_path)
+    int8_path = onnx_path.with_name(f"{onnx_path.stem}_int8.onnx")
+
+    if calibration_frames:
+        class FrameCalibrationReader(CalibrationDataReader):
+            """샘플 프레임을 한 장씩 공급하는 캘리브레이션 리더"""
+
+            def __init__(self, input_name, batch):
+                self._items = iter([{input_name: batch[i:i + 1]} for i in range(len(batch))])
+
+            def get_next(self):
+                return next(self._items, None)
+
+        input_name = ort.InferenceSession(str(onnx_path), providers=["CPUExecutionProvider"]).get_inputs()[0].name
+        logger.info(f"Static INT8 quantization with {len(calibration_frames)} calibration frames...")
+        quantize_static(
+            str(onnx_path), str(int8_path),
+            FrameCalibrationReader(input_name, letterbox_batch(calibration_frames, imgsz)),
+            quant_format=QuantFormat.QDQ,
+            per_channel=True,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+        )
+    else:
+        logger.info("Dynamic INT8 quantization (weights only)...")
+        quantize_dynamic(str(onnx_path), str(int8_path), weight_type=QuantType.QInt8)
+
+    logger.info(f"INT8 model cached: {int8_path}")
+    return str(int8_path)
+
+
+def prepare_int8_detector(pt_path, imgsz, reference_clip, reference_detect, min_recall, sample_count=32):
+    """
+    INT8 탐지기 준비 + 정확도 게이트
+
+    기준 클립의 샘플 프레임으로 캘리브레이션하고, FP32 best.pt(ultralytics) 결과 대비
+    박스 recall이 min_recall 이상일 때만 INT8 모델을 사용 (결과는 모델 옆 JSON에 캐시)
+
+    Args:
+        pt_path: YOLO 가중치 경로
+        imgsz: 입력 크기
+        reference_clip: 캘리브레이션/게이트용 기준 비디오 경로
+        reference_detect: (frames) -> 프레임별 박스 리스트, FP32 기준 탐지 함수
+        min_recall: 허용 최소 recall (0-1)
+        sample_count: 기준 클립에서 뽑을 프레임 수
+
+    Returns:
+        str: 사용할 ONNX 경로 (게이트 통과 시 INT8, 실패 시 FP32)
+    """
+    from utils.video_utils import sample_frames
+
+    fp32_path = export_detector(pt_path, "onnx", imgsz)
+    int8_path = str(Path(fp32_path).with_name(f"{Path(fp32_path).stem}_int8.onnx"))
+    gate_path = str(Path(int8_path).with_suffix(".json"))
+
+    if not reference_clip or not os.path.exists(reference_clip):
+        logger.warning("INT8 detector needs config.INT8_REFERENCE_CLIP for calibration and accuracy gate, "
+                       "using FP32 ONNX")
+        return fp32_path
+
+    # 캐시된 게이트 결과 재사용 (같은 모델/클립/기준)
+    if not _is_stale(int8_path, fp32_path) and os.path.exists(gate_path):
+        try:
+            with open(gate_path, "r", encoding="utf-8") as f:
+                gate = json.load(f)
+            if gate.get("reference_clip") == os.path.abspath(reference_clip) and gate.get("min_recall") == min_recall:
+                if gate.get("passed"):
+                    return int8_path
+                logger.warning(f"INT8 detector previously failed accuracy gate (recall={gate.get('recall'):.3f}), "
+                               f"using FP32 ONNX")
+                return fp32_path
+        except Exception:
+            pass
+
+    frames = sample_frames(reference_clip, sample_count)
+    if not frames:
+        logger.warning(f"Cannot read reference clip: {reference_clip}, using FP32 ONNX")
+        return fp32_path
+
+    quantize_detector(fp32_path, frames, imgsz)
+
+    # 정확도 게이트: FP32 best.pt 대비 박스 recall
+    int8_detector = OnnxYoloDetector(int8_path, backend="onnx", imgsz=imgsz)
+    report = compare_detections(reference_detect(frames), int8_detector.detect(frames))
+    passed = report['recall'] >= min_recall
+    logger.info(f"INT8 accuracy gate: recall={report['recall']:.3f} (min {min_recall:.3f}), "
+                f"precision={report['precision']:.3f} → {'PASS' if passed else 'FAIL'}")
+
+    with open(gate_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "reference_clip": os.path.abspath(reference_clip),
+            "min_recall": min_recall,
+            "recall": report['recall'],
+            "precision": report['precision'],
+            "passed": passed,
+        }, f, indent=2)
+
+    return int8_path if passed else fp32_path
+
+
+def nms(boxes, scores, iou_threshold):
+    """
+    numpy 벡터화 NMS
+
+    Args:
+        boxes: (N, 4) xyxy
+        scores: (N,) 신뢰도
+        iou_threshold: IoU 임계값
+
+    Returns:
+        np.ndarray: 남길 인덱스 (점수 내림차순)
+    """
+    if len(boxes) == 0:
+        return np.empty((0,), dtype=np.int64)
+
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = np.maximum(0, x2 - x1) * np.maximum(0, y2 - y1)
+    order = np.argsort(-scores)
+
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        ix1 = np.maximum(x1[i], x1[rest])
+        iy1 = np.maximum(y1[i], y1[rest])
+        ix2 = np.minimum(x2[i], x2[rest])
+        iy2 = np.minimum(y2[i], y2[rest])
+        inter = np.maximum(0, ix2 - ix1) * np.maximum(0, iy2 - iy1)
+        iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+def box_iou(a, b):
+    """(N, 4)와 (M, 4) xyxy 박스 사이의 IoU 행렬 (N, M)"""
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    ix1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    iy1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    ix2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    iy2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.maximum(0, ix2 - ix1) * np.maximum(0, iy2 - iy1)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def compare_detections(reference, candidate, iou_threshold=0.5):
+    """
+    두 탐지기의 프레임별 박스 결과 비교 (ultralytics 경로와의 동등성 검사용)
+
+    Args:
+        reference: 기준 탐지 결과 (프레임별 박스 리스트)
+        candidate: 비교 탐지 결과 (프레임별 박스 리스트)
+        iou_threshold: 일치로 볼 최소 IoU
+
+    Returns:
+        dict: recall (기준 박스 중 찾은 비율), precision, reference/candidate/matched 박스 수
+    """
+    matched = 0
+    total_reference = 0
+    total_candidate = 0
+    for ref_boxes, cand_boxes in zip(reference, candidate):
+        total_reference += len(ref_boxes)
+        total_candidate += len(cand_boxes)
+        if ref_boxes and cand_boxes:
+            iou = box_iou(ref_boxes, cand_boxes)
+            matched += int(np.sum(iou.max(axis=1) >= iou_threshold))
+
+    return {
+        'recall': matched / total_reference if total_reference else 1.0,
+        'precision': matched / total_candidate if total_candidate else 1.0,
+        'reference': total_reference,
+        'candidate': total_candidate,
+        'matched': matched,
+    }
+
+
+class OnnxYoloDetector:
+    """ONNX Runtime (또는 OpenVINO) YOLO 탐지기 - LocalGPUClient._detect_watermarks와 같은 출력 형식"""
+
+    def __init__(self, model_path, backend="onnx", imgsz=640, num_threads=None):
+        """
+        Args:
+            model_path: ONNX 파일 경로 또는 OpenVINO .xml 경로
+            backend: "onnx" 또는 "openvino"
+            imgsz: 입력 크기 (내보낼 때와 동일)
+            num_threads: 추론 스레드 수 (None이면 config.TORCH_NUM_THREADS)
+        """
+        self.backend = backend
+        self.imgsz = int(imgsz)
+        num_threads = num_threads or config.TORCH_NUM_THREADS
+
+        if backend == "openvino":
+            import openvino as ov
+            core = ov.Core()
+            core.set_property("CPU", {"INFERENCE_NUM_THREADS": int(num_threads)})
+            self._compiled = core.compile_model(model_path, "CPU")
+            self._output = self._compiled.output(0)
+            self.session = None
+        else:
+            if not HAS_ONNXRUNTIME:
+                raise ImportError("onnxruntime not installed")
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = int(num_threads)
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            self.session = ort.InferenceSession(model_path, sess_options=options,
+                                                providers=["CPUExecutionProvider"])
+            self._input_name = self.session.get_inputs()[0].name
+
+        # 배치 입력 버퍼 (배치 크기가 바뀔 때만 다시 할당)
+        self._input_buffer = None
+        logger.info(f"{backend.upper()} detector loaded: {model_path} (imgsz={self.imgsz}, threads={num_threads})")
+
+    def _letterbox(self, frame, out):
+        """
+        비율 유지 리사이즈 + 가운데 패딩 (out에 CHW float32로 직접 기록)
+
+        Returns:
+            tuple: (scale, pad_x, pad_y) 좌표 복원용
+        """
+        height, width = frame.shape[:2]
+        scale = min(self.imgsz / height, self.imgsz / width)
+        new_w, new_h = int(round(width * scale)), int(round(height * scale))
+        pad_x, pad_y = (self.imgsz - new_w) // 2, (self.imgsz - new_h) // 2
+
+        resized = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        out.fill(LETTERBOX_COLOR / 255.0)
+        # BGR → RGB, HWC → CHW, 0-1 정규화
+        out[:, pad_y:pad_y + new_h, pad_x:pad_x + new_w] = resized[:, :, ::-1].transpose(2, 0, 1) / 255.0
+        return scale, pad_x, pad_y
+
+    def _infer(self, batch):
+        if self.session is not None:
+            return self.session.run(None, {self._input_name: batch})[0]
+        return self._compiled(batch)[self._output]
+
+    def detect(self, frames, conf=None, iou=None):
+        """
+        배치 탐지
+
+        Args:
+            frames: 입력 프레임 리스트 (BGR)
+            conf: 신뢰도 임계값 (None이면 config.YOLO_CONF_THRESHOLD)
+            iou: NMS IoU 임계값 (None이면 config.YOLO_IOU_THRESHOLD)
+
+        Returns:
+            list: 프레임별 바운딩 박스 리스트 [(x1, y1, x2, y2), ...] (원본 좌표, 입력과 같은 순서)
+        """
+        conf = config.YOLO_CONF_THRESHOLD if conf is None else conf
+        iou = config.YOLO_IOU_THRESHOLD if iou is None else iou
+
+        count = len(frames)
+        if self._input_buffer is None or self._input_buffer.shape[0] != count:
+            self._input_buffer = np.empty((count, 3, self.imgsz, self.imgsz), dtype=np.float32)
+
+        transforms = [self._letterbox(frame, self._input_buffer[i]) for i, frame in enumerate(frames)]
+        # 출력: (B, 4 + num_classes, N) - cx, cy, w, h + 클래스 점수
+        predictions = self._infer(self._input_buffer)
+
+        boxes_per_frame = []
+        for frame, prediction, (scale, pad_x, pad_y) in zip(frames, predictions, transforms):
+            prediction = prediction.T
+            class_scores = prediction[:, 4:]
+            class_ids = class_scores.argmax(axis=1)
+            scores = class_scores[np.arange(len(class_scores)), class_ids]
+
+            mask = scores >= conf
+            if not np.any(mask):
+                boxes_per_frame.append([])
+                continue
+
+            cx, cy, w, h = prediction[mask, :4].T
+            xyxy = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+            scores, class_ids = scores[mask], class_ids[mask]
+
+            # 클래스별 NMS (클래스마다 좌표 오프셋을 더해 한 번에 처리)
+            offsets = class_ids[:, None].astype(np.float32) * (self.imgsz * 2)
+            keep = nms(xyxy + offsets, scores, iou)
+            xyxy = xyxy[keep]
+
+            # letterbox 좌표 → 원본 좌표
+            xyxy[:, [0, 2]] = (xyxy[:, [0, 2]] - pad_x) / scale
+            xyxy[:, [1, 3]] = (xyxy[:, [1, 3]] - pad_y) / scale
+
+            height, width = frame.shape[:2]
+            boxes = []
+            for x1, y1, x2, y2 in xyxy.astype(int):
+                x1, y1 = max(0, int(x1)), max(0, int(y1))
+                x2, y2 = min(width, int(x2)), min(height, int(y2))
+                if x2 > x1 and y2 > y1:
+                    boxes.append((x1, y1, x2, y2))
+            boxes_per_frame.append(boxes)
+
+        return boxes_per_frame
@@ -0,0 +1,145 @@
+"""
+시간 구간 분할 병렬 처리
+키프레임 경계로 비디오를 N개 구간으로 나눠 프로세스 풀에서 처리하고
+ffmpeg concat demuxer로 무손실 연결 (원본 오디오는 연결 패스에서 mux)
+"""
+
+import os
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_EXCEPTION
+from utils.logger import logger
+from utils.video_utils import get_video_info, plan_segments, concat_segments
+import config
+
+# 워커 프로세스 전역 상태 (프로세스마다 모델을 한 번만 로드)
+_worker_client = None
+_worker_progress = None
+
+
+def _init_worker(method, thread_budget, stop_event, progress, client_options):
+    """
+    워커 프로세스 초기화 (자체 YOLO/ESRGAN 인스턴스와 스레드 예산)
+    """
+    global _worker_client, _worker_progress
+
+    # 워커 안에서는 재분할하지 않고, 스레드는 예산만큼만 사용
+    config.SEGMENT_WORKERS = 1
+    config.TORCH_NUM_THREADS = thread_budget
+    config.FFMPEG_THREADS = thread_budget
+
+    _worker_progress = progress
+
+    if method == "enhance":
+        from api_clients.video_enhancement_pipeline import VideoEnhancementPipeline
+        _worker_client = VideoEnhancementPipeline(stop_event=stop_event, **client_options)
+    else:
+        from api_clients.local_gpu_client import LocalGPUClient
+        _worker_client = LocalGPUClient(stop_event=stop_event, **client_options)
+
+
+def _process_segment(index, video_path, segment_path, start, duration):
+    """워커에서 한 구간 처리"""
+    def progress_callback(message, progress):
+        _worker_progress[index] = progress
+
+    _worker_client.progress_callback = progress_callback
+    success = _worker_client.process_segment(video_path, segment_path, start, duration)
+    _worker_progress[index] = 100.0 if success else _worker_progress.get(index, 0.0)
+    return success
+
+
+def process_video_segmented(video_path, output_path, method, workers=None, stop_event=None,
+                            progress_callback=None, client_options=None, video_info=None):
+    """
+    비디오를 구간으로 나눠 병렬 처리
+
+    Args:
+        video_path: 입력 비디오 경로
+        output_path: 출력 비디오 경로
+        method: "local_gpu" (워터마크 제거) 또는 "enhance" (ESRGAN 업스케일)
+        workers: 워커 프로세스 수 (None이면 config.SEGMENT_WORKERS)
+        stop_event: threading.Event 객체로 처리 중단을 신호하는 데 사용
+        progress_callback: 진행률 업데이트 콜백 함수 (message, progress) -> None
+        client_options: 워커 클라이언트 생성자에 넘길 작업별 설정 (예: detector_backend, static_roi)
+        video_info: 미리 조회한 VideoInfo (None이면 get_video_info)
+
+    Returns:
+        bool or None: 성공 여부 (분할할 수 없는 비디오면 None → 호출자가 단일 경로로 처리)
+    """
+    workers = int(workers or config.SEGMENT_WORKERS)
+    if workers <= 1:
+        return None
+
+    info = video_info or get_video_info(video_path)
+    if info is None or not info.exact:
+        return None
+    duration = info.duration
+    if not duration or duration < config.SEGMENT_MIN_DURATION * 2:
+        return None
+
+    segments = plan_segments(duration, info.keyframes, workers, config.SEGMENT_MIN_DURATION)
+    if len(segments) < 2:
+        logger.info("Not enough keyframes to split video, using single-process path")
+        return None
+
+    thread_budget = max(1, (os.cpu_count() or 1) // len(segments))
+    logger.info(f"Segmented processing: {len(segments)} segments, {thread_budget} threads per worker")
+
+    os.makedirs(config.TEMP_DIR, exist_ok=True)
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Manager() as manager, tempfile.TemporaryDirectory(dir=config.TEMP_DIR) as temp_dir:
+        worker_stop = manager.Event()
+        progress = manager.dict({i: 0.0 for i in range(len(segments))})
+
+        segment_paths = [os.path.join(temp_dir, f"segment_{i:04d}.mp4") for i in range(len(segments))]
+
+        with ProcessPoolExecutor(max_workers=len(segments), mp_context=ctx, initializer=_init_worker,
+                                 initargs=(method, thread_budget, worker_stop, progress,
+                                           client_options or {})) as executor:
+            futures = [
+                executor.submit(_process_segment, i, video_path, segment_paths[i], start, seg_duration)
+                for i, (start, seg_duration) in enumerate(segments)
+            ]
+
+            # 완료 대기 (중지 요청 전파 + 구간 길이 가중 진행률)
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=0.5, return_when=FIRST_EXCEPTION)
+                if stop_event and stop_event.is_set():
+                    worker_stop.set()
+
+                if progress_callback:
+                    overall = 0.0
+                    for i, (start, seg_duration) in enumerate(segments):
+                        length = seg_duration if seg_duration is not None else duration - start
+                        overall += progress.get(i, 0.0) * length / duration
+                    finished = len(futures) - len(pending)
+                    progress_callback(f"Processing segments {finished}/{len(futures)}", min(overall, 99.0))
+
+                if any(f.exception() for f in done):
+                    worker_stop.set()
+
+            results = []
+            for i, future in enumerate(futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    logger.error(f"Segment {i} failed: {e}")
+                    results.append(False)
+
+        if stop_event and stop_event.is_set():
+            logger.warning("Segmented processing stopped by user")
+            return False
+
+        if not all(results):
+            logger.error(f"Segmented processing failed: {results.count(False)}/{len(results)} segments failed")
+            return False
+
+        # 무손실 연결 + 원본 오디오 mux
+        if not concat_segments(segment_paths, output_path, audio_source=video_path):
+            return False
+
+    if progress_callback:
+        progress_callback("Segmented processing complete", 100.0)
+    return True
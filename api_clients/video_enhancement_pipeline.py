@@ -36,7 +36,13 @@ from pathlib import Path
 from PIL import Image
 
 from utils.logger import logger
-from utils.video_utils import extract_audio, merge_audio
+from utils.video_utils import (extract_audio, merge_audio, ffmpeg_available, get_video_info,
+                               open_frame_reader, open_frame_writer, read_first_frames, partial_output_path,
+                               discard_partial_output, add_source_audio)
+from utils.frame_pipeline import FramePipeline
+from api_clients.model_registry import model_registry
+from api_clients.esrgan_tiling import select_tile_size
+from api_clients.esrgan_tile_engine import create_tile_engine
 import config
 
 try:
@@ -51,13 +57,14 @@ except ImportError:
 class VideoEnhancementPipeline:
     """Real-ESRGAN 비디오 업스케일링 (4x 해상도 증가)"""
 
-    def __init__(self, stop_event=None, progress_callback=None):
+    def __init__(self, stop_event=None, progress_callback=None, encoder_profile=None):
         """
         VideoEnhancementPipeline 초기화
 
         Args:
             stop_event: threading.Event 객체로 처리 중단을 신호하는 데 사용
             progress_callback: 진행률 업데이트 콜백 함수 (message, progress) -> None
+            encoder_profile: 출력 인코더 프로필 이름 (None이면 config.VIDEO_PROFILE)
         """
         # PyTorch 성능 최적화 설정
         torch.set_num_threads(config.TORCH_NUM_THREADS)
@@ -68,9 +75,13 @@ class VideoEnhancementPipeline:
         self.device = self._select_device()
         self.stop_event = stop_event
         self.progress_callback = progress_callback
+        self.encoder_profile = encoder_profile or config.VIDEO_PROFILE
 
         # ESRGAN 모델 초기화
         self.esrgan_upsampler = None
+        self.esrgan_half = config.ESRGAN_HALF_PRECISION and self.device.startswith("cuda")
+        self._tile_sizes = {}  # (width, height) → 선택된 타일 크기
+        self.tile_engine = None  # 프레임 간 타일 배치 엔진 (ESRGAN_BATCHED_TILES)
 
         logger.info(f"Using device for enhancement: {self.device}")
         self._initialize_models()
@@ -131,13 +142,35 @@ class VideoEnhancementPipeline:
             logger.info(f"Downloading ESRGAN model from {config.ESRGAN_MODEL_URL}...")
             self._download_esrgan_model(config.ESRGAN_MODEL_URL, model_path)
 
-        try:
-            # RealESRGANer 초기화
-            self.esrgan_upsampler = RealESRGANer(
+        def load():
+            # RealESRGAN_x4plus 네트워크 구조 (RRDB 23블록)
+            model = RRDBNet(num_in_ch=3, num_out_ch=3, num_feat=64, num_block=23, num_grow_ch=32,
+                            scale=config.ESRGAN_SCALE)
+            # 타일 크기는 비디오 해상도별로 _configure_tiling에서 다시 설정
+            return RealESRGANer(
                 scale=config.ESRGAN_SCALE,
-                model_path=model_path
+                model_path=model_path,
+                model=model,
+                tile=config.ESRGAN_TILE_SIZE,
+                tile_pad=config.ESRGAN_TILE_PAD,
+                pre_pad=config.ESRGAN_PRE_PAD,
+                half=self.esrgan_half,
+                device=torch.device(self.device)
             )
-            logger.info("Real-ESRGAN model loaded successfully")
+
+        try:
+            # RealESRGANer 초기화 (프로세스 전역 레지스트리에서 재사용)
+            self.esrgan_upsampler = model_registry.get(
+                "esrgan", self.device, "fp16" if self.esrgan_half else "fp32",
+                load,
+                variant=model_path
+            )
+            logger.info(f"Real-ESRGAN model loaded successfully ({'FP16' if self.esrgan_half else 'FP32'}, "
+                        f"tile pad {config.ESRGAN_TILE_PAD}, pre pad {config.ESRGAN_PRE_PAD})")
+
+            # 같은 RRDBNet을 공유하는 배치 엔진 (여러 프레임의 타일을 한 번의 forward로)
+            if config.ESRGAN_BATCHED_TILES:
+                self.tile_engine = create_tile_engine(self.esrgan_upsampler, self.device, self.esrgan_half)
         except Exception as e:
             logger.error(f"RealESRGANer failed: {e}")
             raise
@@ -168,13 +201,14 @@ class VideoEnhancementPipeline:
             logger.error(f"Failed to download ESRGAN model: {e}")
             raise
 
-    def enhance_video(self, video_path, output_path):
+    def enhance_video(self, video_path, output_path, video_info=None):
         """
         메인 진입점: ESRGAN 업스케일링만 실행 (4x 해상도 증가)
 
         Args:
             video_path: 입력 비디오 경로
             output_path: 출력 비디오 경로
+            video_info: 미리 조회한 VideoInfo (None이면 get_video_info)
 
         Returns:
             bool: 성공 여부
@@ -185,17 +219,54 @@ class VideoEnhancementPipeline:
 
             logger.info(f"Starting ESRGAN Video Enhancement...")
             logger.info(f"Input: {video_path}")
+            video_info = video_info or get_video_info(video_path)
+
+            # 구간 분할 병렬 처리 (SEGMENT_WORKERS > 1, 분할 불가면 None)
+            if config.SEGMENT_WORKERS > 1 and config.USE_FFMPEG_PIPE_IO and ffmpeg_available():
+                from api_clients.segment_processor import process_video_segmented
+                result = process_video_segmented(video_path, output_path, "enhance",
+                                                 stop_event=self.stop_event,
+                                                 progress_callback=self.progress_callback,
+                                                 client_options={'encoder_profile': self.encoder_profile},
+                                                 video_info=video_info)
+                if result is not None:
+                    if result:
+                        logger.info(f"✓ Video enhancement completed successfully!")
+                        logger.info(f"Output: {output_path}")
+                    return result
+
+            # 재개 가능한 청크 처리 (4K 작업이 중단되어도 완료된 청크는 유지)
+            if config.RESUMABLE_OUTPUT and config.USE_FFMPEG_PIPE_IO and ffmpeg_available():
+                from api_clients.chunked_processor import process_video_resumable
+                result = process_video_resumable(self, video_path, output_path, "enhance",
+                                                 client_options={'encoder_profile': self.encoder_profile},
+                                                 video_info=video_info)
+                if result is not None:
+                    if result:
+                        logger.info(f"✓ Video enhancement completed successfully!")
+                        logger.info(f"Output: {output_path}")
+                    return result
+
+            # 단일 패스: 4K 프레임 + 원본 오디오를 한 번의 ffmpeg 호출로 인코딩 (4K 중간 파일 없음)
+            if config.USE_FFMPEG_PIPE_IO and ffmpeg_available():
+                logger.info("Starting Real-ESRGAN 4x upscaling...")
+                if not self._run_esrgan(video_path, output_path, audio_source=video_path, video_info=video_info):
+                    return False
+
+                logger.info(f"✓ Video enhancement completed successfully!")
+                logger.info(f"Output: {output_path}")
+                return True
 
             with tempfile.TemporaryDirectory() as temp_dir:
                 # 오디오 추출
-                audio_path = os.path.join(temp_dir, 'audio.aac')
+                audio_path = os.path.join(temp_dir, 'audio.mka')
                 logger.info("Extracting audio from original video...")
                 extract_audio(video_path, audio_path)
 
                 # ESRGAN: 1080p → 4K 업스케일
                 esrgan_out = os.path.join(temp_dir, 'esrgan_4k.mp4')
                 logger.info("Starting Real-ESRGAN 4x upscaling...")
-                if not self._run_esrgan(video_path, esrgan_out):
+                if not self._run_esrgan(video_path, esrgan_out, video_info=video_info):
                     return False
 
                 # 오디오 병합
@@ -217,68 +288,107 @@ class VideoEnhancementPipeline:
             logger.error(traceback.format_exc())
             return False
 
-    def _run_esrgan(self, input_path, output_path):
+    def process_segment(self, video_path, output_path, start, duration, reset_state=True):
+        """
+        비디오의 한 시간 구간만 업스케일 (구간 분할 병렬 처리 / 재개 가능한 청크 처리용, 오디오 없음)
+
+        Args:
+            video_path: 입력 비디오 경로
+            output_path: 구간 출력 경로
+            start: 구간 시작 시각 (초, 키프레임)
+            duration: 구간 길이 (초, None이면 끝까지)
+            reset_state: LocalGPUClient와 같은 인터페이스 (업스케일은 프레임 간 상태가 없어 무시)
+
+        Returns:
+            bool: 성공 여부
+        """
+        return self._run_esrgan(video_path, output_path, start=start, duration=duration)
+
+    def _run_esrgan(self, input_path, output_path, audio_source=None, start=None, duration=None, video_info=None):
         """
         Stage 1: 1080p → 4K 업스케일
+
+        Args:
+            input_path: 입력 비디오 경로
+            output_path: 출력 비디오 경로
+            audio_source: 같은 인코딩 패스에서 mux할 오디오 원본 (None이면 오디오 없음)
+            start: 구간 시작 시각 (초, None이면 처음부터)
+            duration: 구간 길이 (초, None이면 끝까지)
+            video_info: 미리 조회한 VideoInfo (None이면 get_video_info)
         """
+        # 임시 경로로 인코딩 후 완료 시에만 최종 경로로 교체 (중단/실패 시 잘린 파일 삭제)
+        partial_path = partial_output_path(output_path)
         try:
-            cap = cv2.VideoCapture(input_path)
-            if not cap.isOpened():
+            info = video_info or get_video_info(input_path)
+            if info is None:
                 raise IOError(f"Cannot open video: {input_path}")
-
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            fps = info.fps
+            # 디코더가 회전 메타데이터를 적용하므로 표시 크기 사용
+            width, height = info.display_size
+            # 구간 처리 시 해당 구간의 프레임 수로 진행률 계산 (ffprobe 패킷 시각 기준)
+            total_frames = info.frame_count_between(start, duration)
 
             # 출력: 4배 크기
             out_width, out_height = width * 4, height * 4
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            out = cv2.VideoWriter(output_path, fourcc, fps, (out_width, out_height))
 
-            if not out.isOpened():
-                raise IOError(f"Cannot create output video: {output_path}")
+            # 해상도/메모리에 맞는 타일 크기 (첫 구간/비디오에서 한 번만 선택)
+            self._configure_tiling(input_path, width, height)
 
             logger.info(f"ESRGAN: {width}x{height} → {out_width}x{out_height}, FPS: {fps}, Frames: {total_frames}")
 
-            frame_count = 0
-            while True:
-                if self.stop_event and self.stop_event.is_set():
-                    logger.warning(f"Stage 1 stopped by user at frame {frame_count}/{total_frames}")
-                    cap.release()
-                    out.release()
-                    return False
-
-                ret, frame = cap.read()
-                if not ret:
-                    break
-
-                frame_count += 1
-
-                # 업스케일 (ESRGAN 또는 OpenCV fallback)
-                try:
-                    if self.esrgan_upsampler == "opencv":
-                        # OpenCV 업스케일
-                        upscaled = cv2.resize(frame, (out_width, out_height), interpolation=cv2.INTER_CUBIC)
-                    else:
-                        # Real-ESRGAN 업스케일
-                        upscaled, _ = self.esrgan_upsampler.enhance(frame, outscale=config.ESRGAN_SCALE)
-                except Exception as e:
-                    logger.warning(f"Upscale failed on frame {frame_count}: {e}, using OpenCV resize")
-                    upscaled = cv2.resize(frame, (out_width, out_height), interpolation=cv2.INTER_CUBIC)
-
-                out.write(upscaled)
-
+            def upscale_batch(frames):
+                if self.tile_engine is not None:
+                    try:
+                        return self.tile_engine.upscale(frames)
+                    except Exception as e:
+                        # 메모리 부족 등으로 실패하면 이후 프레임은 프레임별 enhance로 처리
+                        logger.warning(f"Batched tile upscale failed: {e}, falling back to per-frame enhance")
+                        self.tile_engine = None
+                        if self.device.startswith("cuda"):
+                            torch.cuda.empty_cache()
+                return [self._upscale_frame(frame, out_width, out_height) for frame in frames]
+
+            def on_frame_written(frame_count):
                 # 진행률 업데이트 (매 프레임마다)
-                progress = (frame_count / total_frames) * 100
+                progress = (frame_count / total_frames) * 100 if total_frames > 0 else 0
                 if self.progress_callback:
                     self.progress_callback(
                         f"[ESRGAN Upscaling] {frame_count}/{total_frames} frames",
                         progress
                     )
 
-            cap.release()
-            out.release()
+            # 디코딩 → 업스케일 → 인코딩 (스레드 파이프라인)
+            # 배치 엔진은 연속 프레임을 묶어 받아 타일을 함께 처리
+            batch_frames = config.ESRGAN_BATCH_FRAMES if self.tile_engine is not None else 1
+            pipeline = FramePipeline(stop_event=self.stop_event, batch_size=batch_frames, name="esrgan")
+
+            reader = open_frame_reader(input_path, width, height,
+                                       buffer_count=pipeline.max_frames_in_flight(),
+                                       start=start, duration=duration)
+            try:
+                writer = open_frame_writer(partial_path, out_width, out_height, fps, audio_source=audio_source,
+                                           profile=self.encoder_profile)
+            except Exception:
+                reader.close()
+                raise
+
+            try:
+                completed = pipeline.run(reader.read, upscale_batch, writer.write, on_frame_written)
+            finally:
+                reader.close()
+                writer.close()
+
+            if not completed:
+                logger.warning(f"Stage 1 stopped by user at frame {pipeline.stats['written']}/{total_frames}")
+                return False
+
+            if audio_source and not writer.muxes_audio:
+                # 라이터가 오디오를 mux하지 못함 (OpenCV fallback) → 원본 오디오를 별도 패스로 병합
+                logger.info("Merging upscaled video with audio...")
+                if not add_source_audio(partial_path, audio_source, output_path):
+                    return False
+            else:
+                os.replace(partial_path, output_path)
 
             if self.progress_callback:
                 self.progress_callback(
@@ -292,6 +402,81 @@ class VideoEnhancementPipeline:
         except Exception as e:
             logger.error(f"ESRGAN processing failed: {e}")
             return False
+        finally:
+            discard_partial_output(partial_path)
+
+    def _configure_tiling(self, input_path, width, height):
+        """
+        ESRGAN 타일 크기 설정 (ESRGAN_TILE_AUTO면 첫 프레임 벤치마크로 선택, 해상도별 캐시)
+
+        Args:
+            input_path: 벤치마크 프레임을 가져올 입력 비디오
+            width, height: 입력 프레임 크기
+        """
+        if self.esrgan_upsampler in (None, "opencv"):
+            return
+
+        tile_size = self._tile_sizes.get((width, height))
+        if tile_size is None:
+            tile_size = config.ESRGAN_TILE_SIZE
+            if config.ESRGAN_TILE_AUTO:
+                try:
+                    # 앞부분 N 프레임만 디코딩 (구간 워커마다 반복되므로 전체 탐색 금지)
+                    frames = [frame for frame in read_first_frames(input_path, width, height,
+                                                                   config.ESRGAN_TILE_BENCH_FRAMES)
+                              if frame.shape[:2] == (height, width)]
+                    if frames:
+                        tile_size = self._select_tile_size(frames)
+                except Exception as e:
+                    logger.warning(f"ESRGAN tile auto-tuning failed ({e}), using tile {tile_size}")
+            self._tile_sizes[(width, height)] = tile_size
+
+        self.esrgan_upsampler.tile_size = tile_size
+        if self.tile_engine is not None:
+            self.tile_engine.tile_size = tile_size
+
+    def _select_tile_size(self, frames):
+        """실제 업스케일 경로(배치 엔진 또는 프레임별 enhance)로 타일 크기 벤치마크"""
+        if self.tile_engine is not None:
+            engine = self.tile_engine
+
+            def upscale(batch, tile_size):
+                engine.tile_size = tile_size
+                return engine.upscale(batch)
+
+            return select_tile_size(upscale, frames, self.device, self.esrgan_half,
+                                    batch_size=engine.batch_size, frames_per_call=config.ESRGAN_BATCH_FRAMES)
+
+        upsampler = self.esrgan_upsampler
+
+        def upscale(batch, tile_size):
+            upsampler.tile_size = tile_size
+            return [upsampler.enhance(frame, outscale=config.ESRGAN_SCALE)[0] for frame in batch]
+
+        return select_tile_size(upscale, frames, self.device, self.esrgan_half)
+
+    def _upscale_frame(self, frame, out_width, out_height):
+        """
+        단일 프레임 업스케일 (ESRGAN 또는 OpenCV fallback)
+
+        Args:
+            frame: 입력 프레임 (BGR)
+            out_width: 출력 너비
+            out_height: 출력 높이
+
+        Returns:
+            업스케일된 프레임 (BGR)
+        """
+        try:
+            if self.esrgan_upsampler == "opencv":
+                # OpenCV 업스케일
+                return cv2.resize(frame, (out_width, out_height), interpolation=cv2.INTER_CUBIC)
+            # Real-ESRGAN 업스케일
+            upscaled, _ = self.esrgan_upsampler.enhance(frame, outscale=config.ESRGAN_SCALE)
+            return upscaled
+        except Exception as e:
+            logger.warning(f"Upscale failed: {e}, using OpenCV resize")
+            return cv2.resize(frame, (out_width, out_height), interpolation=cv2.INTER_CUBIC)
 
     def _run_codeformer(self, input_path, output_path):
         """
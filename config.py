@@ -39,6 +39,36 @@ LOG_DIR = str(PROJECT_ROOT / "logs")
 # 처리 설정
 MAX_VIDEO_DURATION = 300  # 최대 비디오 길이 (초)
 
+# 비디오 입출력 설정 (ffmpeg rawvideo 파이프)
+USE_FFMPEG_PIPE_IO = True  # ffmpeg 파이프로 디코딩/인코딩 (False면 cv2.VideoCapture/VideoWriter mp4v)
+VIDEO_PROFILE = "balanced" # 출력 인코더 프로필 (VIDEO_PROFILES 키, GUI에서 선택 가능)
+# 인코더 프로필
+#   codec: "libx264", "libx265" 또는 "libx264rgb" (RGB 그대로 인코딩) / preset: ultrafast ~ veryslow (빠를수록 파일 큼)
+#   crf: 품질 (낮을수록 고품질, 0 = 무손실) / threads: 인코딩 스레드 수 (0 = 자동, 워커 스레드 예산이 더 작으면 예산 사용)
+#   gop_seconds: 키프레임 간격 (초) / bframes: 연속 B 프레임 수 / pix_fmt: 출력 픽셀 포맷
+VIDEO_PROFILES = {
+    "fast": {      # 인코딩 속도 우선 (미리보기/빠른 확인)
+        "codec": "libx264", "preset": "ultrafast", "crf": 20, "threads": 0,
+        "gop_seconds": 2.0, "bframes": 0, "pix_fmt": "yuv420p",
+    },
+    "balanced": {  # 기본값 (속도/크기 균형)
+        "codec": "libx264", "preset": "medium", "crf": 18, "threads": 8,
+        "gop_seconds": 5.0, "bframes": 3, "pix_fmt": "yuv420p",
+    },
+    "archive": {   # 파일 크기 우선 (x265, 인코딩 느림)
+        "codec": "libx265", "preset": "slow", "crf": 20, "threads": 16,
+        "gop_seconds": 10.0, "bframes": 4, "pix_fmt": "yuv420p",
+    },
+    "lossless": {  # 후처리용 중간 파일 (x264 RGB 무손실, YUV 변환 없이 비트 단위 동일, 매우 큼)
+        "codec": "libx264rgb", "preset": "ultrafast", "crf": 0, "threads": 4,
+        "gop_seconds": 1.0, "bframes": 0, "pix_fmt": "bgr24",
+    },
+}
+FFMPEG_THREADS = 0         # ffmpeg 디코딩/인코딩 스레드 수 (0 = 자동)
+FFMPEG_PATH = os.getenv("FFMPEG_PATH", "")    # ffmpeg 실행 파일 경로 ("" = 자동: ffmpeg 폴더 → PATH)
+FFPROBE_PATH = os.getenv("FFPROBE_PATH", "")  # ffprobe 실행 파일 경로 ("" = 자동: ffmpeg와 같은 폴더 → PATH)
+VIDEO_HW_ENCODER = False   # 하드웨어 인코더 사용 (NVENC/QSV/AMF, 테스트 인코딩 통과 시에만, 아니면 소프트웨어)
+
 # 지원 형식
 SUPPORTED_FORMATS = ('mp4', 'mov', 'avi', 'mkv', 'webm', 'flv', 'wmv')
 
@@ -54,12 +84,49 @@ MODELS_DIR = str(PROJECT_ROOT / "models")  # 모델 저장 디렉토리
 YOLO_MODEL_PATH = str(Path(MODELS_DIR) / "best.pt")  # YOLOv11s 모델
 YOLO_MODEL_URL = "https://github.com/linkedlist771/SoraWatermarkCleaner/releases/download/V0.0.1/best.pt"
 LAMA_MODEL_NAME = "lama"  # IOPaint LAMA 모델 이름 (자동 다운로드)
+PREFETCH_OTHER_METHOD = False  # 작업 중 다른 처리 방법(제거/업스케일) 모델을 백그라운드에서 미리 로드
+MODEL_CACHE_MEMORY_MB = 4096  # 프로세스 전역 모델 캐시 메모리 예산 (MB, 초과 시 LRU 해제, 0 = 무제한)
 
 # 성능 최적화 설정
 YOLO_CONF_THRESHOLD = 0.3      # YOLO 신뢰도 임계값 (낮을수록 더 많이 탐지, 0.3 = 최고 감지)
 YOLO_IOU_THRESHOLD = 0.45      # YOLO IoU 임계값 (낮을수록 더 많이 탐지)
 YOLO_HALF_PRECISION = False    # FP16 반정밀도 (CPU는 지원 안함, GPU만 가능)
 TORCH_NUM_THREADS = 8          # PyTorch 스레드 수 (CPU 코어 수에 맞춰 설정)
+DETECTOR_BACKEND = "ultralytics"  # 탐지 백엔드: "ultralytics", "onnx" (ONNX Runtime), "onnx-int8" (INT8 양자화), "openvino" (best.pt를 처음 실행 시 내보내 캐시)
+DETECTOR_IMGSZ = 640           # ONNX/OpenVINO 탐지기 입력 크기 (32의 배수)
+INT8_REFERENCE_CLIP = ""       # INT8 캘리브레이션 + 정확도 게이트용 기준 클립 경로 (없으면 FP32 ONNX 사용)
+INT8_CALIBRATION_FRAMES = 32   # 기준 클립에서 샘플링할 프레임 수
+INT8_MIN_RECALL = 0.95         # FP32 best.pt 대비 최소 박스 recall (미달 시 FP32 ONNX 사용)
+DETECTION_RESOLUTION = 640     # 탐지 전에 프레임 긴 변을 이 크기로 한 번만 축소 (0 = 원본 해상도, 4K 소스에서 전처리 비용 절감)
+DETECTION_BOX_PADDING = 4      # 축소 해상도 박스를 원본 좌표로 되돌릴 때 추가하는 안전 여백 (픽셀)
+DETECTION_SIDECAR = False      # 2패스 모드: 첫 실행에서 프레임별 박스 트랙을 저장하고, 같은 입력/탐지 설정 재실행 시 탐지 생략 (인페인팅만)
+DETECTION_CACHE_DIR = str(Path(TEMP_DIR) / "detections")  # 박스 트랙 사이드카(.npz) 저장 위치
+STATIC_ROI_MODE = "off"        # 고정 위치 워터마크: "off" (탐지), "fixed" (STATIC_ROI_BOXES 사용, 탐지 생략), "auto" (처음 N 프레임 탐지로 위치 학습 후 탐지 생략)
+STATIC_ROI_BOXES = []          # 고정 영역 [(x1, y1, x2, y2), ...] (픽셀, 값이 모두 1 이하면 프레임 크기 대비 비율)
+STATIC_ROI_WARMUP_FRAMES = 30  # auto 모드: 위치 학습에 사용할 처음 프레임 수
+STATIC_ROI_MIN_COVERAGE = 0.8  # auto 모드: 학습 프레임 중 이 비율 이상에서 탐지된 위치만 고정 영역으로 채택
+YOLO_BATCH_SIZE = 4            # 한 번의 YOLO 호출로 탐지할 프레임 수 (CPU는 4 권장, GPU는 8-16)
+DETECTION_INTERVAL = 1         # K 프레임마다 YOLO 탐지, 사이 프레임은 박스 추적 (1 = 매 프레임 탐지, 5-10 권장)
+SCENE_CHANGE_THRESHOLD = 30.0  # 장면 전환 판단 기준 (썸네일 평균 밝기 차이, 0-255) → 즉시 재탐지
+TRACKING_MIN_CONFIDENCE = 0.6  # 템플릿 매칭 점수가 이보다 낮으면 해당 프레임 재탐지 (0-1)
+TRACKING_SEARCH_MARGIN = 32    # 추적 시 이전 박스 주변 탐색 여백 (픽셀)
+BATCH_WORKERS = 1              # 배치 처리 시 동시에 처리할 파일 수 (워커 프로세스, 1 = 순차 처리)
+RESULT_CACHE_ENABLED = True     # 배치 재실행 시 같은 입력 + 같은 설정으로 이미 성공한 파일은 건너뜀 (기존 출력 재사용)
+RESULT_CACHE_PATH = str(Path(TEMP_DIR) / "result_cache.json")  # 결과 캐시 인덱스 경로
+SEGMENT_WORKERS = 1            # 한 비디오를 키프레임 구간으로 나눠 병렬 처리할 워커 프로세스 수 (1 = 사용 안함)
+SEGMENT_MIN_DURATION = 10.0    # 분할 구간 최소 길이 (초, 이보다 짧은 비디오는 분할 안함)
+RESUMABLE_OUTPUT = False       # 고정 길이 청크로 영구 작업 폴더에 인코딩 (중단/실패 후 재실행 시 마지막 완료 청크부터 이어서 처리)
+RESUME_MIN_DURATION = 120.0    # 이 길이(초) 이하 비디오는 청크로 나누지 않고 단일 패스로 인코딩
+RESUME_CHUNK_DURATION = 10.0   # 청크 길이 (초, 키프레임 경계에 맞춰 조정)
+RESUME_WORK_DIR = str(Path(TEMP_DIR) / "resume")  # 청크 + manifest 작업 폴더 위치
+RESUME_KEEP_WORK_DIR = False   # 완료 후에도 청크 작업 폴더 유지 여부
+PIPELINE_QUEUE_SIZE = 16       # 디코딩/처리/인코딩 스테이지 사이 큐 크기 (프레임 수, 메모리와 트레이드오프)
+INPAINT_METHOD = "telea"       # 인페인팅 방식: "telea" (OpenCV, 빠름), "lama" (IOPaint LAMA, 고품질), "temporal" (주변 프레임 시간축 중앙값, 프레임 간 안정)
+TEMPORAL_WINDOW = 15           # temporal 모드: 관측값으로 사용할 최근 프레임 수 (해상도 x 프레임 수만큼 메모리 사용)
+TEMPORAL_MAX_DIFF = 12.0       # temporal 모드: ROI 주변 평균 밝기 차이가 이보다 큰 프레임은 제외 (카메라 이동 시 잔상 방지, 0-255)
+LAMA_CROP_SIZE = 256           # LAMA 입력 크롭 크기 (정사각형, 8의 배수)
+LAMA_BATCH_SIZE = 8            # LAMA 한 번의 forward에 넣을 크롭 수 (여러 프레임의 크롭을 묶음)
+INPAINT_ROI_PADDING = 16       # 인페인팅 ROI 여백 (박스 주변 픽셀, 주변 문맥 확보용)
 LAMA_GUIDANCE_SCALE = 7.5      # LAMA 가이던스 스케일 (높을수록 정확, 1-20)
 
 # ==================== Video Enhancement Pipeline ====================
@@ -69,10 +136,18 @@ ESRGAN_MODEL_NAME = "RealESRGAN_x4plus"
 ESRGAN_MODEL_PATH = str(Path(MODELS_DIR) / "RealESRGAN_x4plus.pth")
 ESRGAN_MODEL_URL = "https://github.com/xinntao/Real-ESRGAN/releases/download/v0.1.0/RealESRGAN_x4plus.pth"
 ESRGAN_SCALE = 4
-ESRGAN_TILE_SIZE = 256
-ESRGAN_TILE_PAD = 10
-ESRGAN_HALF_PRECISION = True
-ESRGAN_PRE_PAD = 0
+ESRGAN_TILE_SIZE = 256          # 타일 크기 (0 = 타일 없이 전체 프레임, 자동 선택을 끄거나 실패하면 이 값 사용)
+ESRGAN_TILE_PAD = 10            # 타일 경계 여백 (이음새 방지)
+ESRGAN_HALF_PRECISION = True    # FP16 추론 (CUDA에서만, CPU는 항상 FP32)
+ESRGAN_PRE_PAD = 0              # 입력 가장자리 반사 패딩 (가장자리 아티팩트 방지)
+ESRGAN_TILE_AUTO = True         # 첫 프레임으로 타일 크기 벤치마크 후 메모리에 들어가는 가장 빠른 크기 선택
+ESRGAN_TILE_CANDIDATES = [0, 768, 512, 384, 256, 128]  # 자동 선택 후보 (0 = 타일 없음)
+ESRGAN_TILE_BENCH_FRAMES = 2    # 자동 선택 벤치마크 프레임 수
+ESRGAN_MEMORY_FRACTION = 0.8    # 자동 선택 시 사용할 최대 RAM/VRAM 비율 (다른 프로세스 여유분)
+ESRGAN_TILE_CACHE_PATH = str(Path(TEMP_DIR) / "esrgan_tiles.json")  # 해상도/디바이스별 선택 결과 캐시
+ESRGAN_BATCHED_TILES = True     # 연속 프레임의 타일을 배치로 묶어 추론 + 겹침 블렌딩 (False면 프레임별 RealESRGANer.enhance)
+ESRGAN_TILE_BATCH_SIZE = 8      # 한 번의 RRDBNet forward에 쌓을 타일 수 (GPU는 고정 크기로 채움)
+ESRGAN_BATCH_FRAMES = 4         # 타일을 함께 자를 연속 프레임 수 (출력 버퍼 메모리와 트레이드오프)
 
 # CodeFormer (Stage 2: 얼굴 품질 향상)
 CODEFORMER_MODEL_PATH = str(Path(MODELS_DIR) / "codeformer.pth")
@@ -21,6 +21,7 @@ from watermark_remover import WatermarkRemover
 from utils.logger import logger
 from utils.gpu_utils import get_gpu_display_text
 from utils.security_utils import validate_file_path, validate_directory_path
+from utils.box_utils import parse_boxes
 import config
 
 
@@ -104,6 +105,9 @@ class WatermarkRemovalGUI:
         self.output_folder = tk.StringVar(value="output")
         self.input_mode = tk.StringVar(value="single")  # "single" 또는 "batch"
         self.method = tk.StringVar(value="local_gpu")  # Default: Local GPU
+        self.roi_mode = tk.StringVar(value=config.STATIC_ROI_MODE)  # "off", "fixed", "auto"
+        self.roi_boxes = tk.StringVar(value="; ".join(",".join(str(v) for v in box) for box in config.STATIC_ROI_BOXES))
+        self.encoder_profile = tk.StringVar(value=config.VIDEO_PROFILE)  # config.VIDEO_PROFILES 키
         self.is_processing = False
         self.stop_event = threading.Event()  # 처리 중지 플래그
 
@@ -298,6 +302,23 @@ class WatermarkRemovalGUI:
         ttk.Radiobutton(method_frame, text="Local GPU - Video Enhancement (4K+Face) ⭐",
                        variable=self.method, value="enhance").pack(anchor=tk.W, pady=4)
 
+        # 고정 위치 워터마크 (워터마크 제거 전용, 탐지 생략)
+        roi_frame = ttk.Frame(method_frame)
+        roi_frame.pack(anchor=tk.W, fill=tk.X, pady=(4, 0))
+        ttk.Label(roi_frame, text="Watermark position:").pack(side=tk.LEFT, padx=(0, 8))
+        ttk.Radiobutton(roi_frame, text="Detect", variable=self.roi_mode, value="off").pack(side=tk.LEFT)
+        ttk.Radiobutton(roi_frame, text="Auto-learn", variable=self.roi_mode, value="auto").pack(side=tk.LEFT, padx=(8, 0))
+        ttk.Radiobutton(roi_frame, text="Fixed:", variable=self.roi_mode, value="fixed").pack(side=tk.LEFT, padx=(8, 0))
+        ttk.Entry(roi_frame, textvariable=self.roi_boxes, font=("Arial", 10)).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(4, 0))
+
+        # 출력 인코더 프로필 (인코딩 속도 ↔ 파일 크기)
+        profile_frame = ttk.Frame(method_frame)
+        profile_frame.pack(anchor=tk.W, fill=tk.X, pady=(4, 0))
+        ttk.Label(profile_frame, text="Output encoding:").pack(side=tk.LEFT, padx=(0, 8))
+        for i, name in enumerate(config.VIDEO_PROFILES):
+            ttk.Radiobutton(profile_frame, text=name.capitalize(), variable=self.encoder_profile,
+                            value=name).pack(side=tk.LEFT, padx=(8 if i else 0, 0))
+
         # ===== GPU Info Frame =====
         gpu_frame = ttk.Frame(main_frame, padding="8", relief="solid", borderwidth=1)
         gpu_frame.grid(row=5, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(8, 12))
@@ -457,7 +478,10 @@ class WatermarkRemovalGUI:
             "input_folder": self.input_folder.get(),
             "input_mode": self.input_mode.get(),
             "output_folder": self.output_folder.get(),
-            "method": self.method.get()
+            "method": self.method.get(),
+            "roi_mode": self.roi_mode.get(),
+            "roi_boxes": self.roi_boxes.get(),
+            "encoder_profile": self.encoder_profile.get()
         }
         try:
             with open(self.config_file, "w") as f:
@@ -480,6 +504,12 @@ class WatermarkRemovalGUI:
                         self.output_folder.set(config["output_folder"])
                     if config.get("method"):
                         self.method.set(config["method"])
+                    if config.get("roi_mode"):
+                        self.roi_mode.set(config["roi_mode"])
+                    if config.get("roi_boxes"):
+                        self.roi_boxes.set(config["roi_boxes"])
+                    if config.get("encoder_profile"):
+                        self.encoder_profile.set(config["encoder_profile"])
         except Exception as e:
             print(f"Error loading config: {e}")
 
@@ -519,6 +549,15 @@ class WatermarkRemovalGUI:
                 messagebox.showerror("Error", "No video files found in the selected folder")
                 return False
 
+        # 고정 영역 형식 검증 ("x1,y1,x2,y2; ...")
+        if self.roi_mode.get() == "fixed":
+            try:
+                if not parse_boxes(self.roi_boxes.get()):
+                    raise ValueError("no rectangles")
+            except ValueError as e:
+                messagebox.showerror("Error", f"Invalid fixed watermark area (x1,y1,x2,y2; ...): {e}")
+                return False
+
         # Output folder validation (both modes)
         if not self.output_folder.get():
             messagebox.showerror("Error", "Please select an output folder")
@@ -615,6 +654,13 @@ class WatermarkRemovalGUI:
             self.stop_button.config(state="disabled")
             self.process = None
 
+    def _get_static_roi(self):
+        """GUI 고정 영역 설정 → WatermarkRemover static_roi 인자 ("off", "auto" 또는 사각형 리스트)"""
+        mode = self.roi_mode.get()
+        if mode == "fixed":
+            return parse_boxes(self.roi_boxes.get())
+        return mode
+
     def _process_single_file(self, output_folder, method):
         """단일 파일 처리"""
         # 중지 요청 확인
@@ -645,6 +691,7 @@ class WatermarkRemovalGUI:
         self.add_log(f"출력 폴더: {output_folder}", "info")
         self.add_log(f"출력 파일: {output_path}", "info")
         self.add_log(f"처리 방법: {method}", "info")
+        self.add_log(f"인코더 프로필: {self.encoder_profile.get()}", "info")
         self.update_status("Processing started...", "blue")
 
         # 진행률 콜백 함수
@@ -662,7 +709,9 @@ class WatermarkRemovalGUI:
             remover = WatermarkRemover(stop_event=self.stop_event, progress_callback=progress_callback)
 
             # 방법 선택
-            success = remover.remove_watermark(input_file, output_path, force_method=method)
+            success = remover.remove_watermark(input_file, output_path, force_method=method,
+                                               static_roi=self._get_static_roi(),
+                                               encoder_profile=self.encoder_profile.get())
 
             if success:
                 # 파일 크기 확인
@@ -714,6 +763,7 @@ class WatermarkRemovalGUI:
         self.add_log(f"입력 폴더: {input_folder}", "info")
         self.add_log(f"출력 폴더: {output_folder}", "info")
         self.add_log(f"처리 방법: {method}", "info")
+        self.add_log(f"인코더 프로필: {self.encoder_profile.get()}", "info")
         self.update_status("Batch processing started...", "blue")
 
         # GUI handler 추가 - self.GUILogHandler 사용
@@ -737,7 +787,9 @@ class WatermarkRemovalGUI:
                 return
 
             # 배치 처리 실행
-            results = remover.batch_process(input_folder, output_folder, method=method)
+            results = remover.batch_process(input_folder, output_folder, method=method,
+                                            static_roi=self._get_static_roi(),
+                                            encoder_profile=self.encoder_profile.get())
 
             # 배치 처리 후 중지 요청 확인
             if self.stop_event.is_set():
@@ -750,7 +802,7 @@ class WatermarkRemovalGUI:
                 self.add_log(f"\n{'='*80}", "info")
                 self.add_log(f"배치 처리 완료", "success")
                 self.add_log(f"{'='*80}", "info")
-                self.add_log(f"전체: {results['total']}, 성공: {results['success']}, 실패: {results['failed']}", "info")
+                self.add_log(f"전체: {results['total']}, 성공: {results['success']}, 실패: {results['failed']}, 캐시: {results.get('cached', 0)}", "info")
 
                 if results['success'] > 0:
                     success_rate = (results['success'] / results['total'] * 100)
@@ -0,0 +1,34 @@
+"""FFmpeg 인코더 인자 생성 테스트 (ffmpeg 실행 없음)"""
+
+from utils.ffmpeg_toolchain import FFmpegToolchain
+
+
+def _args(encoder, threads, pix_fmt=None, crf=20):
+    return FFmpegToolchain("ffmpeg").video_encoder_args(encoder, "slow", crf, threads, pix_fmt)
+
+
+def test_x265_thread_budget_is_applied_as_pool_size():
+    args = _args("libx265", 16)
+    assert args[args.index("-x265-params") + 1] == "pools=16"
+
+
+def test_x265_auto_threads_keeps_default_pool():
+    assert "-x265-params" not in _args("libx265", 0)
+
+
+def test_x264_uses_threads_option_only():
+    args = _args("libx264", 8)
+    assert args[args.index("-threads") + 1] == "8"
+    assert "-x265-params" not in args
+
+
+def test_lossless_rgb_uses_constant_qp_zero_without_color_conversion():
+    args = _args("libx264rgb", 4, pix_fmt="bgr24", crf=0)
+    assert args[args.index("-qp") + 1] == "0"
+    assert "-crf" not in args
+    assert args[args.index("-pix_fmt") + 1] == "bgr24"
+
+
+def test_rgb_pixel_format_is_not_passed_to_fallback_encoder():
+    assert FFmpegToolchain.pixel_format("libx264", "bgr24") == "yuv420p"
+    assert FFmpegToolchain.pixel_format("libx264", "yuv444p") == "yuv444p"
@@ -0,0 +1,211 @@
+"""onnx_detector 테스트 (NMS / 박스 비교 / letterbox 좌표 복원 / ultralytics 경로와의 동등성)"""
+
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from api_clients import onnx_detector
+from api_clients.onnx_detector import nms, box_iou, compare_detections, OnnxYoloDetector
+import config
+
+
+def test_nms_suppresses_overlapping_lower_score_box():
+    boxes = np.array([
+        [0, 0, 100, 100],
+        [5, 5, 105, 105],      # 첫 박스와 IoU ≈ 0.82
+        [200, 200, 260, 260],  # 겹치지 않음
+    ], dtype=np.float32)
+    scores = np.array([0.6, 0.9, 0.5], dtype=np.float32)
+
+    keep = nms(boxes, scores, iou_threshold=0.5)
+
+    # 점수 내림차순, 겹친 낮은 점수 박스는 제거
+    assert keep.tolist() == [1, 2]
+
+
+def test_nms_keeps_boxes_below_iou_threshold():
+    boxes = np.array([[0, 0, 100, 100], [50, 0, 150, 100]], dtype=np.float32)  # IoU = 1/3
+    scores = np.array([0.9, 0.8], dtype=np.float32)
+
+    assert nms(boxes, scores, iou_threshold=0.5).tolist() == [0, 1]
+    assert nms(boxes, scores, iou_threshold=0.3).tolist() == [0]
+
+
+def test_nms_empty_input():
+    keep = nms(np.empty((0, 4), dtype=np.float32), np.empty((0,), dtype=np.float32), 0.5)
+    assert keep.shape == (0,)
+
+
+def test_nms_is_class_agnostic_unless_offset_by_class():
+    boxes = np.array([[10, 10, 60, 60], [12, 12, 62, 62]], dtype=np.float32)
+    scores = np.array([0.9, 0.8], dtype=np.float32)
+    class_ids = np.array([0, 1])
+
+    # nms 자체는 클래스를 모르므로 다른 클래스라도 겹치면 제거
+    assert nms(boxes, scores, 0.5).tolist() == [0]
+
+    # 탐지기처럼 클래스별 좌표 오프셋을 더하면 클래스별 NMS가 되어 둘 다 유지
+    offsets = class_ids[:, None].astype(np.float32) * (640 * 2)
+    assert nms(boxes + offsets, scores, 0.5).tolist() == [0, 1]
+
+
+def test_box_iou_matrix():
+    a = [(0, 0, 10, 10)]
+    b = [(0, 0, 10, 10), (5, 0, 15, 10), (20, 20, 30, 30)]
+
+    iou = box_iou(a, b)
+
+    assert iou.shape == (1, 3)
+    assert iou[0].tolist() == pytest.approx([1.0, 1 / 3, 0.0])
+
+
+def test_compare_detections_match_and_recall():
+    reference = [
+        [(0, 0, 100, 100), (200, 200, 300, 300)],
+        [(0, 0, 100, 100)],
+        [],
+    ]
+    candidate = [
+        [(2, 2, 102, 102)],                       # 첫 박스만 찾음
+        [(0, 0, 100, 100), (400, 400, 450, 450)],  # 오탐 하나 추가
+        [(10, 10, 20, 20)],                       # 기준 박스 없는 프레임의 오탐
+    ]
+
+    report = compare_detections(reference, candidate, iou_threshold=0.5)
+
+    assert report['reference'] == 3
+    assert report['candidate'] == 4
+    assert report['matched'] == 2
+    assert report['recall'] == pytest.approx(2 / 3)
+    assert report['precision'] == pytest.approx(2 / 4)
+
+
+def test_compare_detections_iou_threshold_and_empty():
+    reference = [[(0, 0, 100, 100)]]
+    candidate = [[(50, 0, 150, 100)]]  # IoU = 1/3
+
+    assert compare_detections(reference, candidate, 0.5)['recall'] == 0.0
+    assert compare_detections(reference, candidate, 0.3)['recall'] == 1.0
+
+    empty = compare_detections([[]], [[]])
+    assert empty['recall'] == 1.0 and empty['precision'] == 1.0 and empty['matched'] == 0
+
+
+class _FakeInput:
+    name = "images"
+
+
+class _FakeSession:
+    """미리 정한 원시 출력 (B, 4 + 클래스 수, N)을 돌려주는 InferenceSession"""
+
+    outputs = None
+
+    def __init__(self, model_path, sess_options=None, providers=None):
+        self.batches = []
+
+    def get_inputs(self):
+        return [_FakeInput()]
+
+    def run(self, output_names, feeds):
+        self.batches.append(feeds["images"].copy())
+        return [self.outputs]
+
+
+class _FakeOrt:
+    InferenceSession = _FakeSession
+
+    class SessionOptions:
+        pass
+
+    class GraphOptimizationLevel:
+        ORT_ENABLE_ALL = 99
+
+
+def _raw_prediction(candidates, count=5):
+    """(cx, cy, w, h, class_id, score) 목록 → 한 프레임의 원시 출력 (4 + 2클래스, count)"""
+    prediction = np.zeros((6, count), dtype=np.float32)
+    for column, (cx, cy, w, h, class_id, score) in enumerate(candidates):
+        prediction[:4, column] = (cx, cy, w, h)
+        prediction[4 + class_id, column] = score
+    return prediction
+
+
+def test_detect_maps_letterbox_output_back_to_original_coordinates(monkeypatch):
+    monkeypatch.setattr(onnx_detector, "ort", _FakeOrt)
+    monkeypatch.setattr(onnx_detector, "HAS_ONNXRUNTIME", True)
+
+    # 1280x720 → scale 0.5, 640x360, 세로 패딩 140 / 480x640 → scale 1, 가로 패딩 80
+    landscape = np.zeros((720, 1280, 3), dtype=np.uint8)
+    portrait = np.zeros((640, 480, 3), dtype=np.uint8)
+    _FakeSession.outputs = np.stack([
+        _raw_prediction([
+            (100, 290, 100, 100, 0, 0.9),  # 원본 (100, 200, 300, 400)
+            (102, 291, 100, 100, 0, 0.8),  # 같은 클래스 중복 → NMS로 제거
+            (100, 290, 96, 96, 1, 0.7),    # 다른 클래스 → 클래스별 NMS라 유지
+            (400, 300, 50, 50, 0, 0.1),    # 신뢰도 미달
+            (630, 480, 40, 40, 0, 0.6),    # 원본 경계를 넘는 박스 → 잘림
+        ]),
+        _raw_prediction([
+            (140, 120, 100, 200, 1, 0.95),  # 원본 (10, 20, 110, 220)
+        ]),
+    ])
+
+    detector = OnnxYoloDetector("fake.onnx", backend="onnx", imgsz=640, num_threads=1)
+    boxes = detector.detect([landscape, portrait], conf=0.3, iou=0.45)
+
+    # NMS 후 점수 내림차순
+    assert boxes[0] == [(100, 200, 300, 400), (104, 204, 296, 396), (1220, 640, 1280, 720)]
+    assert boxes[1] == [(10, 20, 110, 220)]
+
+    # 입력 배치: NCHW, 패딩 영역은 letterbox 색
+    batch = detector.session.batches[0]
+    assert batch.shape == (2, 3, 640, 640)
+    assert batch[0, :, 0, 0] == pytest.approx([114 / 255.0] * 3)
+    assert batch[0, :, 320, 320] == pytest.approx([0.0] * 3)
+    assert batch[1, :, 320, 40] == pytest.approx([114 / 255.0] * 3)
+
+
+def test_detect_returns_empty_list_when_nothing_passes_threshold(monkeypatch):
+    monkeypatch.setattr(onnx_detector, "ort", _FakeOrt)
+    monkeypatch.setattr(onnx_detector, "HAS_ONNXRUNTIME", True)
+    _FakeSession.outputs = _raw_prediction([(100, 100, 20, 20, 0, 0.2)])[None]
+
+    detector = OnnxYoloDetector("fake.onnx", imgsz=640, num_threads=1)
+
+    assert detector.detect([np.zeros((640, 640, 3), dtype=np.uint8)], conf=0.3) == [[]]
+
+
+def _synthetic_frames(count=4):
+    """워터마크 형태의 반투명 텍스트를 얹은 프레임"""
+    import cv2
+
+    rng = np.random.default_rng(0)
+    frames = []
+    for i in range(count):
+        frame = cv2.GaussianBlur(rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8), (31, 31), 0)
+        overlay = frame.copy()
+        cv2.putText(overlay, "Sora", (80 + 200 * i, 120 + 100 * i), cv2.FONT_HERSHEY_SIMPLEX, 3, (255, 255, 255), 6)
+        frames.append(cv2.addWeighted(overlay, 0.6, frame, 0.4, 0))
+    return frames
+
+
+@pytest.mark.skipif(not os.path.exists(config.YOLO_MODEL_PATH), reason="best.pt not available")
+def test_onnx_detector_matches_ultralytics():
+    pytest.importorskip("onnxruntime")
+    ultralytics = pytest.importorskip("ultralytics")
+    from api_clients.local_gpu_client import LocalGPUClient
+    from api_clients.onnx_detector import export_detector
+
+    frames = _synthetic_frames()
+    yolo_model = ultralytics.YOLO(config.YOLO_MODEL_PATH)
+    reference = LocalGPUClient._detect_with_ultralytics(None, yolo_model, frames)
+
+    model_path = export_detector(config.YOLO_MODEL_PATH, "onnx", config.DETECTOR_IMGSZ)
+    candidate = OnnxYoloDetector(model_path, backend="onnx", imgsz=config.DETECTOR_IMGSZ).detect(frames)
+
+    report = compare_detections(reference, candidate, iou_threshold=0.5)
+    assert report['recall'] >= config.INT8_MIN_RECALL
+    assert report['precision'] >= config.INT8_MIN_RECALL
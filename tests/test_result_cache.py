@@ -0,0 +1,27 @@
+"""결과 캐시 재사용 테스트"""
+
+import os
+
+from utils.result_cache import ResultCache
+
+
+def test_lookup_copies_result_instead_of_sharing_storage(tmp_path):
+    cached = tmp_path / "first" / "out.mp4"
+    cached.parent.mkdir()
+    cached.write_bytes(b"original result")
+
+    cache = ResultCache(index_path=str(tmp_path / "index.json"))
+    cache.store("key", str(cached))
+
+    reused = tmp_path / "second" / "out.mp4"
+    reused.parent.mkdir()
+    reused.write_bytes(b"stale")
+    assert cache.lookup("key", str(reused))
+    assert reused.read_bytes() == b"original result"
+    assert not os.path.samefile(cached, reused)
+
+    # 재사용한 출력을 제자리에서 덮어써도 원래 작업의 결과는 그대로
+    with open(reused, "wb") as f:
+        f.write(b"overwritten")
+    assert cached.read_bytes() == b"original result"
+    assert not os.path.exists(str(reused).replace(".mp4", ".partial.mp4"))
@@ -0,0 +1,53 @@
+"""BoxTracker 템플릿 매칭 추적 테스트"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from utils.tracking_utils import BoxTracker
+
+
+def _textured_frame(offset_x=0, offset_y=0):
+    """검은 배경 + 체커보드 워터마크 (offset만큼 이동)"""
+    frame = np.zeros((120, 160, 3), dtype=np.uint8)
+    patch = (np.indices((20, 30)).sum(axis=0) % 2 * 255).astype(np.uint8)
+    y, x = 40 + offset_y, 50 + offset_x
+    frame[y:y + 20, x:x + 30] = patch[:, :, None]
+    return frame
+
+
+def test_flat_template_reports_zero_confidence_and_keeps_box():
+    # 단색 워터마크 크롭: TM_CCOEFF_NORMED가 모든 위치에서 1.0을 내는 경우
+    frame = np.full((120, 160, 3), 200, dtype=np.uint8)
+    box = (50, 40, 80, 60)
+    tracker = BoxTracker(search_margin=16)
+    tracker.reset(frame, [box])
+
+    boxes, confidence = tracker.track(frame)
+
+    assert confidence == 0.0
+    assert boxes == [box]
+
+
+def test_flat_search_patch_is_not_a_match():
+    # 키프레임 템플릿은 텍스처가 있지만 다음 프레임이 검은 화면
+    box = (50, 40, 80, 60)
+    tracker = BoxTracker(search_margin=16)
+    tracker.reset(_textured_frame(), [box])
+
+    boxes, confidence = tracker.track(np.zeros((120, 160, 3), dtype=np.uint8))
+
+    assert confidence < 0.5
+    assert boxes == [box]
+
+
+def test_textured_template_follows_motion():
+    box = (50, 40, 80, 60)
+    tracker = BoxTracker(search_margin=16)
+    tracker.reset(_textured_frame(), [box])
+
+    boxes, confidence = tracker.track(_textured_frame(offset_x=5, offset_y=3))
+
+    assert confidence > 0.99
+    assert boxes == [(55, 43, 85, 63)]
@@ -0,0 +1,126 @@
+"""video_utils 프레임 라이터 테스트"""
+
+import os
+import subprocess
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from utils.video_utils import FFmpegFrameWriter, ffmpeg_available, read_first_frames, _find_ffmpeg
+
+
+class _ClosingPipe:
+    """지정한 수만큼 쓰고 나면 닫힌 파이프처럼 동작하는 stdin"""
+
+    def __init__(self, accept):
+        self.accept = accept
+        self.written = 0
+
+    def write(self, data):
+        if self.written >= self.accept:
+            raise BrokenPipeError(32, "Broken pipe")
+        self.written += 1
+
+    def close(self):
+        pass
+
+
+class _FakeProcess:
+    def __init__(self, accept, returncode):
+        self.stdin = _ClosingPipe(accept)
+        self.returncode = returncode
+        self.stderr = None
+
+    def wait(self):
+        return self.returncode
+
+
+def _writer_with(process):
+    writer = FFmpegFrameWriter.__new__(FFmpegFrameWriter)
+    writer.process = process
+    writer.input_closed = False
+    return writer
+
+
+def test_writer_treats_pipe_closed_by_clean_exit_as_end_of_stream():
+    # -shortest: 오디오가 먼저 끝나 ffmpeg가 정상 종료하며 입력 파이프를 닫은 경우
+    writer = _writer_with(_FakeProcess(accept=2, returncode=0))
+    frame = np.zeros((4, 4, 3), dtype=np.uint8)
+
+    for _ in range(5):
+        writer.write(frame)
+
+    assert writer.input_closed
+    assert writer.process.stdin.written == 2
+
+
+def test_writer_raises_when_ffmpeg_fails():
+    writer = _writer_with(_FakeProcess(accept=1, returncode=1))
+    frame = np.zeros((4, 4, 3), dtype=np.uint8)
+
+    writer.write(frame)
+    with pytest.raises(BrokenPipeError):
+        writer.write(frame)
+
+
+@pytest.mark.skipif(not ffmpeg_available(), reason="ffmpeg not available")
+def test_writer_with_audio_shorter_than_video(tmp_path):
+    # 3초 비디오 + 0.5초 오디오 원본
+    source = str(tmp_path / "short_audio.mp4")
+    subprocess.run([
+        _find_ffmpeg(), '-v', 'error', '-y',
+        '-f', 'lavfi', '-i', 'color=c=black:s=320x240:r=25:d=3',
+        '-f', 'lavfi', '-i', 'sine=frequency=440:duration=0.5',
+        '-c:v', 'mpeg4', '-c:a', 'aac', source,
+    ], check=True, capture_output=True)
+
+    output = str(tmp_path / "out.mp4")
+    writer = FFmpegFrameWriter(output, 320, 240, 25, audio_source=source, profile="fast")
+    frame = np.full((240, 320, 3), 128, dtype=np.uint8)
+    for _ in range(75):
+        writer.write(frame)
+    writer.close()
+
+    assert os.path.getsize(output) > 0
+
+
+@pytest.mark.skipif(not ffmpeg_available(), reason="ffmpeg not available")
+def test_read_first_frames_stops_after_count(tmp_path):
+    source = str(tmp_path / "clip.mp4")
+    subprocess.run([
+        _find_ffmpeg(), '-v', 'error', '-y',
+        '-f', 'lavfi', '-i', 'testsrc=s=64x48:r=10:d=2', '-c:v', 'mpeg4', source,
+    ], check=True, capture_output=True)
+
+    frames = read_first_frames(source, 64, 48, 3)
+
+    assert len(frames) == 3
+    assert all(frame.shape == (48, 64, 3) for frame in frames)
+    assert len(read_first_frames(source, 64, 48, 100)) == 20
+
+
+@pytest.mark.skipif(not ffmpeg_available(), reason="ffmpeg not available")
+def test_lossless_profile_round_trip_is_bit_exact(tmp_path):
+    from utils.ffmpeg_toolchain import get_toolchain
+    from utils.video_utils import FFmpegFrameReader
+
+    if not get_toolchain().has_encoder("libx264rgb"):
+        pytest.skip("libx264rgb not available")
+
+    output = str(tmp_path / "lossless.mp4")
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, (48, 64, 3), dtype=np.uint8) for _ in range(5)]
+
+    writer = FFmpegFrameWriter(output, 64, 48, 10, profile="lossless")
+    for frame in frames:
+        writer.write(frame)
+    writer.close()
+
+    reader = FFmpegFrameReader(output, 64, 48)
+    try:
+        decoded = [reader.read() for _ in frames]
+    finally:
+        reader.close()
+    for original, frame in zip(frames, decoded):
+        assert np.array_equal(original, frame)
@@ -0,0 +1,185 @@
+"""
+바운딩 박스 유틸리티 함수들
+박스 좌표는 모두 (x1, y1, x2, y2) 정수 튜플 (x2, y2는 미포함 경계)
+"""
+
+import math
+
+
+def pad_box(box, padding, width, height):
+    """
+    박스에 여백 추가 (프레임 경계로 제한)
+
+    Args:
+        box: (x1, y1, x2, y2)
+        padding: 여백 (픽셀)
+        width: 프레임 너비
+        height: 프레임 높이
+
+    Returns:
+        tuple: 여백이 추가된 박스
+    """
+    x1, y1, x2, y2 = box
+    return (max(0, x1 - padding), max(0, y1 - padding),
+            min(width, x2 + padding), min(height, y2 + padding))
+
+
+def scale_box(box, scale, padding, width, height):
+    """
+    축소 해상도 박스를 원본 좌표로 복원 (바깥쪽 반올림 + 안전 여백)
+
+    Args:
+        box: (x1, y1, x2, y2) 축소 프레임 좌표
+        scale: 원본 → 축소 배율 (0-1)
+        padding: 원본 좌표 기준 추가 여백 (픽셀)
+        width: 원본 프레임 너비
+        height: 원본 프레임 높이
+
+    Returns:
+        tuple: 원본 프레임 좌표 박스
+    """
+    x1, y1, x2, y2 = box
+    restored = (int(math.floor(x1 / scale)), int(math.floor(y1 / scale)),
+                int(math.ceil(x2 / scale)), int(math.ceil(y2 / scale)))
+    return pad_box(restored, padding, width, height)
+
+
+def boxes_overlap(a, b):
+    """두 박스가 겹치거나 맞닿아 있는지 확인"""
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def merge_boxes(boxes):
+    """
+    겹치는 박스들을 하나의 외접 박스로 병합 (더 이상 겹치지 않을 때까지 반복)
+
+    Args:
+        boxes: 박스 리스트
+
+    Returns:
+        list: 서로 겹치지 않는 박스 리스트
+    """
+    merged = [tuple(box) for box in boxes]
+    changed = True
+    while changed:
+        changed = False
+        result = []
+        for box in merged:
+            for i, other in enumerate(result):
+                if boxes_overlap(box, other):
+                    result[i] = (min(box[0], other[0]), min(box[1], other[1]),
+                                 max(box[2], other[2]), max(box[3], other[3]))
+                    changed = True
+                    break
+            else:
+                result.append(box)
+        merged = result
+    return merged
+
+
+def intersect_box(box, region):
+    """
+    박스를 영역과 교차시키고 영역 기준 좌표로 변환
+
+    Args:
+        box: (x1, y1, x2, y2) 프레임 좌표
+        region: (x1, y1, x2, y2) 프레임 좌표
+
+    Returns:
+        tuple or None: 영역 기준 좌표의 교차 박스 (교차 없으면 None)
+    """
+    x1, y1 = max(box[0], region[0]), max(box[1], region[1])
+    x2, y2 = min(box[2], region[2]), min(box[3], region[3])
+    if x2 <= x1 or y2 <= y1:
+        return None
+    return (x1 - region[0], y1 - region[1], x2 - region[0], y2 - region[1])
+
+
+def box_area(box):
+    """박스 넓이"""
+    return max(0, box[2] - box[0]) * max(0, box[3] - box[1])
+
+
+def parse_boxes(text):
+    """
+    사각형 목록 문자열 파싱 ("x1,y1,x2,y2; x1,y1,x2,y2")
+
+    Args:
+        text: 세미콜론으로 구분한 사각형 목록 (값이 모두 1 이하면 프레임 크기 대비 비율)
+
+    Returns:
+        list: [(x1, y1, x2, y2), ...]
+
+    Raises:
+        ValueError: 형식이 잘못되었거나 x2 <= x1, y2 <= y1인 경우
+    """
+    boxes = []
+    for part in text.split(';'):
+        part = part.strip()
+        if not part:
+            continue
+        values = [float(v) for v in part.split(',')]
+        if len(values) != 4:
+            raise ValueError(f"Expected x1,y1,x2,y2: {part}")
+        if values[2] <= values[0] or values[3] <= values[1]:
+            raise ValueError(f"Empty rectangle: {part}")
+        boxes.append(tuple(int(v) if v.is_integer() and v > 1 else v for v in values))
+    return boxes
+
+
+def to_pixel_box(box, width, height):
+    """
+    고정 영역을 프레임 픽셀 좌표로 변환 (값이 모두 1 이하면 비율로 해석, 프레임 경계로 제한)
+
+    Args:
+        box: (x1, y1, x2, y2) 픽셀 또는 0-1 비율
+        width: 프레임 너비
+        height: 프레임 높이
+
+    Returns:
+        tuple or None: 픽셀 박스 (프레임 밖이면 None)
+    """
+    x1, y1, x2, y2 = box
+    if max(x1, y1, x2, y2) <= 1.0:
+        x1, x2 = x1 * width, x2 * width
+        y1, y2 = y1 * height, y2 * height
+
+    x1, y1 = max(0, int(math.floor(x1))), max(0, int(math.floor(y1)))
+    x2, y2 = min(width, int(math.ceil(x2))), min(height, int(math.ceil(y2)))
+    if x2 <= x1 or y2 <= y1:
+        return None
+    return (x1, y1, x2, y2)
+
+
+def learn_static_boxes(boxes_per_frame, min_coverage, max_spread=2.0):
+    """
+    여러 프레임의 탐지 결과에서 고정 위치 워터마크 영역 학습
+
+    겹치는 박스를 묶은 뒤 min_coverage 비율 이상의 프레임에 나타난 묶음만 채택하며,
+    묶음 외접 박스가 개별 박스 평균 넓이의 max_spread배를 넘으면 움직이는 워터마크로 판단
+
+    Args:
+        boxes_per_frame: 프레임별 박스 리스트
+        min_coverage: 채택 최소 프레임 비율 (0-1)
+        max_spread: 외접 박스 / 평균 박스 넓이 최대 비율
+
+    Returns:
+        list or None: 고정 영역 리스트 (고정 위치가 아니면 None, 탐지된 것이 없으면 빈 리스트)
+    """
+    frame_count = len(boxes_per_frame)
+    all_boxes = [box for boxes in boxes_per_frame for box in boxes]
+    if not frame_count or not all_boxes:
+        return []
+
+    learned = []
+    for cluster in merge_boxes(all_boxes):
+        members = [(i, box) for i, boxes in enumerate(boxes_per_frame)
+                   for box in boxes if boxes_overlap(box, cluster)]
+        if len({i for i, _ in members}) < min_coverage * frame_count:
+            continue
+
+        mean_area = sum(box_area(box) for _, box in members) / len(members)
+        if box_area(cluster) > max_spread * mean_area:
+            return None
+        learned.append(cluster)
+    return learned
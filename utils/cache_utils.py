@@ -0,0 +1,60 @@
+"""
+캐시 키 유틸리티 함수들
+대용량 비디오를 전부 읽지 않고 샘플 청크로 빠르게 내용 해시 계산
+"""
+
+import os
+import json
+import hashlib
+
+# 샘플 청크 크기와 개수 (파일 앞/뒤 + 균등 간격)
+HASH_CHUNK_SIZE = 256 * 1024
+HASH_SAMPLE_COUNT = 16
+
+
+def fast_content_hash(path, include_mtime=False):
+    """
+    샘플 청크 기반 빠른 파일 해시
+
+    파일 크기와 고르게 떨어진 HASH_SAMPLE_COUNT개 청크(처음/끝 포함)만 읽어 해시하므로
+    수 GB 비디오도 수 MB만 읽음
+
+    Args:
+        path: 파일 경로
+        include_mtime: 수정 시각도 키에 포함할지 여부
+
+    Returns:
+        str: 16진수 해시 문자열
+    """
+    stat = os.stat(path)
+    size = stat.st_size
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(size).encode())
+    if include_mtime:
+        digest.update(str(stat.st_mtime_ns).encode())
+
+    with open(path, 'rb') as f:
+        if size <= HASH_CHUNK_SIZE * HASH_SAMPLE_COUNT:
+            digest.update(f.read())
+        else:
+            last_offset = size - HASH_CHUNK_SIZE
+            for i in range(HASH_SAMPLE_COUNT):
+                f.seek(last_offset * i // (HASH_SAMPLE_COUNT - 1))
+                digest.update(f.read(HASH_CHUNK_SIZE))
+
+    return digest.hexdigest()
+
+
+def config_hash(values):
+    """
+    설정 값 딕셔너리 해시 (키 순서와 무관)
+
+    Args:
+        values: JSON 직렬화 가능한 설정 값 딕셔너리
+
+    Returns:
+        str: 16진수 해시 문자열
+    """
+    payload = json.dumps(values, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=8).hexdigest()
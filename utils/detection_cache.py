@@ -0,0 +1,66 @@
+"""
+프레임별 워터마크 박스 트랙 사이드카 (.npz)
+입력 내용 해시 + 탐지 설정으로 키를 만들어, 같은 입력을 다시 처리할 때 탐지를 건너뜀
+"""
+
+import os
+import json
+import numpy as np
+from utils.logger import logger
+
+
+def save_detection_track(path, boxes_per_frame, metadata=None):
+    """
+    박스 트랙 저장
+
+    프레임별 박스 수가 다르므로 평탄화한 박스 배열 + 프레임 오프셋 배열로 저장
+    (frame i의 박스 = boxes[offsets[i]:offsets[i + 1]])
+
+    Args:
+        path: 저장할 .npz 경로
+        boxes_per_frame: 프레임별 박스 리스트 [(x1, y1, x2, y2), ...]
+        metadata: 함께 저장할 설정 정보 딕셔너리
+    """
+    counts = np.fromiter((len(boxes) for boxes in boxes_per_frame), dtype=np.int64, count=len(boxes_per_frame))
+    offsets = np.zeros(len(boxes_per_frame) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+
+    boxes = np.zeros((int(offsets[-1]), 4), dtype=np.int32)
+    for i, frame_boxes in enumerate(boxes_per_frame):
+        if frame_boxes:
+            boxes[offsets[i]:offsets[i + 1]] = frame_boxes
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp.npz"
+    np.savez_compressed(temp_path, offsets=offsets, boxes=boxes,
+                        metadata=np.array(json.dumps(metadata or {})))
+    # 중단되어도 불완전한 사이드카가 남지 않도록 원자적 교체
+    os.replace(temp_path, path)
+    logger.info(f"Detection track saved: {path} ({len(boxes_per_frame)} frames, {len(boxes)} boxes)")
+
+
+def load_detection_track(path):
+    """
+    박스 트랙 로드
+
+    Args:
+        path: .npz 경로
+
+    Returns:
+        list or None: 프레임별 박스 리스트 (없거나 손상되었으면 None)
+    """
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with np.load(path) as data:
+            offsets = data['offsets']
+            boxes = data['boxes']
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable detection track {path}: {str(e)}")
+        return None
+
+    return [
+        [tuple(int(v) for v in box) for box in boxes[offsets[i]:offsets[i + 1]]]
+        for i in range(len(offsets) - 1)
+    ]
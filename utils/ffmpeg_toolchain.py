@@ -0,0 +1,361 @@
+"""
+FFmpeg 툴체인 탐색 및 기능 조회
+ffmpeg/ffprobe 경로를 프로세스당 한 번만 찾고, 사용 가능한 인코더/디코더/하드웨어 가속 목록을 캐시
+(호출마다 'where ffmpeg' 같은 서브프로세스를 띄우지 않음)
+"""
+
+import os
+import shutil
+import threading
+import subprocess
+from utils.logger import logger
+import config
+
+# 프로젝트에 포함된 ffmpeg 폴더 (download_ffmpeg.py 설치 위치)
+BUNDLED_DIR = os.path.join(str(config.PROJECT_ROOT), 'ffmpeg')
+
+# Windows 일반 설치 위치 (PATH에 없을 때)
+_WINDOWS_INSTALL_DIRS = (
+    'C:\\ffmpeg\\bin',
+    'C:\\Program Files\\ffmpeg\\bin',
+    'C:\\Program Files (x86)\\ffmpeg\\bin',
+)
+
+# 소프트웨어 코덱별 하드웨어 인코더 후보 (우선순위 순)
+_HW_ENCODERS = {
+    'libx264': ('h264_nvenc', 'h264_qsv', 'h264_amf'),
+    'libx265': ('hevc_nvenc', 'hevc_qsv', 'hevc_amf'),
+}
+
+# 요청 코덱을 쓸 수 없을 때 대체 순서
+_SOFTWARE_FALLBACKS = {
+    'libx265': ('libx264', 'mpeg4'),
+    'libx264': ('mpeg4',),
+    'libx264rgb': ('libx264', 'mpeg4'),
+}
+
+# libx264rgb 입력 포맷 (파이프 입력 bgr24를 그대로 쓰면 색 변환 없음)
+_RGB_PIXEL_FORMATS = ('bgr24', 'rgb24', 'bgr0')
+
+# x264 프리셋 → NVENC 프리셋 (p1 = 가장 빠름 ~ p7 = 가장 느림)
+_NVENC_PRESETS = {
+    'ultrafast': 'p1', 'superfast': 'p1', 'veryfast': 'p2', 'faster': 'p3', 'fast': 'p3',
+    'medium': 'p4', 'slow': 'p5', 'slower': 'p6', 'veryslow': 'p7', 'placebo': 'p7',
+}
+
+# QSV 프리셋은 veryfast ~ veryslow만 지원
+_QSV_PRESETS = {'ultrafast': 'veryfast', 'superfast': 'veryfast', 'placebo': 'veryslow'}
+
+# x264 프리셋 → AMF 품질 모드
+_AMF_QUALITY = {
+    'ultrafast': 'speed', 'superfast': 'speed', 'veryfast': 'speed', 'faster': 'speed',
+    'fast': 'balanced', 'medium': 'balanced',
+    'slow': 'quality', 'slower': 'quality', 'veryslow': 'quality', 'placebo': 'quality',
+}
+
+
+def _executable_names(name):
+    """플랫폼별 실행 파일 이름 후보"""
+    return (f'{name}.exe', name) if os.name == 'nt' else (name, f'{name}.exe')
+
+
+def _find_in_dirs(name, dirs):
+    """디렉토리 목록에서 실행 파일 찾기"""
+    for directory in dirs:
+        if not directory:
+            continue
+        for filename in _executable_names(name):
+            candidate = os.path.join(directory, filename)
+            if os.path.isfile(candidate):
+                return candidate
+    return None
+
+
+def _resolve_ffmpeg():
+    """ffmpeg 경로 탐색 (config → 포함된 ffmpeg 폴더 → PATH → 일반 설치 위치)"""
+    if config.FFMPEG_PATH:
+        if os.path.isfile(config.FFMPEG_PATH):
+            return config.FFMPEG_PATH
+        logger.warning(f"config.FFMPEG_PATH not found: {config.FFMPEG_PATH}, searching elsewhere")
+
+    bundled = _find_in_dirs('ffmpeg', (BUNDLED_DIR, os.path.join(BUNDLED_DIR, 'bin')))
+    if bundled:
+        return bundled
+
+    found = shutil.which('ffmpeg')
+    if found:
+        return found
+
+    if os.name == 'nt':
+        return _find_in_dirs('ffmpeg', _WINDOWS_INSTALL_DIRS)
+    return None
+
+
+def _resolve_ffprobe(ffmpeg_path):
+    """ffprobe 경로 탐색 (config → ffmpeg와 같은 폴더 → PATH)"""
+    if config.FFPROBE_PATH:
+        if os.path.isfile(config.FFPROBE_PATH):
+            return config.FFPROBE_PATH
+        logger.warning(f"config.FFPROBE_PATH not found: {config.FFPROBE_PATH}, searching elsewhere")
+
+    if ffmpeg_path:
+        found = _find_in_dirs('ffprobe', (os.path.dirname(ffmpeg_path),))
+        if found:
+            return found
+
+    return shutil.which('ffprobe')
+
+
+def _parse_codec_list(output):
+    """
+    'ffmpeg -encoders' / '-decoders' 출력 파싱
+
+    각 줄 형식: ' V..... libx264   설명'
+    (1열: V/A/S 종류, 2열: F = 프레임 단위 멀티스레드, 3열: S = 슬라이스 단위 멀티스레드)
+
+    Returns:
+        dict: 코덱 이름 → {'type': 'video'/'audio'/'subtitle', 'frame_threads': bool, 'slice_threads': bool}
+    """
+    codecs = {}
+    in_list = False
+    for line in output.splitlines():
+        stripped = line.strip()
+        if not in_list:
+            # 범례 뒤 '------' 줄부터 목록
+            in_list = stripped.startswith('---')
+            continue
+        parts = stripped.split(None, 2)
+        if len(parts) < 2 or len(parts[0]) < 3:
+            continue
+        flags, name = parts[0], parts[1]
+        codecs[name] = {
+            'type': {'V': 'video', 'A': 'audio', 'S': 'subtitle'}.get(flags[0], 'other'),
+            'frame_threads': flags[1] == 'F',
+            'slice_threads': flags[2] == 'S',
+        }
+    return codecs
+
+
+class FFmpegToolchain:
+    """ffmpeg/ffprobe 경로 + 기능 목록 (조회 결과는 인스턴스에 캐시)"""
+
+    def __init__(self, ffmpeg_path, ffprobe_path=None):
+        """
+        Args:
+            ffmpeg_path: ffmpeg 실행 파일 경로
+            ffprobe_path: ffprobe 실행 파일 경로 (없으면 None)
+        """
+        self.ffmpeg = ffmpeg_path
+        self.ffprobe = ffprobe_path
+        self._lock = threading.Lock()
+        self._encoders = None
+        self._decoders = None
+        self._hwaccels = None
+        self._usable_encoders = {}
+        self._selected_encoders = {}
+
+    def _run(self, *args, timeout=30):
+        """ffmpeg 실행 후 stdout 반환 (실패 시 빈 문자열)"""
+        try:
+            result = subprocess.run([self.ffmpeg, '-hide_banner', *args], capture_output=True, text=True,
+                                    encoding='utf-8', errors='ignore', timeout=timeout)
+            return result.stdout if result.returncode == 0 else ''
+        except Exception as e:
+            logger.warning(f"ffmpeg capability query failed ({' '.join(args)}): {str(e)}")
+            return ''
+
+    @property
+    def encoders(self):
+        """사용 가능한 인코더 (이름 → 종류/스레드 지원)"""
+        with self._lock:
+            if self._encoders is None:
+                self._encoders = _parse_codec_list(self._run('-encoders'))
+            return self._encoders
+
+    @property
+    def decoders(self):
+        """사용 가능한 디코더 (이름 → 종류/스레드 지원)"""
+        with self._lock:
+            if self._decoders is None:
+                self._decoders = _parse_codec_list(self._run('-decoders'))
+            return self._decoders
+
+    @property
+    def hwaccels(self):
+        """빌드에 포함된 하드웨어 가속 방식 (예: ['cuda', 'qsv', 'd3d11va'])"""
+        with self._lock:
+            if self._hwaccels is None:
+                lines = self._run('-hwaccels').splitlines()
+                # 첫 줄은 'Hardware acceleration methods:' 제목
+                self._hwaccels = [line.strip() for line in lines[1:] if line.strip()]
+            return self._hwaccels
+
+    def has_encoder(self, name):
+        """인코더 포함 여부"""
+        return name in self.encoders
+
+    def has_decoder(self, name):
+        """디코더 포함 여부"""
+        return name in self.decoders
+
+    def encoder_threading(self, name):
+        """
+        인코더 멀티스레드 방식
+
+        Returns:
+            str or None: "frame", "slice" 또는 None (단일 스레드/알 수 없음)
+        """
+        info = self.encoders.get(name)
+        if not info:
+            return None
+        if info['frame_threads']:
+            return 'frame'
+        if info['slice_threads']:
+            return 'slice'
+        return None
+
+    def encoder_usable(self, name):
+        """
+        인코더를 실제로 쓸 수 있는지 확인 (결과 캐시)
+
+        하드웨어 인코더는 빌드에 포함되어 있어도 GPU/드라이버가 없으면 실패하므로
+        짧은 테스트 인코딩으로 확인
+        """
+        with self._lock:
+            if name in self._usable_encoders:
+                return self._usable_encoders[name]
+
+        usable = self.has_encoder(name)
+        if usable and name.endswith(('_nvenc', '_qsv', '_amf')):
+            try:
+                result = subprocess.run(
+                    [self.ffmpeg, '-hide_banner', '-v', 'error',
+                     '-f', 'lavfi', '-i', 'color=c=black:s=256x256:d=0.1',
+                     '-c:v', name, '-pix_fmt', self.pixel_format(name), '-f', 'null', '-'],
+                    capture_output=True, timeout=30)
+                usable = result.returncode == 0
+            except Exception:
+                usable = False
+
+        with self._lock:
+            self._usable_encoders[name] = usable
+        return usable
+
+    def select_video_encoder(self, codec, allow_hardware=None):
+        """
+        요청 코덱에 대해 가장 빠른 사용 가능 인코더 선택 (결과 캐시)
+
+        Args:
+            codec: 요청 소프트웨어 코덱 ("libx264", "libx265" 또는 "libx264rgb")
+            allow_hardware: 하드웨어 인코더 허용 여부 (None이면 config.VIDEO_HW_ENCODER)
+
+        Returns:
+            str: 실제 사용할 인코더 이름
+        """
+        allow_hardware = config.VIDEO_HW_ENCODER if allow_hardware is None else allow_hardware
+        cache_key = (codec, bool(allow_hardware))
+        with self._lock:
+            if cache_key in self._selected_encoders:
+                return self._selected_encoders[cache_key]
+
+        candidates = list(_HW_ENCODERS.get(codec, ())) if allow_hardware else []
+        candidates += [codec, *_SOFTWARE_FALLBACKS.get(codec, ())]
+
+        # 목록 조회 자체가 실패한 경우(빈 목록)에는 요청 코덱을 그대로 사용
+        selected = codec
+        if self.encoders:
+            selected = next((name for name in candidates if self.encoder_usable(name)), codec)
+            if selected != codec:
+                logger.info(f"Video encoder: {codec} requested, using {selected}")
+
+        with self._lock:
+            self._selected_encoders[cache_key] = selected
+        return selected
+
+    @staticmethod
+    def pixel_format(encoder, requested=None):
+        """
+        인코더 입력 픽셀 포맷
+
+        Args:
+            encoder: 인코더 이름
+            requested: 원하는 포맷 (x264/x265/x264rgb만 반영, 그 외는 인코더가 지원하는 4:2:0)
+        """
+        if encoder.endswith('_qsv'):
+            return 'nv12'
+        if encoder == 'libx264rgb':
+            return requested if requested in _RGB_PIXEL_FORMATS else 'bgr24'
+        # RGB 포맷은 libx264rgb 전용 (대체 인코더로 바뀐 경우 4:2:0)
+        if requested and encoder in ('libx264', 'libx265') and requested not in _RGB_PIXEL_FORMATS:
+            return requested
+        return 'yuv420p'
+
+    def video_encoder_args(self, encoder, preset, crf, threads, pix_fmt=None):
+        """
+        인코더별 품질/속도 인자 생성 (x264 기준 preset/crf를 각 인코더 옵션으로 변환)
+
+        Args:
+            encoder: select_video_encoder 결과
+            preset: x264 프리셋 이름
+            crf: x264 기준 품질 값
+            threads: 인코딩 스레드 수 (0 = 자동)
+            pix_fmt: 원하는 출력 픽셀 포맷 (None이면 yuv420p)
+
+        Returns:
+            list: ffmpeg 출력 인자 ('-c:v'부터 '-pix_fmt'까지)
+        """
+        args = ['-c:v', encoder]
+        if encoder.endswith('_nvenc'):
+            args += ['-preset', _NVENC_PRESETS.get(preset, 'p4'), '-rc', 'vbr', '-cq', str(crf), '-b:v', '0']
+        elif encoder.endswith('_qsv'):
+            args += ['-preset', _QSV_PRESETS.get(preset, preset), '-global_quality', str(crf)]
+        elif encoder.endswith('_amf'):
+            args += ['-quality', _AMF_QUALITY.get(preset, 'balanced'), '-rc', 'cqp',
+                     '-qp_i', str(crf), '-qp_p', str(crf)]
+        elif encoder in ('libx264', 'libx264rgb', 'libx265'):
+            args += ['-preset', preset]
+            # x264 crf 0은 고정 양자화 0(-qp 0)이 확실한 무손실 모드
+            if crf == 0 and encoder != 'libx265':
+                args += ['-qp', '0']
+            else:
+                args += ['-crf', str(crf)]
+            # libx265는 -threads를 무시하고 자체 스레드 풀 크기를 정하므로 pools로 제한
+            if encoder == 'libx265' and threads:
+                args += ['-x265-params', f'pools={int(threads)}']
+        else:
+            # mpeg4 등 CRF/프리셋 미지원 인코더는 고정 양자화 품질
+            args += ['-q:v', '2']
+
+        # 하드웨어 인코더는 CPU 스레드 설정이 의미 없음
+        if not encoder.endswith(('_nvenc', '_qsv', '_amf')):
+            args += ['-threads', str(threads)]
+        args += ['-pix_fmt', self.pixel_format(encoder, pix_fmt)]
+        return args
+
+    def __repr__(self):
+        return f"FFmpegToolchain(ffmpeg={self.ffmpeg!r}, ffprobe={self.ffprobe!r})"
+
+
+_toolchain = None
+_toolchain_resolved = False
+_toolchain_lock = threading.Lock()
+
+
+def get_toolchain():
+    """
+    프로세스 전역 툴체인 (첫 호출에서 한 번만 경로 탐색)
+
+    Returns:
+        FFmpegToolchain or None: ffmpeg를 찾지 못하면 None
+    """
+    global _toolchain, _toolchain_resolved
+    with _toolchain_lock:
+        if not _toolchain_resolved:
+            ffmpeg_path = _resolve_ffmpeg()
+            if ffmpeg_path:
+                _toolchain = FFmpegToolchain(ffmpeg_path, _resolve_ffprobe(ffmpeg_path))
+                logger.info(f"FFmpeg toolchain: {_toolchain.ffmpeg} (ffprobe: {_toolchain.ffprobe or 'not found'})")
+            else:
+                logger.warning("ffmpeg not found (config.FFMPEG_PATH, 'ffmpeg' folder, PATH)")
+            _toolchain_resolved = True
+        return _toolchain
@@ -0,0 +1,200 @@
+"""
+3단계 스레드 프레임 파이프라인
+디코딩(리더 스레드) → 처리(호출 스레드) → 인코딩(라이터 스레드)
+OpenCV/FFmpeg 디코딩·인코딩은 GIL을 해제하므로 모델 추론과 겹쳐서 실행됨
+"""
+
+import queue
+import threading
+import time
+from utils.logger import logger
+import config
+
+# 스트림 종료 표시
+_END = object()
+
+
+class PipelineAborted(Exception):
+    """다른 스테이지 오류/중지로 파이프라인이 중단됨"""
+    pass
+
+
+class FramePipeline:
+    """순서를 보장하는 bounded queue 기반 프레임 파이프라인"""
+
+    # 큐 대기 시 중지 요청 확인 주기 (초)
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, stop_event=None, batch_size=1, queue_size=None, name="pipeline"):
+        """
+        Args:
+            stop_event: threading.Event 객체로 처리 중단을 신호하는 데 사용
+            batch_size: 처리 스테이지에 한 번에 전달할 프레임 수
+            queue_size: 스테이지 사이 큐 크기 (None이면 config.PIPELINE_QUEUE_SIZE)
+            name: 로그에 표시할 파이프라인 이름
+        """
+        self.stop_event = stop_event
+        self.batch_size = max(1, int(batch_size))
+        self.queue_size = max(1, int(queue_size or config.PIPELINE_QUEUE_SIZE))
+        self.name = name
+
+        self._abort = threading.Event()
+        self._errors = []
+        self.stats = {}
+
+    def max_frames_in_flight(self):
+        """
+        동시에 살아 있을 수 있는 최대 입력 프레임 수
+        (두 큐 + 처리 중 배치 + 리더/라이터가 잡고 있는 프레임, 순환 버퍼 크기 산정용)
+        """
+        return 2 * self.queue_size + self.batch_size + 3
+
+    def _should_stop(self):
+        return self._abort.is_set() or (self.stop_event is not None and self.stop_event.is_set())
+
+    def _put(self, q, item, stat_key):
+        """큐에 넣기 (가득 차면 대기 시간을 backpressure로 기록)"""
+        start = time.perf_counter()
+        while True:
+            if self._should_stop():
+                raise PipelineAborted()
+            try:
+                q.put(item, timeout=self.POLL_INTERVAL)
+                break
+            except queue.Full:
+                continue
+        self.stats[stat_key] += time.perf_counter() - start
+
+    def _get(self, q, stat_key):
+        """큐에서 꺼내기 (비어 있으면 대기 시간을 starvation으로 기록)"""
+        start = time.perf_counter()
+        while True:
+            if self._should_stop():
+                raise PipelineAborted()
+            try:
+                item = q.get(timeout=self.POLL_INTERVAL)
+                break
+            except queue.Empty:
+                continue
+        self.stats[stat_key] += time.perf_counter() - start
+        return item
+
+    def _fail(self, error):
+        self._errors.append(error)
+        self._abort.set()
+
+    def _reader_loop(self, read_frame, input_queue):
+        try:
+            while True:
+                frame = read_frame()
+                if frame is None:
+                    break
+                self.stats['read'] += 1
+                self._put(input_queue, frame, 'reader_blocked')
+            self._put(input_queue, _END, 'reader_blocked')
+        except PipelineAborted:
+            pass
+        except Exception as e:
+            self._fail(e)
+
+    def _writer_loop(self, write_frame, output_queue, on_frame_written):
+        try:
+            while True:
+                frame = self._get(output_queue, 'writer_starved')
+                if frame is _END:
+                    break
+                write_frame(frame)
+                self.stats['written'] += 1
+                if on_frame_written:
+                    on_frame_written(self.stats['written'])
+        except PipelineAborted:
+            pass
+        except Exception as e:
+            self._fail(e)
+
+    def run(self, read_frame, process_batch, write_frame, on_frame_written=None):
+        """
+        파이프라인 실행 (처리 스테이지는 호출 스레드에서 실행)
+
+        Args:
+            read_frame: () -> frame 또는 None (스트림 끝)
+            process_batch: (frames) -> processed_frames (입력과 같은 순서, 같은 개수)
+            write_frame: (frame) -> None
+            on_frame_written: (frames_written) -> None 진행률 콜백 (라이터 스레드에서 호출)
+
+        Returns:
+            bool: 완료 여부 (중지 요청 시 False)
+
+        Raises:
+            Exception: 리더/처리/라이터 스테이지에서 발생한 첫 번째 오류
+        """
+        self._abort.clear()
+        self._errors = []
+        self.stats = {
+            'read': 0, 'processed': 0, 'written': 0,
+            'reader_blocked': 0.0, 'process_starved': 0.0,
+            'process_blocked': 0.0, 'writer_starved': 0.0,
+        }
+
+        input_queue = queue.Queue(maxsize=self.queue_size)
+        output_queue = queue.Queue(maxsize=self.queue_size)
+
+        reader = threading.Thread(target=self._reader_loop, args=(read_frame, input_queue),
+                                  name=f"{self.name}-reader", daemon=True)
+        writer = threading.Thread(target=self._writer_loop, args=(write_frame, output_queue, on_frame_written),
+                                  name=f"{self.name}-writer", daemon=True)
+
+        start_time = time.perf_counter()
+        reader.start()
+        writer.start()
+
+        try:
+            finished = False
+            while not finished:
+                # 배치 채우기 (스트림 끝이면 남은 프레임만)
+                batch = []
+                while len(batch) < self.batch_size:
+                    frame = self._get(input_queue, 'process_starved')
+                    if frame is _END:
+                        finished = True
+                        break
+                    batch.append(frame)
+
+                if batch:
+                    for processed in process_batch(batch):
+                        self._put(output_queue, processed, 'process_blocked')
+                    self.stats['processed'] += len(batch)
+
+            self._put(output_queue, _END, 'process_blocked')
+        except PipelineAborted:
+            pass
+        except Exception as e:
+            self._fail(e)
+
+        writer.join()
+        # 라이터가 먼저 실패한 경우 리더가 대기 중일 수 있음
+        self._abort.set()
+        reader.join()
+
+        elapsed = time.perf_counter() - start_time
+        self._log_stats(elapsed)
+
+        if self._errors:
+            raise self._errors[0]
+
+        return not (self.stop_event is not None and self.stop_event.is_set())
+
+    def _log_stats(self, elapsed):
+        """스테이지별 대기 시간 (backpressure) 로그"""
+        stats = self.stats
+        fps = stats['written'] / elapsed if elapsed > 0 else 0.0
+        logger.info(
+            f"[{self.name}] frames read/processed/written: "
+            f"{stats['read']}/{stats['processed']}/{stats['written']} in {elapsed:.1f}s ({fps:.2f} fps)"
+        )
+        logger.info(
+            f"[{self.name}] backpressure - reader blocked: {stats['reader_blocked']:.1f}s, "
+            f"process starved: {stats['process_starved']:.1f}s, "
+            f"process blocked: {stats['process_blocked']:.1f}s, "
+            f"writer starved: {stats['writer_starved']:.1f}s"
+        )
@@ -0,0 +1,146 @@
+"""
+배치 처리 결과 캐시
+입력 내용 해시(샘플 청크 + 크기/수정 시각) + 처리 방법 + 관련 설정으로 키를 만들어
+같은 설정으로 이미 성공한 파일은 다시 처리하지 않고 기존 출력을 재사용 (복사)
+"""
+
+import os
+import json
+import shutil
+import threading
+from utils.logger import logger
+from utils.cache_utils import fast_content_hash, config_hash
+from utils.video_utils import partial_output_path, discard_partial_output
+import config
+
+# 처리 방법별로 출력에 영향을 주는 설정 이름 접두사
+_COMMON_CONFIG_PREFIXES = ('VIDEO_', 'USE_FFMPEG_PIPE_IO')
+_METHOD_CONFIG_PREFIXES = {
+    'local_gpu': ('YOLO_', 'DETECT', 'INT8_', 'TRACKING_', 'SCENE_', 'STATIC_ROI_', 'INPAINT_', 'LAMA_', 'TEMPORAL_'),
+    'enhance': ('ESRGAN_', 'CODEFORMER_'),
+}
+
+
+def relevant_config(method):
+    """처리 방법의 출력에 영향을 주는 config 값 딕셔너리"""
+    prefixes = _COMMON_CONFIG_PREFIXES + _METHOD_CONFIG_PREFIXES.get(method, ())
+    return {
+        name: getattr(config, name)
+        for name in dir(config)
+        if name.isupper() and name.startswith(prefixes)
+    }
+
+
+class ResultCache:
+    """JSON 인덱스 기반 결과 캐시 (키 → 출력 파일 경로/크기/수정 시각)"""
+
+    def __init__(self, index_path=None):
+        """
+        Args:
+            index_path: 인덱스 JSON 경로 (None이면 config.RESULT_CACHE_PATH)
+        """
+        self.index_path = index_path or config.RESULT_CACHE_PATH
+        self._lock = threading.Lock()
+        self._entries = {}
+
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable result cache {self.index_path}: {str(e)}")
+
+    def make_key(self, video_path, method, extra=None):
+        """
+        캐시 키 생성
+
+        Args:
+            video_path: 입력 비디오 경로
+            method: 처리 방법 ("local_gpu" 또는 "enhance")
+            extra: config 외에 출력에 영향을 주는 작업별 설정 딕셔너리
+
+        Returns:
+            str or None: 캐시 키 (입력을 읽을 수 없으면 None)
+        """
+        try:
+            content = fast_content_hash(video_path, include_mtime=True)
+        except OSError as e:
+            logger.warning(f"Cannot hash {video_path}: {str(e)}")
+            return None
+        settings = relevant_config(method)
+        settings.update(extra or {})
+        return f"{content}-{method}-{config_hash(settings)}"
+
+    def lookup(self, key, output_path):
+        """
+        캐시 조회 (적중 시 output_path에 결과를 복사)
+
+        하드 링크는 저장 공간을 공유하므로, 이후 출력 경로를 제자리에서 덮어쓰는 경로
+        (concat_segments / merge_audio의 -y, shutil.copy2)가 다른 작업의 결과까지 바꿔 버림
+
+        Args:
+            key: make_key 결과
+            output_path: 이번 실행의 출력 경로
+
+        Returns:
+            bool: 적중 여부 (output_path에 유효한 결과가 있음)
+        """
+        with self._lock:
+            entry = self._entries.get(key) if key else None
+        if not entry:
+            return False
+
+        cached_path = entry['output']
+        try:
+            stat = os.stat(cached_path)
+        except OSError:
+            return False
+        # 이전 출력이 지워졌거나 수정되었으면 무효
+        if stat.st_size != entry['size'] or stat.st_mtime_ns != entry['mtime_ns']:
+            return False
+
+        if os.path.abspath(output_path) == cached_path:
+            return True
+
+        # 임시 경로로 복사 후 교체 (기존 파일이 이전 버전의 하드 링크여도 연결을 끊음)
+        partial_path = partial_output_path(output_path)
+        try:
+            shutil.copy2(cached_path, partial_path)
+            os.replace(partial_path, output_path)
+        except OSError as e:
+            logger.warning(f"Cannot reuse cached result {cached_path}: {str(e)}")
+            discard_partial_output(partial_path)
+            return False
+
+        return True
+
+    def store(self, key, output_path):
+        """
+        성공한 결과 등록
+
+        Args:
+            key: make_key 결과
+            output_path: 완료된 출력 파일 경로
+        """
+        if not key or not os.path.exists(output_path):
+            return
+        stat = os.stat(output_path)
+        with self._lock:
+            self._entries[key] = {
+                'output': os.path.abspath(output_path),
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+            }
+
+    def save(self):
+        """인덱스를 디스크에 저장 (원자적 교체)"""
+        with self._lock:
+            entries = dict(self._entries)
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            temp_path = f"{self.index_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, indent=2)
+            os.replace(temp_path, self.index_path)
+        except Exception as e:
+            logger.warning(f"Failed to save result cache: {str(e)}")
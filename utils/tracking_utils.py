@@ -0,0 +1,131 @@
+"""
+워터마크 박스 추적 유틸리티
+키프레임 사이에서 YOLO 탐지 대신 템플릿 매칭으로 박스를 이어 붙임
+"""
+
+import cv2
+import numpy as np
+
+# 장면 전환 감지용 썸네일 크기 (가로, 세로)
+THUMBNAIL_SIZE = (64, 36)
+
+# 이 표준편차(그레이 레벨) 미만의 템플릿/탐색 영역은 균일한 것으로 보고 추적하지 않음
+# (TM_CCOEFF_NORMED는 균일한 입력에서 모든 위치 1.0을 반환해 위치 정보가 없음)
+FLAT_STD_EPSILON = 1.0
+
+
+def make_thumbnail(frame):
+    """
+    장면 전환 비교용 축소 그레이스케일 썸네일 생성
+
+    Args:
+        frame: 입력 프레임 (BGR)
+
+    Returns:
+        np.ndarray: float32 그레이스케일 썸네일
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+    return small.astype(np.float32)
+
+
+def is_scene_change(prev_thumbnail, thumbnail, threshold):
+    """
+    두 썸네일의 평균 밝기 차이로 장면 전환 여부 판단
+
+    Args:
+        prev_thumbnail: 이전 프레임 썸네일 (없으면 None)
+        thumbnail: 현재 프레임 썸네일
+        threshold: 평균 절대 차이 임계값 (0-255)
+
+    Returns:
+        bool: 장면 전환 여부
+    """
+    if prev_thumbnail is None:
+        return True
+    return float(np.mean(np.abs(thumbnail - prev_thumbnail))) > threshold
+
+
+class BoxTracker:
+    """키프레임 박스 크롭을 템플릿으로 사용하는 경량 추적기"""
+
+    def __init__(self, search_margin=32):
+        """
+        Args:
+            search_margin: 이전 박스 주변 탐색 여백 (픽셀)
+        """
+        self.search_margin = search_margin
+        self.tracks = []  # [(box, template_gray, is_flat), ...]
+
+    def reset(self, frame, boxes):
+        """
+        키프레임 탐지 결과로 추적 상태 초기화
+
+        Args:
+            frame: 키프레임 (BGR)
+            boxes: 탐지된 박스 리스트 [(x1, y1, x2, y2), ...]
+        """
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        self.tracks = []
+        for x1, y1, x2, y2 in boxes:
+            template = gray[y1:y2, x1:x2].copy()
+            if template.size > 0:
+                is_flat = float(template.std()) < FLAT_STD_EPSILON
+                self.tracks.append(((x1, y1, x2, y2), template, is_flat))
+
+    def track(self, frame):
+        """
+        현재 프레임에서 각 박스 위치 추정
+
+        템플릿은 키프레임 것을 그대로 유지하여 누적 드리프트를 방지
+        균일한 템플릿(단색 워터마크 크롭, 검은 프레임)은 위치를 알 수 없으므로
+        박스를 그대로 두고 신뢰도 0을 반환해 재탐지를 유도
+
+        Args:
+            frame: 현재 프레임 (BGR)
+
+        Returns:
+            tuple: (boxes, confidence) - 추정 박스 리스트, 최저 매칭 점수 (0-1)
+        """
+        if not self.tracks:
+            return [], 1.0
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        height, width = gray.shape[:2]
+        margin = self.search_margin
+
+        boxes = []
+        confidence = 1.0
+        updated_tracks = []
+        for (x1, y1, x2, y2), template, is_flat in self.tracks:
+            if is_flat:
+                boxes.append((x1, y1, x2, y2))
+                updated_tracks.append(((x1, y1, x2, y2), template, is_flat))
+                confidence = 0.0
+                continue
+
+            th, tw = template.shape[:2]
+            sx1, sy1 = max(0, x1 - margin), max(0, y1 - margin)
+            sx2, sy2 = min(width, x2 + margin), min(height, y2 + margin)
+            search = gray[sy1:sy2, sx1:sx2]
+
+            if search.shape[0] < th or search.shape[1] < tw:
+                return [], 0.0
+
+            scores = cv2.matchTemplate(search, template, cv2.TM_CCOEFF_NORMED)
+            _, max_val, _, max_loc = cv2.minMaxLoc(scores)
+            # 균일한 탐색 영역(검은 프레임 등)은 1.0/NaN 같은 퇴화 점수와 임의 위치를 냄 → 박스 유지 + 추적 실패
+            if not np.isfinite(max_val) or float(search.std()) < FLAT_STD_EPSILON:
+                boxes.append((x1, y1, x2, y2))
+                updated_tracks.append(((x1, y1, x2, y2), template, is_flat))
+                confidence = 0.0
+                continue
+
+            nx1, ny1 = sx1 + max_loc[0], sy1 + max_loc[1]
+            box = (nx1, ny1, nx1 + tw, ny1 + th)
+            boxes.append(box)
+            updated_tracks.append((box, template, is_flat))
+            confidence = min(confidence, float(max_val))
+
+        self.tracks = updated_tracks
+        return boxes, confidence
@@ -3,11 +3,17 @@
 """
 
 import os
+import json
+import bisect
+import threading
 import subprocess
 import tempfile
+from fractions import Fraction
 from pathlib import Path
 from utils.logger import logger
 from utils.security_utils import validate_file_path
+from utils.ffmpeg_toolchain import get_toolchain
+import config
 
 def verify_video(video_path):
     """비디오 파일 검증 (파일 존재, 경로 보안, 확장자 확인)"""
@@ -31,32 +37,119 @@ def verify_video(video_path):
     if file_size == 0:
         return False, "Video file is empty"
 
-    logger.info(f"Video verification passed: {video_path} ({file_size / (1024*1024):.2f} MB)")
+    # 스트림 정보 확인 + 최대 길이 제한 (모델 로드 전에 거부)
+    info = get_video_info(video_path)
+    if info is None:
+        return False, "Cannot read video stream"
+    if config.MAX_VIDEO_DURATION and info.duration > config.MAX_VIDEO_DURATION:
+        return False, f"Video too long: {info.duration:.1f}s (max {config.MAX_VIDEO_DURATION}s)"
+
+    logger.info(f"Video verification passed: {video_path} ({file_size / (1024*1024):.2f} MB, {info})")
     return True, "Valid"
 
 
 def _find_ffmpeg():
-    """ffmpeg 경로 찾기"""
-    # 먼저 현재 디렉토리의 ffmpeg 폴더 확인
-    local_ffmpeg = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'ffmpeg', 'ffmpeg.exe')
-    if os.path.exists(local_ffmpeg):
-        return local_ffmpeg
+    """ffmpeg 경로 (프로세스당 한 번 탐색 후 캐시)"""
+    toolchain = get_toolchain()
+    if toolchain is None:
+        raise FileNotFoundError("ffmpeg not found. Please ensure ffmpeg is installed or available in 'ffmpeg' folder.")
+    return toolchain.ffmpeg
+
+
+def ffmpeg_available():
+    """ffmpeg 사용 가능 여부"""
+    return get_toolchain() is not None
+
+
+def _find_ffprobe():
+    """ffprobe 경로 (ffmpeg와 같은 폴더 우선, 캐시)"""
+    toolchain = get_toolchain()
+    if toolchain is None or not toolchain.ffprobe:
+        raise FileNotFoundError("ffprobe not found. Please ensure ffprobe is installed next to ffmpeg.")
+    return toolchain.ffprobe
+
+
+def probe_audio_codec(video_path):
+    """
+    첫 번째 오디오 스트림의 코덱 이름 조회 (ffprobe)
+
+    Args:
+        video_path: 입력 비디오 경로
+
+    Returns:
+        str or None: 코덱 이름 (예: 'aac', 'opus'), 오디오가 없거나 조회 실패 시 None
+    """
+    info = get_video_info(video_path)
+    if info is not None and info.exact:
+        return info.audio_codec
+
+    try:
+        cmd = [
+            _find_ffprobe(),
+            '-v', 'error',
+            '-select_streams', 'a:0',
+            '-show_entries', 'stream=codec_name',
+            '-of', 'json',
+            video_path
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='ignore', timeout=60)
+        if result.returncode != 0:
+            logger.warning(f"Audio probe failed: {result.stderr.strip()}")
+            return None
+
+        streams = json.loads(result.stdout or '{}').get('streams', [])
+        return streams[0].get('codec_name') if streams else None
+
+    except Exception as e:
+        logger.warning(f"Audio probe error: {str(e)}")
+        return None
+
+
+# 컨테이너별로 스트림 복사(-c:a copy)가 가능한 오디오 코덱 (None = 모든 코덱 허용)
+_MP4_AUDIO_CODECS = {'aac', 'mp3', 'alac', 'ac3', 'eac3', 'opus', 'flac'}
+_AUDIO_COPY_CODECS = {
+    '.mp4': _MP4_AUDIO_CODECS,
+    '.m4v': _MP4_AUDIO_CODECS,
+    '.m4a': _MP4_AUDIO_CODECS,
+    '.mov': _MP4_AUDIO_CODECS | {'pcm_s16le', 'pcm_s24le'},
+    '.mkv': None,
+    '.mka': None,
+    '.webm': {'opus', 'vorbis'},
+    '.aac': {'aac'},
+}
+
+
+def audio_copy_supported(codec, output_path):
+    """
+    코덱을 출력 컨테이너에 재인코딩 없이 복사할 수 있는지 확인
 
-    # PATH에서 ffmpeg 찾기
-    result = subprocess.run(['where', 'ffmpeg'], capture_output=True, text=True)
-    if result.returncode == 0:
-        return result.stdout.strip().split('\n')[0]
+    Args:
+        codec: 오디오 코덱 이름 (probe_audio_codec 결과)
+        output_path: 출력 파일 경로 (확장자로 컨테이너 판단)
 
-    # 일반적인 설치 위치 확인
-    for path in [
-        'C:\\ffmpeg\\bin\\ffmpeg.exe',
-        'C:\\Program Files\\ffmpeg\\bin\\ffmpeg.exe',
-        'C:\\Program Files (x86)\\ffmpeg\\bin\\ffmpeg.exe',
-    ]:
-        if os.path.exists(path):
-            return path
+    Returns:
+        bool: 스트림 복사 가능 여부
+    """
+    if not codec:
+        return False
+    output_ext = Path(output_path).suffix.lower()
+    if output_ext not in _AUDIO_COPY_CODECS:
+        return False
+    allowed = _AUDIO_COPY_CODECS[output_ext]
+    return allowed is None or codec in allowed
 
-    raise FileNotFoundError("ffmpeg not found. Please ensure ffmpeg is installed or available in 'ffmpeg' folder.")
+
+def _select_audio_codec(source_path, output_path):
+    """
+    오디오 코덱 선택 (원본 코덱을 출력 컨테이너에 복사할 수 있으면 'copy', 아니면 'aac' 1회 인코딩)
+    """
+    codec = probe_audio_codec(source_path)
+    if audio_copy_supported(codec, output_path):
+        logger.info(f"Audio stream copy: {codec}")
+        return 'copy'
+    if codec:
+        logger.info(f"Audio codec {codec} not supported in {Path(output_path).suffix}, transcoding to AAC")
+    return 'aac'
 
 
 def extract_audio(video_path, audio_path):
@@ -65,7 +158,7 @@ def extract_audio(video_path, audio_path):
 
     Args:
         video_path: 입력 비디오 경로
-        audio_path: 출력 오디오 경로 (.aac)
+        audio_path: 출력 오디오 경로 (.mka 권장 - 모든 코덱을 그대로 담을 수 있음)
 
     Returns:
         bool: 성공 여부
@@ -73,13 +166,20 @@ def extract_audio(video_path, audio_path):
     try:
         ffmpeg_exe = _find_ffmpeg()
 
-        # ffmpeg 명령어: -q:a 9 는 낮은 품질(빠른 처리), -q:a 0 은 높은 품질
+        # 원본 코덱을 담을 수 있으면 스트림 복사, 아니면 AAC 인코딩
+        codec = probe_audio_codec(video_path)
+        if audio_copy_supported(codec, audio_path):
+            audio_args = ['-c:a', 'copy']
+        else:
+            # -q:a 9 는 낮은 품질(빠른 처리), -q:a 0 은 높은 품질
+            audio_args = ['-c:a', 'aac', '-q:a', '5']
+
         cmd = [
             ffmpeg_exe,
             '-i', video_path,
             '-vn',  # 비디오 스트림 무시
-            '-acodec', 'aac',
-            '-q:a', '5',  # 오디오 품질
+            '-map', '0:a:0',
+            *audio_args,
             '-y',  # 기존 파일 덮어쓰기
             audio_path
         ]
@@ -124,7 +224,7 @@ def merge_audio(video_path, audio_path, output_path):
             '-i', video_path,
             '-i', audio_path,
             '-c:v', 'copy',  # 비디오 코덱 복사 (재인코딩 안함)
-            '-c:a', 'aac',  # 오디오 코덱 설정
+            '-c:a', _select_audio_codec(audio_path, output_path),  # 가능하면 오디오도 복사
             '-map', '0:v:0',  # 첫 번째 입력의 비디오
             '-map', '1:a:0',  # 두 번째 입력의 오디오
             '-shortest',  # 더 짧은 스트림에 맞추기
@@ -146,6 +246,50 @@ def merge_audio(video_path, audio_path, output_path):
         return False
 
 
+def add_source_audio(video_path, audio_source, output_path):
+    """
+    오디오 없이 인코딩된 비디오에 원본 오디오를 병합 (라이터가 오디오를 mux하지 못한 경우, 예: OpenCV fallback)
+
+    Args:
+        video_path: 오디오 없는 비디오 경로 (완료 후 삭제)
+        audio_source: 오디오를 가져올 원본 비디오 경로
+        output_path: 최종 출력 경로 (병합 완료 후에만 교체)
+
+    Returns:
+        bool: 성공 여부
+    """
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    with tempfile.TemporaryDirectory(dir=output_dir) as temp_dir:
+        audio_path = os.path.join(temp_dir, 'audio.mka')
+        if not extract_audio(audio_source, audio_path):
+            logger.warning("No audio found in original video or audio extraction failed. Saving video without audio.")
+            os.replace(video_path, output_path)
+            return True
+
+        merged_path = os.path.join(temp_dir, f"merged{Path(output_path).suffix}")
+        if not merge_audio(video_path, audio_path, merged_path):
+            return False
+        os.replace(merged_path, output_path)
+
+    os.remove(video_path)
+    return True
+
+
+def partial_output_path(output_path):
+    """인코딩 중 사용할 임시 출력 경로 (확장자 유지 → ffmpeg/OpenCV가 같은 컨테이너 선택)"""
+    root, ext = os.path.splitext(output_path)
+    return f"{root}.partial{ext}"
+
+
+def discard_partial_output(partial_path):
+    """중단/실패로 남은 임시 출력 삭제 (최종 경로에 잘린 파일이 남지 않도록)"""
+    try:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+    except OSError as e:
+        logger.warning(f"Failed to remove partial output {partial_path}: {str(e)}")
+
+
 def _copy_video(src_path, dst_path):
     """비디오 파일 복사 (오디오 필요 없을 때)"""
     try:
@@ -156,3 +300,630 @@ def _copy_video(src_path, dst_path):
     except Exception as e:
         logger.error(f"Video copy error: {str(e)}")
         return False
+
+
+class FFmpegFrameReader:
+    """ffmpeg 서브프로세스로 디코딩 (rawvideo BGR24 파이프 → numpy 프레임)"""
+
+    def __init__(self, video_path, width, height, threads=None, buffer_count=0, start=None, duration=None):
+        """
+        Args:
+            video_path: 입력 비디오 경로
+            width: 프레임 너비
+            height: 프레임 높이
+            threads: ffmpeg 디코딩 스레드 수 (None이면 config.FFMPEG_THREADS, 0 = 자동)
+            buffer_count: 미리 할당해 순환 재사용할 프레임 버퍼 수
+                          (0이면 프레임마다 새로 할당, 사용 중인 프레임 수보다 커야 함)
+            start: 디코딩 시작 시각 (초, 키프레임 권장)
+            duration: 디코딩 길이 (초, None이면 끝까지)
+        """
+        import numpy as np
+
+        self.width = width
+        self.height = height
+        self.frame_size = width * height * 3
+        threads = config.FFMPEG_THREADS if threads is None else threads
+
+        self._np = np
+        self._buffers = [np.empty((height, width, 3), dtype=np.uint8) for _ in range(buffer_count)]
+        self._next_buffer = 0
+
+        cmd = [_find_ffmpeg(), '-v', 'error', '-threads', str(threads)]
+        if start is not None:
+            cmd += ['-ss', f'{start:.6f}']
+        if duration is not None:
+            cmd += ['-t', f'{duration:.6f}']
+        cmd += [
+            '-i', video_path,
+            '-map', '0:v:0',
+            '-f', 'rawvideo',
+            '-pix_fmt', 'bgr24',
+            '-'
+        ]
+        self.process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                        bufsize=self.frame_size)
+
+    def read(self):
+        """
+        다음 프레임 읽기
+
+        Returns:
+            np.ndarray or None: BGR 프레임 (스트림 끝이면 None)
+        """
+        if self._buffers:
+            frame = self._buffers[self._next_buffer]
+            self._next_buffer = (self._next_buffer + 1) % len(self._buffers)
+        else:
+            frame = self._np.empty((self.height, self.width, 3), dtype=self._np.uint8)
+
+        view = memoryview(frame).cast('B')
+        offset = 0
+        while offset < self.frame_size:
+            count = self.process.stdout.readinto(view[offset:])
+            if not count:
+                return None
+            offset += count
+        return frame
+
+    def close(self):
+        """프로세스 종료"""
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.stdout.close()
+        self.process.wait()
+
+
+class FFmpegFrameWriter:
+    """ffmpeg 서브프로세스로 인코딩 (numpy 프레임 → rawvideo 파이프 → 인코더 프로필의 코덱/하드웨어 인코더)"""
+
+    def __init__(self, output_path, width, height, fps, codec=None, preset=None, crf=None, threads=None,
+                 audio_source=None, profile=None):
+        """
+        Args:
+            output_path: 출력 비디오 경로
+            width: 프레임 너비
+            height: 프레임 높이
+            fps: 프레임 레이트
+            codec: 비디오 코덱 (None이면 프로필 값)
+            preset: 인코더 프리셋 (None이면 프로필 값)
+            crf: 품질 값 (None이면 프로필 값, 낮을수록 고품질)
+            threads: 인코딩 스레드 수 (None이면 프로필 값과 config.FFMPEG_THREADS 중 작은 값, 0 = 자동)
+            audio_source: 오디오를 가져올 원본 비디오 경로 (같은 ffmpeg 호출에서 바로 mux, 없으면 무음)
+            profile: 인코더 프로필 이름 (None이면 config.VIDEO_PROFILE)
+        """
+        self.output_path = output_path
+        self.muxes_audio = audio_source is not None
+        self.profile, settings = get_encoder_profile(profile)
+        preset = preset or settings['preset']
+        crf = settings['crf'] if crf is None else crf
+        if threads is None:
+            threads = settings['threads']
+            # 워커 스레드 예산(구간/배치 병렬 처리)이 더 작으면 예산 우선
+            if config.FFMPEG_THREADS and (not threads or config.FFMPEG_THREADS < threads):
+                threads = config.FFMPEG_THREADS
+
+        toolchain = get_toolchain()
+        if toolchain is None:
+            raise FileNotFoundError("ffmpeg not found")
+        # 요청 코덱이 없거나 하드웨어 인코더를 쓸 수 있으면 대체 (선택 결과는 프로세스당 캐시)
+        # 무손실(crf 0)은 하드웨어 인코더로 보장되지 않으므로 소프트웨어만 사용
+        self.encoder = toolchain.select_video_encoder(codec or settings['codec'],
+                                                      allow_hardware=False if crf == 0 else None)
+        pix_fmt = toolchain.pixel_format(self.encoder, settings.get('pix_fmt'))
+
+        cmd = [
+            toolchain.ffmpeg,
+            '-v', 'error',
+            '-y',
+            '-f', 'rawvideo',
+            '-pix_fmt', 'bgr24',
+            '-s', f'{width}x{height}',
+            '-r', str(fps),
+            '-i', '-',
+        ]
+        if audio_source:
+            # 원본의 첫 오디오 스트림을 그대로 매핑 ('?' = 오디오 없으면 무시)
+            cmd += [
+                '-i', audio_source,
+                '-map', '0:v:0',
+                '-map', '1:a:0?',
+                '-c:a', _select_audio_codec(audio_source, output_path),
+                '-shortest',
+            ]
+        cmd += toolchain.video_encoder_args(self.encoder, preset, crf, threads, pix_fmt)
+        cmd += [
+            '-g', str(max(1, round(fps * settings['gop_seconds']))),
+            '-bf', str(settings['bframes']),
+        ]
+        # 4:2:0 (yuv420p/nv12)는 짝수 해상도만 지원
+        if pix_fmt in ('yuv420p', 'nv12') and (width % 2 or height % 2):
+            cmd += ['-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2']
+        cmd.append(output_path)
+
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        # -shortest로 오디오가 먼저 끝나면 ffmpeg가 입력 파이프를 닫음 → 이후 프레임은 버림
+        self.input_closed = False
+
+    def write(self, frame):
+        """
+        프레임 쓰기 (BGR)
+
+        Raises:
+            BrokenPipeError: ffmpeg가 오류로 종료됨 (정상 종료로 파이프가 닫힌 경우는 스트림 끝으로 처리)
+        """
+        if self.input_closed:
+            return
+        try:
+            self.process.stdin.write(memoryview(frame).cast('B') if frame.flags['C_CONTIGUOUS'] else frame.tobytes())
+        except (BrokenPipeError, OSError):
+            # Windows는 닫힌 파이프에 EINVAL(OSError)을 냄 → 종료 코드로 정상 종료 여부 판단
+            if self.process.wait() != 0:
+                raise
+            self.input_closed = True
+            logger.info("ffmpeg finished at the end of the audio stream (-shortest), remaining frames dropped")
+
+    def close(self):
+        """
+        입력 종료 후 인코딩 완료 대기
+
+        Raises:
+            IOError: ffmpeg 인코딩 실패
+        """
+        try:
+            self.process.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+        stderr = self.process.stderr.read()
+        self.process.stderr.close()
+        if self.process.wait() != 0:
+            raise IOError(f"ffmpeg encoding failed: {stderr.decode('utf-8', errors='ignore').strip()}")
+
+
+class OpenCVFrameReader:
+    """cv2.VideoCapture 기반 리더 (ffmpeg 없을 때 fallback)"""
+
+    def __init__(self, video_path):
+        import cv2
+        self.cap = cv2.VideoCapture(video_path)
+        if not self.cap.isOpened():
+            raise IOError(f"Cannot open video: {video_path}")
+
+    def read(self):
+        ret, frame = self.cap.read()
+        return frame if ret else None
+
+    def close(self):
+        self.cap.release()
+
+
+class OpenCVFrameWriter:
+    """cv2.VideoWriter 기반 라이터 (ffmpeg 없을 때 fallback, mp4v)"""
+
+    def __init__(self, output_path, width, height, fps):
+        import cv2
+        self.muxes_audio = False
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        self.out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+        if not self.out.isOpened():
+            raise IOError(f"Cannot create output video: {output_path}")
+
+    def write(self, frame):
+        self.out.write(frame)
+
+    def close(self):
+        self.out.release()
+
+
+def open_frame_reader(video_path, width, height, buffer_count=0, start=None, duration=None):
+    """
+    프레임 리더 생성 (config.USE_FFMPEG_PIPE_IO면 ffmpeg, 실패 시 OpenCV)
+
+    Args:
+        start, duration: 구간 디코딩 (초, ffmpeg 리더만 지원)
+
+    Returns:
+        read() -> frame/None, close() 메서드를 가진 리더 객체
+    """
+    if start is not None or duration is not None:
+        # 구간 처리는 ffmpeg 시크가 필요하므로 fallback 없음
+        return FFmpegFrameReader(video_path, width, height, buffer_count=buffer_count,
+                                 start=start, duration=duration)
+
+    if config.USE_FFMPEG_PIPE_IO:
+        try:
+            return FFmpegFrameReader(video_path, width, height, buffer_count=buffer_count)
+        except Exception as e:
+            logger.warning(f"ffmpeg decoder unavailable ({e}), falling back to cv2.VideoCapture")
+    return OpenCVFrameReader(video_path)
+
+
+def get_encoder_profile(name=None):
+    """
+    인코더 프로필 조회
+
+    Args:
+        name: 프로필 이름 (None이면 config.VIDEO_PROFILE)
+
+    Returns:
+        tuple: (프로필 이름, 설정 딕셔너리) - 알 수 없는 이름이면 기본 프로필
+    """
+    name = name or config.VIDEO_PROFILE
+    if name not in config.VIDEO_PROFILES:
+        logger.warning(f"Unknown encoder profile '{name}', using '{config.VIDEO_PROFILE}'")
+        name = config.VIDEO_PROFILE
+    return name, config.VIDEO_PROFILES[name]
+
+
+def open_frame_writer(output_path, width, height, fps, audio_source=None, profile=None):
+    """
+    프레임 라이터 생성 (config.USE_FFMPEG_PIPE_IO면 ffmpeg, 실패 시 OpenCV)
+
+    Args:
+        audio_source: 같은 인코딩 패스에서 mux할 오디오 원본 경로 (ffmpeg 라이터만 지원)
+        profile: 인코더 프로필 이름 (None이면 config.VIDEO_PROFILE, ffmpeg 라이터만 지원)
+
+    Returns:
+        write(frame), close() 메서드와 muxes_audio 속성을 가진 라이터 객체
+    """
+    if config.USE_FFMPEG_PIPE_IO:
+        try:
+            return FFmpegFrameWriter(output_path, width, height, fps, audio_source=audio_source, profile=profile)
+        except Exception as e:
+            logger.warning(f"ffmpeg encoder unavailable ({e}), falling back to cv2.VideoWriter (mp4v)")
+    return OpenCVFrameWriter(output_path, width, height, fps)
+
+
+class VideoInfo:
+    """비디오 정보 (ffprobe 한 번으로 조회, get_video_info로 경로/크기/수정 시각별 캐시)"""
+
+    def __init__(self, path, width, height, fps, frame_count, duration, codec=None, rotation=0,
+                 audio_codec=None, keyframes=None, frame_times=None, exact=True):
+        """
+        Args:
+            path: 비디오 경로
+            width: 코딩된 프레임 너비 (회전 전)
+            height: 코딩된 프레임 높이 (회전 전)
+            fps: 평균 프레임 레이트
+            frame_count: 비디오 프레임 수 (exact면 패킷 수 기준 정확한 값)
+            duration: 길이 (초)
+            codec: 비디오 코덱 이름
+            rotation: 표시 회전 각도 (0, 90, 180, 270, 시계 방향)
+            audio_codec: 첫 오디오 스트림 코덱 (없으면 None)
+            keyframes: 키프레임 시각 목록 (초, 스트림 시작 기준, 오름차순)
+            frame_times: 모든 프레임 시각 목록 (초, 스트림 시작 기준, 오름차순)
+            exact: ffprobe 결과 여부 (False면 cv2 추정값)
+        """
+        self.path = path
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.frame_count = frame_count
+        self.duration = duration
+        self.codec = codec
+        self.rotation = rotation
+        self.audio_codec = audio_codec
+        self.keyframes = keyframes or []
+        self.frame_times = frame_times or []
+        self.exact = exact
+
+    @property
+    def has_audio(self):
+        return self.audio_codec is not None
+
+    @property
+    def display_size(self):
+        """디코딩된 프레임 크기 (ffmpeg/OpenCV는 회전 메타데이터를 자동 적용)"""
+        if self.rotation % 180 == 90:
+            return self.height, self.width
+        return self.width, self.height
+
+    def frame_count_between(self, start=None, duration=None):
+        """
+        구간의 프레임 수 (프레임 시각이 있으면 정확히 세고, 없으면 FPS로 추정)
+
+        Args:
+            start: 구간 시작 시각 (초, None이면 처음부터)
+            duration: 구간 길이 (초, None이면 끝까지)
+        """
+        if start is None and duration is None:
+            return self.frame_count
+
+        start = start or 0.0
+        end = start + duration if duration is not None else None
+        if self.frame_times:
+            first = bisect.bisect_left(self.frame_times, start)
+            last = bisect.bisect_left(self.frame_times, end) if end is not None else len(self.frame_times)
+            return last - first
+
+        seconds = (end if end is not None else self.duration) - start
+        return max(0, int(round(seconds * self.fps)))
+
+    def __repr__(self):
+        width, height = self.display_size
+        audio = self.audio_codec or "no audio"
+        return (f"{self.codec} {width}x{height} @ {self.fps:.3f} fps, {self.frame_count} frames, "
+                f"{self.duration:.2f}s, {audio}")
+
+
+# 비디오 정보 캐시: (절대 경로, 크기, 수정 시각) → VideoInfo
+_video_info_cache = {}
+_video_info_lock = threading.Lock()
+
+
+def _parse_rate(rate):
+    """ffprobe 프레임 레이트 문자열 ("30000/1001") → float"""
+    try:
+        value = float(Fraction(rate))
+        return value if value > 0 else 0.0
+    except (ValueError, ZeroDivisionError, TypeError):
+        return 0.0
+
+
+def _parse_rotation(stream):
+    """스트림 회전 메타데이터 (tags.rotate 또는 display matrix side data) → 0/90/180/270"""
+    rotate = stream.get('tags', {}).get('rotate')
+    if rotate is not None:
+        return int(float(rotate)) % 360
+    for side_data in stream.get('side_data_list', []):
+        if 'rotation' in side_data:
+            # display matrix는 반시계 방향 각도
+            return int(-float(side_data['rotation'])) % 360
+    return 0
+
+
+def _probe_video_info(video_path):
+    """ffprobe 한 번 호출로 스트림/포맷/비디오 패킷 시각 조회 (디코딩 없음)"""
+    cmd = [
+        _find_ffprobe(),
+        '-v', 'error',
+        '-show_format',
+        '-show_streams',
+        '-show_entries', 'packet=stream_index,pts_time,dts_time,flags',
+        '-of', 'json',
+        video_path
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='ignore', timeout=300)
+    if result.returncode != 0:
+        logger.warning(f"Video probe failed: {result.stderr.strip()}")
+        return None
+
+    data = json.loads(result.stdout or '{}')
+    streams = data.get('streams', [])
+    video = next((st for st in streams if st.get('codec_type') == 'video'
+                  and not st.get('disposition', {}).get('attached_pic')), None)
+    if video is None:
+        return None
+    audio = next((st for st in streams if st.get('codec_type') == 'audio'), None)
+
+    # 비디오 패킷 시각 (스트림 시작 기준, B-프레임 때문에 정렬)
+    stream_start = float(video.get('start_time') or 0.0)
+    frame_times = []
+    keyframes = []
+    for packet in data.get('packets', []):
+        if packet.get('stream_index') != video.get('index'):
+            continue
+        time = packet.get('pts_time', packet.get('dts_time'))
+        if time in (None, 'N/A'):
+            continue
+        time = float(time) - stream_start
+        frame_times.append(time)
+        if 'K' in packet.get('flags', ''):
+            keyframes.append(time)
+    frame_times.sort()
+    keyframes.sort()
+
+    fps = _parse_rate(video.get('avg_frame_rate')) or _parse_rate(video.get('r_frame_rate'))
+    duration = float(data.get('format', {}).get('duration') or video.get('duration') or 0.0)
+    frame_count = len(frame_times) or int(video.get('nb_frames') or 0) or int(round(duration * fps))
+
+    return VideoInfo(
+        path=video_path,
+        width=int(video.get('width', 0)),
+        height=int(video.get('height', 0)),
+        fps=fps,
+        frame_count=frame_count,
+        duration=duration,
+        codec=video.get('codec_name'),
+        rotation=_parse_rotation(video),
+        audio_codec=audio.get('codec_name') if audio else None,
+        keyframes=keyframes,
+        frame_times=frame_times,
+    )
+
+
+def _opencv_video_info(video_path):
+    """ffprobe가 없을 때 cv2.VideoCapture 추정값으로 대체 (VFR/일부 컨테이너에서 부정확)"""
+    import cv2
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return None
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        return VideoInfo(
+            path=video_path,
+            width=int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            height=int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            fps=fps,
+            frame_count=frame_count,
+            duration=frame_count / fps if fps > 0 else 0.0,
+            exact=False,
+        )
+    finally:
+        cap.release()
+
+
+def get_video_info(video_path):
+    """
+    비디오 정보 조회 (경로 + 크기 + 수정 시각으로 캐시, 파일이 바뀌면 다시 조회)
+
+    Args:
+        video_path: 비디오 경로
+
+    Returns:
+        VideoInfo or None: 비디오 정보 (읽을 수 없으면 None)
+    """
+    try:
+        path = os.path.abspath(video_path)
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    with _video_info_lock:
+        if key in _video_info_cache:
+            return _video_info_cache[key]
+
+    info = None
+    try:
+        info = _probe_video_info(path)
+    except Exception as e:
+        logger.warning(f"Video probe error: {str(e)}")
+    if info is None:
+        info = _opencv_video_info(path)
+
+    if info is not None:
+        with _video_info_lock:
+            _video_info_cache[key] = info
+    return info
+
+
+def plan_segments(duration, keyframes, count, min_duration=0.0):
+    """
+    키프레임 경계에서 비디오를 거의 같은 길이의 구간으로 분할
+
+    Args:
+        duration: 전체 길이 (초)
+        keyframes: 키프레임 시각 목록 (초)
+        count: 목표 구간 수
+        min_duration: 구간 최소 길이 (초)
+
+    Returns:
+        list: [(start, duration), ...] - 마지막 구간의 duration은 None (끝까지)
+    """
+    boundaries = [0.0]
+    for i in range(1, count):
+        target = duration * i / count
+        candidates = [k for k in keyframes
+                      if k >= boundaries[-1] + min_duration and duration - k >= min_duration]
+        if not candidates:
+            break
+        nearest = min(candidates, key=lambda k: abs(k - target))
+        if nearest > boundaries[-1]:
+            boundaries.append(nearest)
+
+    segments = []
+    for i, start in enumerate(boundaries):
+        end = boundaries[i + 1] if i + 1 < len(boundaries) else None
+        segments.append((start, end - start if end is not None else None))
+    return segments
+
+
+def concat_segments(segment_paths, output_path, audio_source=None):
+    """
+    concat demuxer로 구간 파일을 무손실 연결 (선택적으로 원본 오디오를 같은 패스에서 mux)
+
+    Args:
+        segment_paths: 순서대로 정렬된 구간 비디오 경로 리스트 (같은 인코딩 설정)
+        output_path: 출력 경로
+        audio_source: 오디오를 가져올 원본 비디오 경로
+
+    Returns:
+        bool: 성공 여부
+    """
+    list_path = None
+    try:
+        ffmpeg_exe = _find_ffmpeg()
+
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as f:
+            for path in segment_paths:
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+            list_path = f.name
+
+        cmd = [ffmpeg_exe, '-v', 'error', '-f', 'concat', '-safe', '0', '-i', list_path]
+        if audio_source:
+            cmd += [
+                '-i', audio_source,
+                '-map', '0:v:0',
+                '-map', '1:a:0?',
+                '-c:a', _select_audio_codec(audio_source, output_path),
+                '-shortest',
+            ]
+        cmd += ['-c:v', 'copy', '-y', output_path]
+
+        result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='ignore', timeout=600)
+        if result.returncode != 0:
+            logger.error(f"Segment concat failed: {result.stderr}")
+            return False
+
+        logger.info(f"Segments concatenated: {output_path} ({len(segment_paths)} segments)")
+        return True
+
+    except Exception as e:
+        logger.error(f"Segment concat error: {str(e)}")
+        return False
+    finally:
+        if list_path and os.path.exists(list_path):
+            os.remove(list_path)
+
+
+def read_first_frames(video_path, width, height, count):
+    """
+    비디오 앞부분의 프레임 읽기 (count 프레임만 디코딩, 벤치마크용)
+
+    Args:
+        video_path: 비디오 경로
+        width, height: 프레임 크기 (표시 크기)
+        count: 읽을 프레임 수
+
+    Returns:
+        list: BGR 프레임 리스트 (비디오가 짧으면 count보다 적음)
+    """
+    reader = open_frame_reader(video_path, width, height)
+    try:
+        frames = []
+        while len(frames) < count:
+            frame = reader.read()
+            if frame is None:
+                break
+            frames.append(frame)
+        return frames
+    finally:
+        reader.close()
+
+
+def sample_frames(video_path, count):
+    """
+    비디오 전체에서 고르게 프레임 샘플링 (캘리브레이션/정확도 검사용)
+
+    Args:
+        video_path: 비디오 경로
+        count: 샘플 프레임 수
+
+    Returns:
+        list: BGR 프레임 리스트 (읽기 실패 시 빈 리스트)
+    """
+    import cv2
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return []
+
+    try:
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        step = max(1, total_frames // count) if total_frames > 0 else 1
+
+        frames = []
+        index = 0
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if index % step == 0:
+                frames.append(frame)
+            index += 1
+        return frames
+    finally:
+        cap.release()
@@ -5,9 +5,13 @@ API 우선 + 로컬 백업 하이브리드 방식
 """
 
 import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
 from utils.logger import logger
-from utils.video_utils import verify_video
+from utils.video_utils import verify_video, get_video_info
+from utils.result_cache import ResultCache
 import config
 
 # Lazy imports to avoid import errors in PyInstaller bundles
@@ -39,6 +43,44 @@ def _lazy_import_clients():
         logger.debug("Video enhancement dependencies not available")
 
 
+# 배치 워커 프로세스 전역 상태 (프로세스마다 WatermarkRemover 1개 유지 → 모델 재사용)
+_batch_remover = None
+_batch_progress = None
+_batch_current_file = None
+
+
+def _batch_worker_progress(message, progress):
+    """워커의 현재 파일 진행률을 공유 dict에 기록"""
+    if _batch_progress is not None and _batch_current_file is not None:
+        _batch_progress[_batch_current_file] = progress
+
+
+def _init_batch_worker(thread_budget, stop_event, progress):
+    """배치 워커 프로세스 초기화 (모델은 첫 파일 처리 전에 한 번만 로드)"""
+    global _batch_remover, _batch_progress
+
+    # 워커 안에서는 중첩 병렬화 없이 스레드 예산만 사용
+    config.BATCH_WORKERS = 1
+    config.SEGMENT_WORKERS = 1
+    config.TORCH_NUM_THREADS = thread_budget
+    config.FFMPEG_THREADS = thread_budget
+
+    _batch_progress = progress
+    _batch_remover = WatermarkRemover(stop_event=stop_event, progress_callback=_batch_worker_progress)
+
+
+def _batch_worker_process(name, video_path, output_path, method, static_roi=None, encoder_profile=None):
+    """워커에서 파일 하나 처리"""
+    global _batch_current_file
+    _batch_current_file = name
+    try:
+        return _batch_remover.remove_watermark(video_path, output_path, force_method=method, static_roi=static_roi,
+                                               encoder_profile=encoder_profile)
+    finally:
+        _batch_progress[name] = 100.0
+        _batch_current_file = None
+
+
 # 사용자 정의 예외
 class ProcessingError(Exception):
     """처리 중 발생한 에러"""
@@ -75,15 +117,17 @@ class WatermarkRemover:
         self._current_file_index = 0
         self._total_files = 0
 
+        # 클라이언트는 처리 방법이 정해질 때 필요한 것만 생성 (지연 초기화)
+        # 클라이언트별 잠금 (백그라운드 미리 로드가 현재 작업의 클라이언트 생성을 막지 않도록)
+        self._local_gpu_lock = threading.RLock()
+        self._enhancement_lock = threading.RLock()
+        self._local_gpu_initialized = False
+        self._enhancement_initialized = False
+        self._prefetch_thread = None
+
         # 디렉토리 생성
         self._ensure_directories()
 
-        # Local GPU 클라이언트 초기화 (선택적)
-        self._initialize_local_gpu_client()
-
-        # Video Enhancement Pipeline 초기화 (선택적)
-        self._initialize_enhancement_pipeline()
-
         logger.info("WatermarkRemover initialized")
 
     def _ensure_directories(self):
@@ -131,17 +175,46 @@ class WatermarkRemover:
             logger.warning(f"Failed to initialize pipeline: {e}")
             self.enhancement_pipeline = None
 
-    def enhance_with_pipeline(self, video_path, output_path):
-        """ESRGAN 비디오 업스케일링 (4x 해상도 증가)"""
-        if not self.enhancement_pipeline:
+    def _get_local_gpu_client(self):
+        """Local GPU 클라이언트 조회 (처음 호출 시 생성)"""
+        with self._local_gpu_lock:
+            if not self._local_gpu_initialized:
+                self._local_gpu_initialized = True
+                self._initialize_local_gpu_client()
+            return self.local_gpu_client
+
+    def _get_enhancement_pipeline(self):
+        """Video Enhancement Pipeline 조회 (처음 호출 시 생성)"""
+        with self._enhancement_lock:
+            if not self._enhancement_initialized:
+                self._enhancement_initialized = True
+                self._initialize_enhancement_pipeline()
+            return self.enhancement_pipeline
+
+    def _prefetch_other_method(self, force_method):
+        """
+        현재 작업에 쓰지 않는 처리 방법의 클라이언트를 백그라운드에서 미리 로드
+        (config.PREFETCH_OTHER_METHOD가 켜져 있을 때만)
+        """
+        if not config.PREFETCH_OTHER_METHOD or self._prefetch_thread is not None:
+            return
+
+        loader = self._get_local_gpu_client if force_method == "enhance" else self._get_enhancement_pipeline
+        self._prefetch_thread = threading.Thread(target=loader, name="model-prefetch", daemon=True)
+        self._prefetch_thread.start()
+
+    def enhance_with_pipeline(self, video_path, output_path, video_info=None, encoder_profile=None):
+        """ESRGAN 비디오 업스케일링 (4x 해상도 증가, encoder_profile: 출력 인코더 프로필)"""
+        if not self._get_enhancement_pipeline():
             logger.error("Enhancement pipeline not available")
             return False
 
         try:
             logger.info("Starting ESRGAN Video Upscaling...")
             logger.info("Processing: 1080p → 4K (4x upscaling)")
+            self.enhancement_pipeline.encoder_profile = encoder_profile or config.VIDEO_PROFILE
 
-            success = self.enhancement_pipeline.enhance_video(video_path, output_path)
+            success = self.enhancement_pipeline.enhance_video(video_path, output_path, video_info=video_info)
 
             if success:
                 logger.info("✓ Video upscaling completed successfully!")
@@ -155,7 +228,7 @@ class WatermarkRemover:
 
     def validate_video(self, video_path):
         """
-        비디오 유효성 검사 (파일 존재 및 포맷만 확인)
+        비디오 유효성 검사 (파일 존재, 포맷, 스트림 정보, 최대 길이)
         """
         try:
             # 파일 존재 여부 및 형식 확인
@@ -173,24 +246,34 @@ class WatermarkRemover:
             logger.error(f"Unexpected validation error: {str(e)}")
             return False
 
-    def remove_with_local_gpu(self, video_path, output_path):
+    def remove_with_local_gpu(self, video_path, output_path, detector_backend=None, static_roi=None,
+                              video_info=None, encoder_profile=None):
         """
         Local GPU를 이용한 워터마크 제거
 
         Args:
             video_path: 입력 비디오 경로
             output_path: 출력 비디오 경로
+            detector_backend: 이번 작업의 탐지 백엔드 ("ultralytics", "onnx", "openvino", None이면 현재 설정 유지)
+            static_roi: 이번 작업의 고정 워터마크 영역 ("off", "auto", 사각형 리스트, None이면 현재 설정 유지)
+            video_info: 미리 조회한 VideoInfo (None이면 클라이언트에서 조회)
+            encoder_profile: 출력 인코더 프로필 이름 (None이면 config.VIDEO_PROFILE)
 
         Returns:
             bool: 성공 여부
         """
-        if not self.local_gpu_client:
+        if not self._get_local_gpu_client():
             logger.error("Local GPU client not available")
             return False
 
         try:
             logger.info(f"Attempting Local GPU watermark removal...")
-            success = self.local_gpu_client.remove_watermark(video_path, output_path)
+            if detector_backend:
+                self.local_gpu_client.set_detector_backend(detector_backend)
+            if static_roi is not None:
+                self.local_gpu_client.set_static_roi(static_roi)
+            self.local_gpu_client.encoder_profile = encoder_profile or config.VIDEO_PROFILE
+            success = self.local_gpu_client.remove_watermark(video_path, output_path, video_info=video_info)
 
             if success:
                 logger.info(f"Local GPU watermark removal successful!")
@@ -234,7 +317,8 @@ class WatermarkRemover:
             logger.error(f"✗ WATERMARK REMOVAL FAILED")
             logger.error(f"{'='*60}")
 
-    def remove_watermark(self, video_path, output_path=None, force_method=None):
+    def remove_watermark(self, video_path, output_path=None, force_method=None, detector_backend=None,
+                         static_roi=None, encoder_profile=None):
         """
         메인 워터마크 제거 함수 (Local GPU)
 
@@ -242,6 +326,11 @@ class WatermarkRemover:
             video_path: 입력 비디오 경로
             output_path: 출력 비디오 경로 (생략하면 자동 생성)
             force_method: 처리 방법 (현재: "local_gpu" 만 지원)
+            detector_backend: 탐지 백엔드 ("ultralytics", "onnx", "onnx-int8", "openvino",
+                              None이면 config.DETECTOR_BACKEND)
+            static_roi: 고정 워터마크 영역 ("off", "auto" 또는 사각형 리스트, None이면 config.STATIC_ROI_MODE)
+            encoder_profile: 출력 인코더 프로필 ("fast", "balanced", "archive", "lossless",
+                             None이면 config.VIDEO_PROFILE)
 
         Returns:
             bool: 성공 여부
@@ -272,9 +361,11 @@ class WatermarkRemover:
                 original_callback(file_msg, overall_progress)
             self.progress_callback = batch_callback
 
-            # 클라이언트 업데이트 (배치 모드에서 "[파일 X/Y]" 표시)
+            # 클라이언트 업데이트 (배치 모드에서 "[파일 X/Y]" 표시, 아직 없으면 생성 시 반영됨)
             if self.local_gpu_client:
                 self.local_gpu_client.progress_callback = batch_callback
+            if self.enhancement_pipeline:
+                self.enhancement_pipeline.progress_callback = batch_callback
 
         try:
             # 중지 요청 확인
@@ -300,24 +391,35 @@ class WatermarkRemover:
             logger.info(f"Input: {video_path}")
             logger.info(f"Output: {output_path}")
 
-            # 비디오 검증
+            # 비디오 검증 (ffprobe 정보 + 최대 길이, 모델 로드 전)
             if not self.validate_video(video_path):
                 self._log_results(False, output_path)
                 return False
+            video_info = get_video_info(video_path)
 
             # 중지 요청 재확인
             if self.stop_event and self.stop_event.is_set():
                 logger.warning("Processing stopped by user before processing")
                 return False
 
-            # 처리 방법 선택
+            # 현재 작업의 클라이언트를 먼저 준비한 뒤 다른 처리 방법 모델 미리 로드 (선택적)
+            if force_method == "enhance":
+                self._get_enhancement_pipeline()
+            else:
+                self._get_local_gpu_client()
+            self._prefetch_other_method(force_method)
+
+            # 처리 방법 선택 (필요한 클라이언트만 지연 생성)
             if force_method == "enhance":
                 logger.info("\nStarting video enhancement (2-Stage: ESRGAN + CodeFormer)...")
-                success = self.enhance_with_pipeline(video_path, output_path)
+                success = self.enhance_with_pipeline(video_path, output_path, video_info=video_info,
+                                                     encoder_profile=encoder_profile)
             else:
                 # 기본값: Local GPU 워터마크 제거
                 logger.info("\nStarting watermark removal with Local GPU...")
-                success = self.remove_with_local_gpu(video_path, output_path)
+                success = self.remove_with_local_gpu(video_path, output_path, detector_backend=detector_backend,
+                                                     static_roi=static_roi, video_info=video_info,
+                                                     encoder_profile=encoder_profile)
 
             self._log_results(success, output_path)
             return success
@@ -335,8 +437,10 @@ class WatermarkRemover:
                 # 클라이언트 콜백도 복원
                 if self.local_gpu_client:
                     self.local_gpu_client.progress_callback = original_callback
+                if self.enhancement_pipeline:
+                    self.enhancement_pipeline.progress_callback = original_callback
 
-    def batch_process(self, video_dir, output_dir=None, method=None):
+    def batch_process(self, video_dir, output_dir=None, method=None, static_roi=None, encoder_profile=None):
         """
         배치 처리 (디렉토리의 모든 비디오 처리)
 
@@ -344,6 +448,8 @@ class WatermarkRemover:
             video_dir: 비디오 디렉토리
             output_dir: 출력 디렉토리 (생략하면 자동 생성)
             method: 처리 방법
+            static_roi: 고정 워터마크 영역 ("off", "auto" 또는 사각형 리스트, None이면 config.STATIC_ROI_MODE)
+            encoder_profile: 출력 인코더 프로필 이름 (None이면 config.VIDEO_PROFILE)
 
         Returns:
             dict: 처리 결과
@@ -379,48 +485,77 @@ class WatermarkRemover:
                 'total': len(video_files),
                 'success': 0,
                 'failed': 0,
+                'cached': 0,
                 'files': {}
             }
 
-            logger.info(f"Batch processing {len(video_files)} videos...")
-
-            # 배치 처리 정보 저장
-            self._total_files = len(video_files)
-
-            for i, video_file in enumerate(video_files, 1):
-                # 현재 파일 번호 저장 (progress_callback에서 사용)
-                self._current_file_index = i
-                # 각 파일 처리 전 중지 요청 확인
-                if self.stop_event and self.stop_event.is_set():
-                    logger.warning(f"Batch processing stopped by user at file {i}/{len(video_files)}")
-                    break
-
-                video_path = str(video_file)
-                output_path = str(output_dir / f"{video_file.stem}_cleaned.mp4")
-
-                batch_progress = ((i - 1) / len(video_files)) * 100
-                logger.info(f"\n[{i}/{len(video_files)}] Processing: {video_file.name} ({batch_progress:.0f}%)")
-
-                # 진행률 콜백
-                if self.progress_callback:
-                    self.progress_callback(f"Processing file {i}/{len(video_files)}: {video_file.name}", batch_progress)
-
-                success = self.remove_watermark(video_path, output_path, force_method=method)
-
-                results['files'][video_file.name] = {
-                    'success': success,
-                    'input': video_path,
-                    'output': output_path
-                }
-
-                if success:
-                    results['success'] += 1
-                else:
+            # 결과 캐시: 같은 입력 + 같은 설정으로 이미 성공한 파일은 건너뜀
+            result_cache = None
+            cache_keys = {}
+            if config.RESULT_CACHE_ENABLED:
+                result_cache = ResultCache()
+                cache_method = "enhance" if method == "enhance" else "local_gpu"
+                pending_files = []
+                for video_file in video_files:
+                    output_path = str(output_dir / f"{video_file.stem}_cleaned.mp4")
+                    key = result_cache.make_key(str(video_file), cache_method,
+                                                extra={'static_roi': static_roi,
+                                                       'encoder_profile': encoder_profile or config.VIDEO_PROFILE})
+                    if result_cache.lookup(key, output_path):
+                        results['files'][video_file.name] = {
+                            'success': True,
+                            'cached': True,
+                            'input': str(video_file),
+                            'output': output_path
+                        }
+                        results['success'] += 1
+                        results['cached'] += 1
+                        logger.info(f"Cache hit, skipping: {video_file.name}")
+                    else:
+                        cache_keys[video_file.name] = key
+                        pending_files.append(video_file)
+                video_files = pending_files
+
+            # 길이 제한 초과 파일은 워커에 보내기 전에 제외 (VideoInfo는 캐시되어 처리 단계에서 재사용)
+            durations = {}
+            schedulable = []
+            for video_file in video_files:
+                info = get_video_info(str(video_file))
+                duration = info.duration if info else 0.0
+                if config.MAX_VIDEO_DURATION and duration > config.MAX_VIDEO_DURATION:
+                    logger.warning(f"Skipping {video_file.name}: {duration:.1f}s exceeds "
+                                   f"MAX_VIDEO_DURATION ({config.MAX_VIDEO_DURATION}s)")
+                    results['files'][video_file.name] = {
+                        'success': False,
+                        'input': str(video_file),
+                        'output': str(output_dir / f"{video_file.stem}_cleaned.mp4")
+                    }
                     results['failed'] += 1
+                    continue
+                durations[video_file.name] = duration
+                schedulable.append(video_file)
+            video_files = schedulable
+
+            logger.info(f"Batch processing {len(video_files)} videos ({results['cached']} cached)...")
+
+            if config.BATCH_WORKERS > 1 and len(video_files) > 1:
+                self._batch_process_concurrent(video_files, output_dir, method, results, static_roi, durations,
+                                               encoder_profile)
+            elif video_files:
+                self._batch_process_sequential(video_files, output_dir, method, results, static_roi,
+                                               encoder_profile)
+
+            for name, file_result in results['files'].items():
+                file_result.setdefault('cached', False)
+                if result_cache and file_result['success'] and name in cache_keys:
+                    result_cache.store(cache_keys[name], file_result['output'])
+            if result_cache:
+                result_cache.save()
 
             logger.info(f"\n{'='*60}")
             logger.info(f"BATCH PROCESSING COMPLETED")
-            logger.info(f"Total: {results['total']}, Success: {results['success']}, Failed: {results['failed']}")
+            logger.info(f"Total: {results['total']}, Success: {results['success']}, Failed: {results['failed']}, "
+                        f"Cached: {results['cached']}")
             if results['total'] > 0:
                 logger.info(f"Success rate: {(results['success']/results['total']*100):.1f}%")
             logger.info(f"{'='*60}")
@@ -434,6 +569,121 @@ class WatermarkRemover:
             logger.error(f"Unexpected batch processing error: {str(e)}", exc_info=True)
             return None
 
+    def _batch_process_sequential(self, video_files, output_dir, method, results, static_roi=None,
+                                  encoder_profile=None):
+        """배치 파일을 순서대로 처리 (results에 파일별 결과 누적)"""
+        # 배치 처리 정보 저장
+        self._total_files = len(video_files)
+
+        for i, video_file in enumerate(video_files, 1):
+            # 현재 파일 번호 저장 (progress_callback에서 사용)
+            self._current_file_index = i
+            # 각 파일 처리 전 중지 요청 확인
+            if self.stop_event and self.stop_event.is_set():
+                logger.warning(f"Batch processing stopped by user at file {i}/{len(video_files)}")
+                break
+
+            video_path = str(video_file)
+            output_path = str(output_dir / f"{video_file.stem}_cleaned.mp4")
+
+            batch_progress = ((i - 1) / len(video_files)) * 100
+            logger.info(f"\n[{i}/{len(video_files)}] Processing: {video_file.name} ({batch_progress:.0f}%)")
+
+            # 진행률 콜백
+            if self.progress_callback:
+                self.progress_callback(f"Processing file {i}/{len(video_files)}: {video_file.name}", batch_progress)
+
+            success = self.remove_watermark(video_path, output_path, force_method=method, static_roi=static_roi,
+                                            encoder_profile=encoder_profile)
+
+            results['files'][video_file.name] = {
+                'success': success,
+                'input': video_path,
+                'output': output_path
+            }
+
+            if success:
+                results['success'] += 1
+            else:
+                results['failed'] += 1
+
+    def _batch_process_concurrent(self, video_files, output_dir, method, results, static_roi=None, durations=None,
+                                  encoder_profile=None):
+        """
+        워커 프로세스 풀로 배치 파일 동시 처리 (results에 파일별 결과 누적)
+
+        각 워커는 WatermarkRemover를 한 번만 만들어 모든 파일에 재사용하고,
+        진행률은 완료된 파일 + 처리 중인 파일의 부분 진행률로 계산
+        """
+        # 긴 파일부터 시작해 마지막에 긴 파일 하나만 남는 꼬리 지연 방지
+        durations = durations or {}
+        video_files = sorted(video_files, key=lambda f: durations.get(f.name, 0.0), reverse=True)
+        workers = min(int(config.BATCH_WORKERS), len(video_files))
+        thread_budget = max(1, (os.cpu_count() or 1) // workers)
+        total = len(video_files)
+        # 캐시 적중/건너뛴 파일은 이미 results에 있으므로 이번 풀에서 끝난 파일만 셈
+        already_done = len(results['files'])
+        logger.info(f"Concurrent batch: {workers} workers, {thread_budget} threads per worker")
+
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Manager() as manager:
+            worker_stop = manager.Event()
+            progress = manager.dict()
+
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_batch_worker,
+                                     initargs=(thread_budget, worker_stop, progress)) as executor:
+                futures = {}
+                for video_file in video_files:
+                    video_path = str(video_file)
+                    output_path = str(output_dir / f"{video_file.stem}_cleaned.mp4")
+                    future = executor.submit(_batch_worker_process, video_file.name, video_path, output_path,
+                                             method, static_roi, encoder_profile)
+                    futures[future] = (video_file.name, video_path, output_path)
+
+                pending = set(futures)
+                while pending:
+                    done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+
+                    # 중지 요청을 모든 워커에 전파하고 대기 중인 파일은 취소
+                    if self.stop_event and self.stop_event.is_set() and not worker_stop.is_set():
+                        logger.warning("Batch processing stopped by user, cancelling pending files")
+                        worker_stop.set()
+                        for future in pending:
+                            future.cancel()
+
+                    for future in done:
+                        name, video_path, output_path = futures[future]
+                        if future.cancelled():
+                            continue
+                        try:
+                            success = future.result()
+                        except Exception as e:
+                            logger.error(f"Batch worker failed on {name}: {e}")
+                            success = False
+
+                        results['files'][name] = {
+                            'success': success,
+                            'input': video_path,
+                            'output': output_path
+                        }
+                        if success:
+                            results['success'] += 1
+                        else:
+                            results['failed'] += 1
+                        logger.info(f"[{len(results['files']) - already_done}/{total}] "
+                                    f"{'✓' if success else '✗'} {name}")
+
+                    # 배치 진행률 (완료 파일 + 처리 중 파일의 부분 진행률)
+                    if self.progress_callback:
+                        snapshot = dict(progress)
+                        completed = len(results['files']) - already_done
+                        in_flight = [p for n, p in snapshot.items() if p < 100.0]
+                        overall = (completed + sum(in_flight) / 100) / total * 100
+                        self.progress_callback(
+                            f"Processing files: {completed}/{total} done, {len(in_flight)} in progress",
+                            max(0, min(100, overall))
+                        )
+
     def __del__(self):
         """소멸자"""
         pass